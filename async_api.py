@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from itertools import islice
+
+import requests
+
+import jira_api
+import ratelimit
+from metrics import metrics
+from storage import STORE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = jira_api.MAX_WORKERS  # Одновременных запросов на клиента
+
+
+class AsyncJiraClient:
+    """
+    Асинхронный клиент поиска Jira.
+    Все запросы проходят через общий ограничитель скорости (token bucket)
+    и семафор одновременных запросов; 429 и временные 5xx повторяются с учетом
+    Retry-After и экспоненциальной задержкой; одинаковые запросы, которые
+    уже выполняются, разделяют один ответ.
+    """
+
+    def __init__(self, search_url=None, issue_url=None, concurrency=CONCURRENCY, limiter=None, session=None):
+        self.search_url = search_url or jira_api.BASE_URL
+        self.issue_url = issue_url or jira_api.ISSUE_URL
+        self.limiter = limiter or ratelimit.limiter
+        self.session = session or jira_api.get_session()
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight = {}
+        self.requests_sent = 0
+
+    async def get_json(self, url, params):
+        """
+        Выполнить GET-запрос и вернуть JSON.
+        Если такой же запрос уже выполняется, дождаться его результата.
+        """
+        key = (url, tuple(sorted(params.items())))
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.add("jira_coalesced")
+        else:
+            task = asyncio.ensure_future(self._fetch_with_retry(url, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: отмена одного ожидающего не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    async def _fetch_with_retry(self, url, params):
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async()
+            async with self._semaphore:
+                self.requests_sent += 1
+                try:
+                    started = time.perf_counter()
+                    response = await asyncio.to_thread(
+                        self.session.get, url, params=params, timeout=jira_api.REQUEST_TIMEOUT
+                    )
+                    metrics.observe("jira_request", time.perf_counter() - started)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if attempt >= ratelimit.MAX_RETRIES:
+                        raise
+                    delay = ratelimit.retry_delay(attempt)
+                    logger.warning(f"Сбой соединения с Jira ({e}), повтор через {delay:.1f} с.")
+                    metrics.add("jira_retries", reason="connection")
+                else:
+                    metrics.add("jira_requests", status=response.status_code)
+                    if response.status_code not in ratelimit.RETRY_STATUSES or attempt >= ratelimit.MAX_RETRIES:
+                        response.raise_for_status()
+                        metrics.add("jira_response_bytes", len(response.content))
+                        with metrics.span("json_decode"):
+                            return response.json()
+                    delay = ratelimit.retry_delay(attempt, response.headers.get("Retry-After"))
+                    response.close()  # Вернуть соединение в пул до ожидания повтора
+                    logger.warning(f"Jira ответила {response.status_code}, повтор через {delay:.1f} с.")
+                    metrics.add("jira_retries", reason=str(response.status_code))
+            # Ждем вне семафора, чтобы не занимать слот
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def iter_search(self, jql, fields, expand=None, page_size=jira_api.PAGE_SIZE):
+        """
+        Асинхронный аналог jira_api.iter_search_pages: страницы запроса по порядку.
+        Следующие страницы загружаются одновременно, но не больше concurrency страниц вперед.
+        """
+        params = jira_api.search_params(jql, fields, expand)
+        first_page = await self.get_json(self.search_url, dict(params, startAt=0, maxResults=page_size))
+        step, remaining = jira_api.page_offsets(first_page, len(first_page.get("issues", [])))
+        offsets = iter(remaining)
+
+        def request(start_at):
+            return asyncio.ensure_future(self.get_json(self.search_url, dict(params, startAt=start_at, maxResults=step)))
+
+        pending = deque(request(start_at) for start_at in islice(offsets, self.concurrency))
+        try:
+            yield await self._finish_page(first_page, expand)
+            while pending:
+                page = await pending.popleft()
+                start_at = next(offsets, None)
+                if start_at is not None:
+                    pending.append(request(start_at))
+                yield await self._finish_page(page, expand)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _finish_page(self, page, expand):
+        issues = page.get("issues", [])
+        metrics.add("jira_pages")
+        metrics.add("issues_fetched", len(issues))
+        if expand and "changelog" in expand:
+            await self._complete_changelogs(issues)
+        return issues
+
+    async def search(self, jql, fields, expand=None, page_size=jira_api.PAGE_SIZE):
+        """Асинхронный аналог jira_api.search_issues: все страницы запроса."""
+        issues = []
+        async for page in self.iter_search(jql, fields, expand, page_size):
+            issues.extend(page)
+        return issues
+
+    async def _complete_changelogs(self, issues):
+        """Догрузить истории изменений, которые поиск вернул не полностью."""
+        async def complete(issue):
+            histories = issue["changelog"].setdefault("histories", [])
+            while True:
+                data = await self.get_json(
+                    f"{self.issue_url}/{issue['key']}/changelog",
+                    {"startAt": len(histories), "maxResults": jira_api.CHANGELOG_PAGE_SIZE},
+                )
+                values = data.get("values", [])
+                histories.extend(values)
+                if not values or data.get("isLast", True) or len(histories) >= data.get("total", 0):
+                    return
+
+        await asyncio.gather(*(
+            complete(issue) for issue in issues
+            if issue.get("changelog", {}).get("total", 0) > len(issue["changelog"].get("histories", []))
+        ))
+
+
+async def sync_projects_async(projects, store, client=None, force=False):
+    """
+    Синхронизировать несколько проектов с хранилищем на одном цикле событий.
+    :return: Словарь проект -> число полученных задач или исключение.
+    """
+    client = client or AsyncJiraClient()
+
+    async def sync_one(project_key):
+        plan = store.plan_sync(project_key, force)
+        if plan is None:
+            return 0
+        jql, full_load = plan
+        # Страницы сохраняются по мере получения, выдача проекта целиком в памяти не собирается
+        writer = await asyncio.to_thread(store.begin_sync, project_key, full_load)
+        async for page in client.iter_search(jql, STORE_FIELDS, expand="changelog"):
+            await asyncio.to_thread(writer.add, page)
+        await asyncio.to_thread(writer.finish)
+        return writer.count
+
+    results = await asyncio.gather(*(sync_one(project) for project in projects), return_exceptions=True)
+    for project, result in zip(projects, results):
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка синхронизации проекта {project}: {result}")
+    return dict(zip(projects, results))
+
+
+def sync_projects(projects, store=None, force=False):
+    """Синхронизировать несколько проектов (обертка для синхронного кода)."""
+    return asyncio.run(sync_projects_async(projects, store or jira_api.get_store(), force=force))
@@ -0,0 +1,198 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from colorama import Fore, Style
+
+from async_api import sync_projects
+from dataset import DAILY_WINDOW_DAYS, SUMMARY_CHARTS, get_dataset, get_snapshot_dir, summary_view
+from export import write_aggregate
+from jira_api import count_priorities, count_statuses, count_stored_issues
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Совпадает с ключами tasks.CHARTS; tasks импортируется только там, где считаются графики
+CHART_NAMES = ("open_state", "status_time", "daily", "users", "time_spent", "priority", "status")
+PUSHDOWN_CHARTS = ("priority", "status")  # Графики, которые можно посчитать без загрузки задач
+FETCH_WORKERS = 4  # Сколько проектов загружать одновременно
+
+
+def parse_charts(value):
+    """Разобрать список графиков из командной строки ('all' - все)."""
+    if value == "all":
+        return list(CHART_NAMES)
+    charts = [chart.strip() for chart in value.split(",") if chart.strip()]
+    unknown = [chart for chart in charts if chart not in CHART_NAMES]
+    if unknown:
+        raise ValueError(f"Неизвестные графики: {', '.join(unknown)}. Доступны: {', '.join(CHART_NAMES)}")
+    return charts
+
+
+def _render_chart(project_key, chart, data):
+    """
+    Построить один график в процессе-обработчике.
+    :return: Кортеж (проект, график, ошибка или None, снимок метрик процесса).
+    """
+    from tasks import CHARTS, render_chart  # matplotlib загружается в процессе-обработчике
+
+    metrics.reset()  # Процесс-обработчик переиспользуется: метрики считаем на задачу
+    error = None
+    try:
+        aggregate = CHARTS[chart][0](data)
+        if aggregate:
+            render_chart(chart, aggregate, project_key)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return project_key, chart, error, metrics.snapshot()
+
+
+def _export_chart(project_key, chart, data, output_format):
+    """
+    Сохранить агрегат графика в JSON/CSV без отрисовки (matplotlib не загружается).
+    :return: Ошибка или None.
+    """
+    from tasks import CHARTS
+
+    try:
+        aggregate = CHARTS[chart][0](data)
+        if aggregate:
+            write_aggregate(project_key, chart, aggregate, output_format)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _pushdown_view(project_key, chart):
+    """Итоги графика, посчитанные запросами maxResults=0 без загрузки задач."""
+    if chart == "priority":
+        return count_priorities(project_key, "Closed")  # Как ProjectDataset.priority_issues
+    return count_statuses(project_key)
+
+
+def new_report(projects):
+    """Пустые итоги запуска: проект -> {"issues", "charts", "errors", "seconds"}."""
+    return {project: {"issues": 0, "charts": 0, "errors": [], "seconds": 0.0} for project in projects}
+
+
+def collect_views(projects, charts, selected_status, daily_days, pushdown, report, started):
+    """
+    Синхронизировать и загрузить проекты параллельно и подготовить данные для агрегирования.
+    Ошибки синхронизации, загрузки и подготовки записываются в report.
+    :param started: Время начала запуска (time.perf_counter) для report[...]["seconds"].
+    :return: Список (проект, график, данные для агрегирования).
+    """
+    pushdown_charts = [chart for chart in charts if pushdown and chart in PUSHDOWN_CHARTS]
+    dataset_charts = [chart for chart in charts if chart not in pushdown_charts]
+
+    if dataset_charts and get_snapshot_dir() is None:
+        # Все проекты синхронизируются на одном цикле событий с общим ограничителем скорости
+        for project, result in sync_projects(projects).items():
+            if isinstance(result, Exception):
+                report[project]["errors"].append(f"синхронизация: {type(result).__name__}: {result}")
+
+    # Если всем графикам хватает сводок по страницам хранилища, таблица задач не собирается
+    summary_charts = []
+    if get_snapshot_dir() is None and dataset_charts and set(dataset_charts) <= set(SUMMARY_CHARTS):
+        summary_charts, dataset_charts = dataset_charts, []
+
+    views = []  # (проект, график, данные для агрегирования)
+    loadable = [project for project in projects if not report[project]["errors"]]
+    jobs = [(project, None) for project in loadable if dataset_charts]
+    jobs += [(project, chart) for project in loadable for chart in pushdown_charts + summary_charts]
+
+    def load(project, chart):
+        if chart is None:
+            return get_dataset(project)
+        if chart in summary_charts:
+            return summary_view(project, chart, selected_status, daily_days)
+        return _pushdown_view(project, chart)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_WORKERS, len(jobs)))) as pool:
+        futures = {pool.submit(load, project, chart): (project, chart) for project, chart in jobs}
+        for future in as_completed(futures):
+            project, chart = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                stage = "загрузка" if chart is None else f"{chart} (подсчет)"
+                report[project]["errors"].append(f"{stage}: {type(e).__name__}: {e}")
+                continue
+            finally:
+                report[project]["seconds"] = time.perf_counter() - started
+            if chart is not None:
+                views.append((project, chart, result))
+                continue
+            report[project]["issues"] = len(result.table)
+            for dataset_chart in dataset_charts:
+                try:
+                    views.append((project, dataset_chart, result.chart_view(dataset_chart, selected_status, daily_days)))
+                except Exception as e:
+                    report[project]["errors"].append(f"{dataset_chart}: {type(e).__name__}: {e}")
+    if summary_charts:
+        for project in loadable:
+            report[project]["issues"] = count_stored_issues(project)
+    return views
+
+
+def run_batch(projects, charts, selected_status="Closed", workers=None, daily_days=DAILY_WINDOW_DAYS,
+              pushdown=False, output_format="png"):
+    """
+    Построить графики для нескольких проектов без интерактивного ввода.
+    Проекты синхронизируются асинхронно и читаются из хранилища параллельно
+    в потоках, агрегирование и отрисовка выполняются в пуле процессов.
+    :param projects: Список ключей проектов.
+    :param charts: Список имен графиков.
+    :param selected_status: Статус для графиков времени в открытом состоянии и по статусам.
+    :param workers: Число процессов отрисовки (по умолчанию - число ядер).
+    :param daily_days: Окно графика создания и закрытия в днях (0 - вся история).
+    :param pushdown: Графики распределений (PUSHDOWN_CHARTS) считать на стороне Jira
+        запросами maxResults=0; если других графиков нет, задачи не загружаются вовсе.
+    :param output_format: png - картинки, json/csv - агрегаты графиков без отрисовки.
+    :return: Словарь проект -> {"issues", "charts", "errors", "seconds"}.
+    """
+    started = time.perf_counter()
+    report = new_report(projects)
+    views = collect_views(projects, charts, selected_status, daily_days, pushdown, report, started)
+
+    if output_format != "png":
+        # Агрегаты считаются быстро: пул процессов нужен только для отрисовки
+        for project, chart, data in views:
+            error = _export_chart(project, chart, data, output_format)
+            if error:
+                report[project]["errors"].append(f"{chart}: {error}")
+            else:
+                report[project]["charts"] += 1
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_render_chart, project, chart, data) for project, chart, data in views]
+        for future in as_completed(futures):
+            project, chart, error, worker_metrics = future.result()
+            metrics.merge(worker_metrics)
+            if error:
+                report[project]["errors"].append(f"{chart}: {error}")
+            else:
+                report[project]["charts"] += 1
+            report[project]["seconds"] = time.perf_counter() - started
+    return report
+
+
+def print_report(report, elapsed):
+    """Вывести итоги пакетного запуска: успех/ошибки по проектам и пропускную способность."""
+    total_issues = sum(result["issues"] for result in report.values())
+    total_charts = sum(result["charts"] for result in report.values())
+    for project, result in report.items():
+        if result["errors"]:
+            print(Fore.RED + f"{project}: ошибки ({len(result['errors'])})" + Style.RESET_ALL)
+            for error in result["errors"]:
+                print(Fore.RED + f"    {error}" + Style.RESET_ALL)
+        else:
+            print(Fore.GREEN + f"{project}: {result['charts']} графиков, {result['issues']} задач, "
+                               f"{result['seconds']:.1f} с" + Style.RESET_ALL)
+    failed = sum(1 for result in report.values() if result["errors"])
+    print(f"Проектов: {len(report)} (с ошибками: {failed}), графиков: {total_charts}, "
+          f"время: {elapsed:.1f} с, {total_issues / elapsed if elapsed else 0:.0f} задач/с, "
+          f"{total_charts / elapsed if elapsed else 0:.2f} графиков/с")
+    logger.info(f"Пакетный запуск: {len(report)} проектов, {total_charts} графиков за {elapsed:.1f} с.")
@@ -0,0 +1,211 @@
+"""
+Бенчмарк этапов загрузки, разбора, агрегирования и отрисовки на синтетических данных.
+Задачи генерируются заглушкой Jira постранично, поэтому доступны наборы до миллиона задач.
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --latency 0.05
+    python -m benchmarks.run --sizes 10000 --baseline benchmarks/results/previous.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import jira_api
+import ratelimit
+from async_api import AsyncJiraClient, sync_projects_async
+from benchmarks.stub_server import StubJiraServer
+from dataset import load_dataset
+from storage import STORE_FIELDS, IssueStore
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+REGRESSION_RATIO = 1.2  # Замедление больше чем в 1.2 раза считается регрессией
+
+
+@contextmanager
+def stub_endpoints(server):
+    """Направить jira_api на заглушку и снять ограничение скорости на время замера."""
+    saved = jira_api.BASE_URL, jira_api.ISSUE_URL, ratelimit.limiter
+    jira_api.BASE_URL, jira_api.ISSUE_URL = server.search_url, server.issue_url
+    ratelimit.limiter = ratelimit.TokenBucket(rate=1e9, capacity=1e9)
+    try:
+        yield
+    finally:
+        jira_api.BASE_URL, jira_api.ISSUE_URL, ratelimit.limiter = saved
+
+
+@contextmanager
+def temporary_store(path):
+    """Подменить общее хранилище jira_api отдельной базой на время замера."""
+    saved = jira_api._store
+    jira_api._store = IssueStore(path)
+    try:
+        yield jira_api._store
+    finally:
+        jira_api._store = saved
+
+
+@contextmanager
+def working_dir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _timed(results, size, stage, name, fn, *args, **kwargs):
+    """Выполнить fn, записав время этапа; возвращает результат fn."""
+    started = time.perf_counter()
+    value = fn(*args, **kwargs)
+    seconds = time.perf_counter() - started
+    results.append({
+        "size": size,
+        "stage": stage,
+        "function": name,
+        "seconds": round(seconds, 6),
+        "issues_per_second": round(size / seconds, 1) if seconds else None,
+    })
+    return value
+
+
+def _drain(pages):
+    """Прочитать страницы, не накапливая их: возвращает число задач."""
+    return sum(len(page) for page in pages)
+
+
+async def _drain_async(pages):
+    count = 0
+    async for page in pages:
+        count += len(page)
+    return count
+
+
+def run_benchmarks(sizes, latency=0.0, render=True, seed=42):
+    """
+    Замерить этапы для каждого размера набора.
+    Загрузка замеряется функциями, которые вызывает продукт (первая загрузка проекта
+    через поток ответов в хранилище, пакетная синхронизация, повторная загрузка из хранилища);
+    задачи заглушка Jira генерирует постранично, поэтому весь набор в памяти не собирается.
+    :param sizes: Размеры синтетических наборов задач.
+    :param latency: Задержка ответа заглушки Jira в секундах.
+    :param render: Замерять ли отрисовку графиков.
+    :return: Список записей {size, stage, function, seconds, issues_per_second}.
+    """
+    from tasks import CHARTS  # matplotlib нужен только здесь
+
+    results = []
+
+    def traffic(server, name, fn, *args, stage="fetch"):
+        requests_before, bytes_before = server.requests, server.bytes_sent
+        value = _timed(results, size, stage, name, fn, *args)
+        results[-1].update(requests=server.requests - requests_before, bytes=server.bytes_sent - bytes_before)
+        return value
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp, StubJiraServer(size, latency, seed=seed) as server, \
+                stub_endpoints(server), temporary_store(os.path.join(tmp, "issues.sqlite3")):
+            query = "project=BENCH"
+            traffic(server, "jira_api.iter_search_pages", _drain,
+                    jira_api.iter_search_pages(query, STORE_FIELDS, expand="changelog"))
+            client = AsyncJiraClient(search_url=server.search_url, issue_url=server.issue_url,
+                                     limiter=ratelimit.limiter)
+            traffic(server, "async_api.AsyncJiraClient.iter_search", asyncio.run,
+                    _drain_async(client.iter_search(query, STORE_FIELDS, expand="changelog")))
+            traffic(server, "jira_api.iter_search_stream", _drain,
+                    jira_api.iter_search_stream(query, STORE_FIELDS, expand="changelog"))
+
+            # Пакетный режим синхронизирует проекты асинхронным клиентом в отдельное хранилище
+            traffic(server, "async_api.sync_projects_async", asyncio.run,
+                    sync_projects_async(["BENCH"], IssueStore(os.path.join(tmp, "batch.sqlite3")), client),
+                    stage="load")
+            # Первая загрузка: поток ответов Jira сразу в хранилище и таблицу
+            traffic(server, "jira_api.load_project_table", jira_api.load_project_table, "BENCH", stage="load")
+            # Повторная загрузка набора (синхронизация в пределах интервала не нужна)
+            dataset = traffic(server, "dataset.load_dataset", load_dataset, "BENCH", stage="load")
+            _timed(results, size, "parse", "dataset.ProjectDataset.intervals", lambda: dataset.intervals)
+
+            with working_dir(tmp):
+                for chart, (aggregate_fn, render_fn) in CHARTS.items():
+                    # Синтетические задачи старше окна графика по дням, поэтому берем всю историю
+                    data = dataset.chart_view(chart, daily_days=None)
+                    aggregate = _timed(results, size, "aggregate", f"tasks.{aggregate_fn.__name__}",
+                                       aggregate_fn, data)
+                    if render and aggregate:
+                        _timed(results, size, "render", f"tasks.{render_fn.__name__}", render_fn, aggregate, "BENCH")
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """
+    Сравнить результаты с предыдущим запуском.
+    :return: Список регрессий (записи с полем ratio).
+    """
+    previous = {(r["size"], r["stage"], r["function"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for record in results:
+        before = previous.get((record["size"], record["stage"], record["function"]))
+        if not before:
+            continue
+        ratio = record["seconds"] / before
+        print(f"{record['size']:>8} {record['stage']:<10} {record['function']:<45} "
+              f"{before:9.4f} -> {record['seconds']:9.4f} с  x{ratio:.2f}")
+        if ratio > REGRESSION_RATIO:
+            regressions.append(dict(record, ratio=round(ratio, 3)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов обработки задач Jira.")
+    parser.add_argument("--sizes", default="1000,10000", help="Размеры наборов через запятую (до 1000000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа заглушки Jira, с")
+    parser.add_argument("--no-render", action="store_true", help="Не замерять отрисовку")
+    parser.add_argument("--output", help="Файл результатов (JSON)")
+    parser.add_argument("--baseline", help="Результаты предыдущего запуска для сравнения")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_benchmarks(sizes, args.latency, render=not args.no_render)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "latency": args.latency,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    if os.path.dirname(output) and not os.path.exists(os.path.dirname(output)):
+        os.makedirs(os.path.dirname(output))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+
+    for record in results:
+        print(f"{record['size']:>8} {record['stage']:<10} {record['function']:<45} {record['seconds']:9.4f} с")
+    print(f"Результаты записаны в {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            print(f"Регрессии (медленнее в {REGRESSION_RATIO} раза и больше): {len(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import generate_issue, search_page
+
+PAGE_CAP = 1000  # Как у Jira: больше 1000 задач на страницу не отдается
+
+
+class StubJiraServer:
+    """
+    Локальная заглушка Jira REST API для бенчмарков и тестов.
+    Отдает /rest/api/2/search с постраничной выдачей и
+    /rest/api/2/issue/{key}/changelog; latency добавляется к каждому ответу.
+    Задачи синтетического набора (benchmarks.synthetic) генерируются для каждой
+    запрошенной страницы, поэтому память заглушки не зависит от размера набора.
+    """
+
+    def __init__(self, count, latency=0.0, page_cap=PAGE_CAP, seed=42, project_key="BENCH"):
+        self.count = count
+        self.latency = latency
+        self.page_cap = page_cap
+        self.seed = seed
+        self.project_key = project_key
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def root_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/rest/api/2"
+
+    @property
+    def search_url(self):
+        return f"{self.root_url}/search"
+
+    @property
+    def issue_url(self):
+        return f"{self.root_url}/issue"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _changelog(self, key, start_at, max_results):
+        number = int(key.rsplit("-", 1)[1])
+        histories = generate_issue(number, self.seed, self.project_key)["changelog"]["histories"]
+        values = histories[start_at:start_at + max_results]
+        return {"startAt": start_at, "maxResults": max_results, "total": len(histories),
+                "isLast": start_at + len(values) >= len(histories), "values": values}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, как у настоящего сервера
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                start_at = int(query.get("startAt", ["0"])[0])
+                max_results = min(int(query.get("maxResults", ["50"])[0]), stub.page_cap)
+                if url.path.endswith("/search"):
+                    with_changelog = "changelog" in query.get("expand", [""])[0]
+                    payload = search_page(stub.count, start_at, max_results, stub.seed, stub.project_key,
+                                          with_changelog)
+                elif url.path.endswith("/changelog"):
+                    key = url.path.rstrip("/").split("/")[-2]
+                    payload = stub._changelog(key, start_at, max_results)
+                else:
+                    self.send_error(404)
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = json.dumps(payload).encode("utf-8")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+STATUSES = ("Open", "In Progress", "Patch Available", "Reopened", "Resolved", "Closed")
+# Доли приоритетов примерно как в проектах Apache
+PRIORITIES = (("Major", 0.55), ("Minor", 0.25), ("Critical", 0.08), ("Blocker", 0.05), ("Trivial", 0.07))
+START = datetime(2019, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 5 * 365
+
+
+def _format(moment):
+    """Дата в формате Jira: 2023-09-01T12:00:00.000+0000."""
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}+0000"
+
+
+def _user(rng, users):
+    return {"displayName": f"User {rng.randrange(users):04d}"}
+
+
+def generate_issue(number, seed=42, project_key="BENCH", users=500, with_changelog=True):
+    """
+    Сгенерировать одну правдоподобную задачу Jira с историей изменений.
+    Задача зависит только от номера и зерна, поэтому любую страницу набора
+    можно построить отдельно, не генерируя предыдущие.
+    """
+    rng = random.Random(f"{seed}:{number}")
+    created = START + timedelta(seconds=rng.randrange(SPAN_DAYS * 24 * 3600))
+    moment = created
+    status = "Open"
+    histories = []
+    for _ in range(rng.choice((0, 1, 2, 2, 3, 3, 4, 6, 8))):
+        moment += timedelta(seconds=int(rng.expovariate(1 / (7 * 24 * 3600))) + 60)
+        new_status = rng.choice([s for s in STATUSES if s != status])
+        items = [{"field": "status", "fieldtype": "jira", "fromString": status, "toString": new_status}]
+        if rng.random() < 0.3:
+            # Изменение статуса часто идет вместе с другими полями
+            items.insert(0, {"field": "assignee", "fieldtype": "jira", "fromString": None,
+                             "toString": _user(rng, users)["displayName"]})
+        histories.append({"id": str(number * 10 + len(histories)), "created": _format(moment), "items": items})
+        status = new_status
+
+    resolved = status in ("Resolved", "Closed")
+    priority = rng.choices([name for name, _ in PRIORITIES], [weight for _, weight in PRIORITIES])[0]
+    issue = {
+        "id": str(100000 + number),
+        "key": f"{project_key}-{number}",
+        "fields": {
+            "created": _format(created),
+            "updated": _format(moment),
+            "resolutiondate": _format(moment) if resolved else None,
+            "status": {"name": status},
+            "priority": {"name": priority},
+            "assignee": _user(rng, users) if rng.random() < 0.8 else None,
+            "reporter": _user(rng, users),
+            "timespent": rng.randrange(900, 200 * 3600, 900) if rng.random() < 0.3 else None,
+        },
+    }
+    if with_changelog:
+        issue["changelog"] = {"startAt": 0, "maxResults": len(histories), "total": len(histories),
+                              "histories": histories}
+    return issue
+
+
+def iter_issues(count, seed=42, project_key="BENCH", users=500, with_changelog=True):
+    """Генератор задач синтетического набора по одной (без списка в памяти)."""
+    for number in range(1, count + 1):
+        yield generate_issue(number, seed, project_key, users, with_changelog)
+
+
+def generate_issues(count, seed=42, project_key="BENCH", users=500, with_changelog=True):
+    """
+    Сгенерировать синтетический набор задач Jira списком (для небольших наборов;
+    большие наборы заглушка Jira генерирует постранично).
+    :param count: Число задач.
+    :param seed: Зерно генератора, чтобы наборы совпадали между запусками.
+    """
+    return list(iter_issues(count, seed, project_key, users, with_changelog))
+
+
+def search_page(count, start_at, max_results, seed=42, project_key="BENCH", with_changelog=True):
+    """Сформировать ответ /rest/api/2/search для страницы набора из count задач."""
+    stop = min(start_at + max_results, count)
+    issues = [generate_issue(number, seed, project_key, with_changelog=with_changelog)
+              for number in range(start_at + 1, stop + 1)]
+    return {"startAt": start_at, "maxResults": max_results, "total": count, "issues": issues}
@@ -0,0 +1,177 @@
+import numpy as np
+
+from issue_table import DAY, Categorical, as_table, parse_jira_dates
+from metrics import metrics
+
+
+def extract_status_transitions(issues):
+    """
+    Выбрать все переходы статусов из историй изменений за один проход.
+    Просматриваются все элементы каждой записи истории, а не только первый.
+    :param issues: Список задач Jira с expand=changelog.
+    :return: Кортеж списков (индекс задачи, время перехода, из статуса, в статус).
+    """
+    positions, times, from_statuses, to_statuses = [], [], [], []
+    for position, issue in enumerate(issues):
+        for history in issue.get("changelog", {}).get("histories", []):
+            for item in history.get("items", []):
+                if item.get("field") == "status":
+                    positions.append(position)
+                    times.append(history["created"])
+                    from_statuses.append(item.get("fromString"))
+                    to_statuses.append(item.get("toString"))
+    return positions, times, from_statuses, to_statuses
+
+
+class StatusIntervals:
+    """
+    Таблица интервалов пребывания задач в статусах: (задача, статус, вход, выход).
+    Строится один раз и переиспользуется гистограммами, перцентилями
+    и запросами времени в статусе. Выход NaT означает, что задача еще в статусе.
+    """
+
+    def __init__(self, keys, issue, status, enter, exit):
+        self.keys = keys
+        self.issue = issue
+        self.status = status
+        self.enter = enter
+        self.exit = exit
+
+    @classmethod
+    def build(cls, table, positions, times_ms, from_statuses, to_statuses):
+        """
+        Построить интервалы по таблице задач и переходам статусов.
+        :param table: IssueTable (даты создания, решения и текущий статус).
+        :param positions: Индексы задач в table для каждого перехода.
+        :param times_ms: Время переходов (datetime64[ms]).
+        :param from_statuses: Исходные статусы переходов.
+        :param to_statuses: Новые статусы переходов.
+        """
+        with metrics.span("parse", stage="status_intervals"):
+            intervals = cls._build(table, positions, times_ms, from_statuses, to_statuses)
+        metrics.add("transitions_processed", len(positions))
+        return intervals
+
+    @classmethod
+    def _build(cls, table, positions, times_ms, from_statuses, to_statuses):
+        positions = np.asarray(positions, dtype=np.int64)
+        times_ms = np.asarray(times_ms, dtype="datetime64[ms]")
+        index = dict(table.status.categories)  # Переходы дополняют словарь статусов
+        from_codes = Categorical.encode(list(from_statuses), index).codes
+        to_codes = Categorical.encode(list(to_statuses), index).codes
+
+        order = np.lexsort((times_ms, positions))
+        positions, times_ms = positions[order], times_ms[order]
+        from_codes, to_codes = from_codes[order], to_codes[order]
+        end = table.resolved  # Интервал последнего статуса заканчивается решением задачи
+
+        is_first = np.ones(len(positions), dtype=bool)
+        is_first[1:] = positions[1:] != positions[:-1]
+        is_last = np.ones(len(positions), dtype=bool)
+        is_last[:-1] = positions[1:] != positions[:-1]
+        next_time = np.empty_like(times_ms)
+        next_time[:-1] = times_ms[1:]
+        next_time[is_last] = end[positions[is_last]]
+
+        # Задачи без переходов весь срок находятся в текущем статусе
+        quiet = np.setdiff1d(np.arange(len(table)), positions)
+
+        issue = np.concatenate([positions[is_first], positions, quiet])
+        status = np.concatenate([from_codes[is_first], to_codes, table.status.codes[quiet]])
+        enter = np.concatenate([table.created[positions[is_first]], times_ms, table.created[quiet]])
+        exit = np.concatenate([times_ms[is_first], next_time, end[quiet]])
+        return cls(table.keys, issue, Categorical(status, index), enter, exit)
+
+    @classmethod
+    def from_transitions(cls, table, transitions):
+        """
+        Построить интервалы по таблице задач и переходам статусов из хранилища.
+        :param table: IssueTable или записи IssueRecord.
+        :param transitions: Кортеж (ключи задач, время в мс, из статуса, в статус),
+            как у IssueStore.query_transitions; переходы задач не из table отбрасываются.
+        """
+        table = as_table(table)
+        keys, changed_ms, from_statuses, to_statuses = transitions
+        keys = np.asarray(keys, dtype=object)
+        table_keys = table.keys
+        sorter = np.argsort(table_keys)
+        found = np.searchsorted(table_keys, keys, sorter=sorter)
+        matched = found < len(table_keys)
+        matched[matched] = table_keys[sorter[found[matched]]] == keys[matched]
+        return cls.build(
+            table,
+            sorter[found[matched]],
+            np.asarray(changed_ms, dtype=np.int64)[matched].astype("datetime64[ms]"),
+            np.asarray(from_statuses, dtype=object)[matched],
+            np.asarray(to_statuses, dtype=object)[matched],
+        )
+
+    @classmethod
+    def from_issues(cls, issues):
+        """Построить интервалы напрямую из задач Jira с историей изменений."""
+        issues = list(issues)
+        if issues and not isinstance(issues[0], dict):
+            raise TypeError(
+                f"История изменений есть только у задач Jira, а не у {type(issues[0]).__name__}:"
+                " для записей нужны переходы статусов (StatusIntervals.from_transitions)"
+            )
+        positions, times, from_statuses, to_statuses = extract_status_transitions(issues)
+        return cls.build(as_table(issues), positions, parse_jira_dates(times), from_statuses, to_statuses)
+
+    def __len__(self):
+        return len(self.issue)
+
+    def for_issues(self, mask):
+        """Оставить интервалы задач, отмеченных маской по таблице задач."""
+        return self._take(np.asarray(mask)[self.issue])
+
+    def _take(self, selector):
+        return StatusIntervals(
+            self.keys, self.issue[selector], self.status.take(selector),
+            self.enter[selector], self.exit[selector],
+        )
+
+    def durations(self, now=None):
+        """
+        Длительность интервалов в миллисекундах.
+        :param now: Момент, которым закрываются незавершенные интервалы (None - оставить NaN).
+        """
+        exit = self.exit
+        if now is not None:
+            exit = np.where(np.isnat(exit), np.datetime64(now, "ms"), exit)
+        spent = (exit - self.enter).astype(np.float64)
+        spent[np.isnat(exit)] = np.nan
+        return np.maximum(spent, 0)
+
+    def durations_by_status(self, now=None):
+        """Длительности в днях (целых, больше нуля) для каждого статуса."""
+        days = self.durations(now) // (DAY / np.timedelta64(1, "ms"))
+        result = {}
+        for code, name in enumerate(self.status.names):
+            values = days[(self.status.codes == code) & (days > 0)]
+            if values.size:
+                result[name] = values.astype(np.int64)
+        return result
+
+    def time_in_status(self, status, now=None):
+        """
+        Суммарное время каждой задачи в статусе (мс).
+        :return: Массив длины числа задач в исходной таблице.
+        """
+        selected = self.status.code_mask(status)
+        spent = np.nan_to_num(self.durations(now)[selected])
+        return np.bincount(self.issue[selected], weights=spent, minlength=len(self.keys))
+
+    def cycle_time_percentiles(self, statuses, percentiles=(50, 90, 99), now=None):
+        """
+        Перцентили суммарного времени задач в заданных статусах (дни).
+        Учитываются только задачи, побывавшие хотя бы в одном из статусов.
+        """
+        selected = self.status.code_mask(*statuses)
+        spent = np.nan_to_num(self.durations(now)[selected])
+        totals = np.bincount(self.issue[selected], weights=spent, minlength=len(self.keys))
+        visited = np.bincount(self.issue[selected], minlength=len(self.keys)) > 0
+        if not visited.any():
+            return {}
+        values = np.percentile(totals[visited] / (DAY / np.timedelta64(1, "ms")), percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = ".chart_index.json"
+MAX_BYTES = 200 * 1024 * 1024  # Предельный объем графиков в папке результатов
+MAX_AGE = 30 * 24 * 3600  # Графики, к которым не обращались дольше, удаляются
+
+
+def chart_key(project_key, chart, aggregate, params=None):
+    """
+    Ключ графика: хеш агрегированных данных и параметров построения.
+    :param aggregate: Результат aggregate_* (JSON-совместимые данные).
+    :param params: Параметры отрисовки, влияющие на картинку.
+    """
+    payload = json.dumps(
+        {"project": project_key, "chart": chart, "aggregate": aggregate, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """
+    Кеш отрисованных графиков в папке результатов.
+    Индекс связывает ключ графика с его файлами; при совпадении ключа
+    отрисовка пропускается. Старые и лишние по объему графики удаляются.
+    Индекс перечитывается перед записью, поэтому параллельные процессы
+    могут потерять чужую запись, но это приводит лишь к повторной отрисовке.
+    """
+
+    def __init__(self, results_dir="results", max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.results_dir = results_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(results_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index):
+        if not os.path.exists(self.results_dir):
+            os.makedirs(self.results_dir)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, key):
+        """
+        Найти готовый график.
+        :return: Список путей к файлам или None, если графика нет.
+        """
+        with self._lock:
+            index = self._load()
+            entry = index.get(key)
+            if not entry or not all(os.path.exists(path) for path in entry["paths"]):
+                return None
+            entry["accessed"] = time.time()
+            self._save(index)
+            return entry["paths"]
+
+    def store(self, key, paths):
+        """Запомнить файлы, отрисованные для ключа, и применить политику вытеснения."""
+        with self._lock:
+            index = self._load()
+            # Файлы перезаписаны новым графиком: старые записи про них больше не верны
+            for other_key in [k for k, entry in index.items() if set(entry["paths"]) & set(paths)]:
+                del index[other_key]
+            now = time.time()
+            index[key] = {
+                "paths": list(paths),
+                "size": sum(os.path.getsize(path) for path in paths if os.path.exists(path)),
+                "created": now,
+                "accessed": now,
+            }
+            self._evict(index, now)
+            self._save(index)
+
+    def _evict(self, index, now):
+        total = sum(entry["size"] for entry in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1]["accessed"]):
+            if now - entry["accessed"] <= self.max_age and total <= self.max_bytes:
+                break
+            for path in entry["paths"]:
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= entry["size"]
+            del index[key]
+            logger.info(f"График удален из кеша: {', '.join(entry['paths'])}")
+
+    def evict(self):
+        """Применить политику вытеснения без добавления графиков."""
+        with self._lock:
+            index = self._load()
+            self._evict(index, time.time())
+            self._save(index)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(results_dir=None):
+    """Получить кеш графиков для папки результатов (по умолчанию utils.RESULTS_DIR)."""
+    results_dir = results_dir or utils.RESULTS_DIR
+    with _caches_lock:
+        if results_dir not in _caches:
+            _caches[results_dir] = ChartCache(results_dir)
+        return _caches[results_dir]
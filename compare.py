@@ -0,0 +1,249 @@
+"""
+Сравнение проектов: одни и те же графики нескольких проектов на общих осях.
+
+    python main.py --compare --projects KAFKA,HADOOP,SPARK --charts open_state,priority
+
+Проекты загружаются одновременно, агрегаты каждого проекта считаются в пуле
+процессов, поэтому время запуска определяется самым большим проектом.
+Результат - по картинке на график (results/<P1_P2_...>_compare_<график>.png)
+и сводная таблица results/<P1_P2_...>_compare_summary.csv.
+"""
+import csv
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from batch import collect_views, new_report
+from dataset import DAILY_WINDOW_DAYS
+from metrics import metrics
+import utils
+from utils import pyplot, save_plot
+
+logger = logging.getLogger(__name__)
+
+TOP_USERS = 10  # Пользователей на малом графике проекта
+SUMMARY_COLUMNS = (
+    "project", "issues", "open_p50", "open_p90", "time_spent_p50",
+    "created", "closed", "backlog", "top_priority", "top_priority_share",
+)
+
+
+def _aggregate_chart(project_key, chart, data):
+    """
+    Посчитать агрегат графика в процессе-обработчике.
+    :return: Кортеж (проект, график, агрегат, ошибка или None, снимок метрик процесса).
+    """
+    from tasks import CHARTS
+
+    metrics.reset()
+    try:
+        return project_key, chart, CHARTS[chart][0](data), None, metrics.snapshot()
+    except Exception as e:
+        return project_key, chart, None, f"{type(e).__name__}: {e}", metrics.snapshot()
+
+
+def compute_aggregates(projects, charts, selected_status="Closed", workers=None, daily_days=DAILY_WINDOW_DAYS):
+    """
+    Загрузить проекты параллельно и посчитать агрегаты графиков в пуле процессов.
+    :return: Пара (график -> {проект -> агрегат}, итоги запуска как у batch.run_batch).
+    """
+    started = time.perf_counter()
+    report = new_report(projects)
+    views = collect_views(projects, charts, selected_status, daily_days, False, report, started)
+    aggregates = {chart: {} for chart in charts}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_aggregate_chart, project, chart, data) for project, chart, data in views]
+        for future in as_completed(futures):
+            project, chart, aggregate, error, worker_metrics = future.result()
+            metrics.merge(worker_metrics)
+            if error:
+                report[project]["errors"].append(f"{chart}: {error}")
+            elif aggregate:
+                aggregates[chart][project] = aggregate
+                report[project]["charts"] += 1
+            report[project]["seconds"] = time.perf_counter() - started
+    # Порядок проектов на графиках - как в командной строке
+    aggregates = {chart: {project: per_project[project] for project in projects if project in per_project}
+                  for chart, per_project in aggregates.items()}
+    return aggregates, report
+
+
+def _title(text, projects):
+    return f"{text} ({', '.join(projects)})"
+
+
+def _render_histograms(per_project, xlabel, title):
+    """Гистограммы проектов ступенчатыми линиями; по оси Y - доля задач проекта."""
+    plt = pyplot()
+    plt.figure(figsize=(10, 6))
+    for project, aggregate in per_project.items():
+        counts = np.asarray(aggregate["counts"], dtype=np.float64)
+        p50 = aggregate["percentiles"].get("p50")
+        plt.stairs(counts / counts.sum(), aggregate["edges"], label=f"{project} (p50 = {p50:.1f})", linewidth=2)
+    plt.xlabel(xlabel)
+    plt.ylabel("Доля задач")
+    plt.title(_title(title, list(per_project)))
+    plt.legend()
+    plt.grid(axis="y")
+
+
+def _render_grouped_bars(categories, per_project, ylabel, title):
+    """Столбцы проектов рядом для каждой категории."""
+    plt = pyplot()
+    plt.figure(figsize=(max(8, len(categories) * len(per_project) * 0.4), 6))
+    width = 0.8 / len(per_project)
+    positions = np.arange(len(categories))
+    for i, (project, values) in enumerate(per_project.items()):
+        plt.bar(positions + i * width, values, width, label=project)
+    plt.xticks(positions + width * (len(per_project) - 1) / 2, categories, rotation=45, ha="right")
+    plt.ylabel(ylabel)
+    plt.title(_title(title, list(per_project)))
+    plt.legend()
+    plt.grid(axis="y")
+    plt.tight_layout()
+
+
+def _render_shares(per_project, names_key, title):
+    """Распределение по категориям в процентах от задач проекта (проекты разного размера сравнимы)."""
+    categories = list(dict.fromkeys(name for aggregate in per_project.values() for name in aggregate[names_key]))
+    shares = {}
+    for project, aggregate in per_project.items():
+        counts = dict(zip(aggregate[names_key], aggregate["counts"]))
+        total = sum(counts.values()) or 1
+        shares[project] = [100 * counts.get(name, 0) / total for name in categories]
+    _render_grouped_bars(categories, shares, "Доля задач, %", title)
+
+
+def _render_status_times(per_project):
+    """Медианное время в каждом статусе по проектам."""
+    statuses = list(dict.fromkeys(status for aggregate in per_project.values() for status in aggregate))
+    medians = {
+        project: [aggregate[status]["percentiles"]["p50"] if aggregate.get(status) else 0 for status in statuses]
+        for project, aggregate in per_project.items()
+    }
+    _render_grouped_bars(statuses, medians, "Медиана времени в статусе (дни)", "Время в статусах")
+
+
+def _render_daily(per_project):
+    """Открытый бэклог и накопленное число закрытых задач по дням."""
+    plt = pyplot()
+    figure, (backlog_axis, closed_axis) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    for project, aggregate in per_project.items():
+        dates = np.array(aggregate["dates"], dtype="datetime64[D]")
+        backlog_axis.plot(dates, aggregate["backlog"], label=project)
+        closed_axis.plot(dates, aggregate["cumulative_closed"], label=project)
+    backlog_axis.set_ylabel("Открытый бэклог")
+    closed_axis.set_ylabel("Закрыто (накопленный итог)")
+    closed_axis.set_xlabel("Дата")
+    for axis in (backlog_axis, closed_axis):
+        axis.legend()
+        axis.grid(True)
+    figure.suptitle(_title("Создание и закрытие задач", list(per_project)))
+
+
+def _render_users(per_project):
+    """Малые графики: топ пользователей каждого проекта."""
+    plt = pyplot()
+    figure, axes = plt.subplots(1, len(per_project), figsize=(5 * len(per_project), 6), squeeze=False)
+    for axis, (project, aggregate) in zip(axes[0], per_project.items()):
+        axis.barh(aggregate["users"][:TOP_USERS], aggregate["counts"][:TOP_USERS], color="skyblue")
+        axis.invert_yaxis()
+        axis.set_title(project)
+        axis.set_xlabel("Количество задач")
+        axis.grid(axis="x")
+    figure.suptitle(_title(f"Топ-{TOP_USERS} пользователей по задачам", list(per_project)))
+    figure.tight_layout()
+
+
+def render_comparison(chart, per_project, projects=None):
+    """
+    Нарисовать график сравнения проектов.
+    :param per_project: Проект -> агрегат графика (из tasks.CHARTS).
+    :param projects: Все сравниваемые проекты для имени файла (по умолчанию - проекты per_project).
+    :return: Путь к картинке.
+    """
+    if chart == "open_state":
+        _render_histograms(per_project, "Время в открытом состоянии (дни)", "Время в открытом состоянии")
+    elif chart == "time_spent":
+        _render_histograms(per_project, "Затраченное время (часы)", "Время выполнения задач")
+    elif chart == "status_time":
+        _render_status_times(per_project)
+    elif chart == "daily":
+        _render_daily(per_project)
+    elif chart == "users":
+        _render_users(per_project)
+    elif chart == "priority":
+        _render_shares(per_project, "priorities", "Задачи по приоритетам")
+    elif chart == "status":
+        _render_shares(per_project, "statuses", "Задачи по статусам")
+    else:
+        raise ValueError(f"Неизвестный график: {chart}")
+    return save_plot(f"compare_{chart}", "_".join(projects or per_project))
+
+
+def summary_rows(aggregates, report):
+    """Строки сводной таблицы (по SUMMARY_COLUMNS), по одной на проект; пустые ячейки - None."""
+    rows = []
+    for project, result in report.items():
+        open_state = aggregates.get("open_state", {}).get(project)
+        time_spent = aggregates.get("time_spent", {}).get(project)
+        daily = aggregates.get("daily", {}).get(project)
+        priority = aggregates.get("priority", {}).get(project)
+        top_priority = top_share = None
+        if priority and priority["counts"]:
+            top = int(np.argmax(priority["counts"]))
+            top_priority = priority["priorities"][top]
+            top_share = round(priority["counts"][top] / sum(priority["counts"]), 3)
+        rows.append((
+            project,
+            result["issues"],
+            open_state["percentiles"]["p50"] if open_state else None,
+            open_state["percentiles"]["p90"] if open_state else None,
+            time_spent["percentiles"]["p50"] if time_spent else None,
+            sum(daily["created"]) if daily else None,
+            sum(daily["closed"]) if daily else None,
+            daily["backlog"][-1] if daily else None,
+            top_priority,
+            top_share,
+        ))
+    return rows
+
+
+def write_summary(rows, projects, results_dir=None):
+    """Сохранить сводную таблицу сравнения в CSV (по умолчанию в utils.RESULTS_DIR)."""
+    results_dir = results_dir or utils.RESULTS_DIR
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    path = os.path.join(results_dir, f"{'_'.join(projects)}_compare_summary.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_COLUMNS)
+        writer.writerows(rows)
+    return path
+
+
+def run_compare(projects, charts, selected_status="Closed", workers=None, daily_days=DAILY_WINDOW_DAYS):
+    """
+    Сравнить проекты: агрегаты параллельно, графики сравнения и сводная таблица.
+    :return: Итоги запуска как у batch.run_batch (charts - число агрегатов проекта).
+    """
+    aggregates, report = compute_aggregates(projects, charts, selected_status, workers, daily_days)
+    for chart, per_project in aggregates.items():
+        if not per_project:
+            continue
+        try:
+            render_comparison(chart, per_project, projects)
+        except Exception as e:
+            logger.error(f"Ошибка построения графика сравнения {chart}: {e}")
+            for project in per_project:
+                report[project]["errors"].append(f"{chart} (сравнение): {type(e).__name__}: {e}")
+    rows = summary_rows(aggregates, report)
+    path = write_summary(rows, projects)
+    print(" | ".join(SUMMARY_COLUMNS))
+    for row in rows:
+        print(" | ".join("-" if value is None else str(value) for value in row))
+    print(f"Сводная таблица сохранена: {path}")
+    return report
@@ -0,0 +1,248 @@
+import threading
+import time
+import logging
+
+import numpy as np
+
+from changelog import StatusIntervals, extract_status_transitions
+from issue_table import as_table, parse_jira_dates
+from jira_api import iter_project_records, load_daily_rollup, load_project_table, load_project_transitions
+from query import Query, TableIndex
+from rollups import DailyRollup
+from snapshot import load_snapshot, snapshot_path
+from streaming import fold
+from tasks import summarize_open_state, summarize_time_spent
+
+logger = logging.getLogger(__name__)
+
+DAILY_WINDOW_DAYS = 60  # Окно графика создания и закрытия задач по умолчанию
+DAILY_STATUSES = ("Open", "Closed")  # Задачи, которые учитывает график создания и закрытия
+# Графики, данные которых собираются по страницам хранилища без таблицы задач (summary_view)
+SUMMARY_CHARTS = ("open_state", "time_spent", "daily")
+
+
+def _window(rollup, days):
+    """Дневные итоги за days дней до сегодняшнего дня включительно (None или 0 - вся история)."""
+    if not days:
+        return rollup
+    today = np.datetime64(int(time.time() * 1000), "ms").astype("datetime64[D]")
+    return rollup.window(since=today - np.timedelta64(days, "D"), until=today)
+
+
+class ProjectDataset:
+    """
+    Задачи проекта, загруженные один раз за сессию.
+    Все поля, нужные графикам, приходят одним запросом и один раз
+    превращаются в колоночную таблицу, а каждый график получает
+    отфильтрованное представление в памяти.
+    """
+
+    def __init__(self, project_key, issues, selected_status=None, transitions=None, rollup=None, intervals=None):
+        """
+        :param issues: Таблица IssueTable, записи IssueRecord или задачи в формате ответа Jira.
+        :param transitions: Переходы статусов из хранилища (ключи, время в мс, из, в);
+            None - взять истории изменений из задач Jira (у таблицы и записей их нет).
+        :param rollup: Дневные итоги задач DAILY_STATUSES за всю историю из хранилища;
+            None - посчитать по таблице задач.
+        :param intervals: Готовые интервалы статусов (например, из снимка).
+        """
+        self.project_key = project_key
+        self.selected_status = selected_status
+        self.table = as_table(issues)
+        # Исходные задачи Jira нужны только ради историй изменений, иначе не держим их в памяти
+        keep_issues = transitions is None and isinstance(issues, list) and issues and isinstance(issues[0], dict)
+        self.issues = issues if keep_issues else None
+        self.transitions = transitions
+        self.rollup = rollup
+        self.loaded_at = time.time()
+        self._intervals = intervals
+        self._intervals_lock = threading.Lock()
+        self._index = None
+
+    @property
+    def intervals(self):
+        """Интервалы пребывания в статусах (строятся один раз на набор)."""
+        with self._intervals_lock:
+            if self._intervals is None:
+                if self.transitions is None:
+                    positions, times, from_statuses, to_statuses = extract_status_transitions(self.issues or [])
+                    self._intervals = StatusIntervals.build(
+                        self.table, positions, parse_jira_dates(times), from_statuses, to_statuses
+                    )
+                else:
+                    self._intervals = StatusIntervals.from_transitions(self.table, self.transitions)
+            return self._intervals
+
+    def with_changes(self, records, transitions=None, rollup=None):
+        """
+        Новый набор, в котором обновлены только строки изменившихся задач (IssueTable.upsert).
+        :param records: Записи IssueRecord задач, изменившихся с момента загрузки набора.
+        :param transitions: Свежие переходы статусов (None - оставить прежние; интервалы
+            статусов тогда относятся к прежним переходам).
+        :param rollup: Свежие дневные итоги (None - оставить прежние).
+        """
+        return ProjectDataset(
+            self.project_key,
+            self.table.upsert(records),
+            self.selected_status,
+            self.transitions if transitions is None else transitions,
+            self.rollup if rollup is None else rollup,
+        )
+
+    def _resolved_with_status(self, status):
+        table = self.table
+        return table.take(table.status_in(status) & ~np.isnat(table.resolved))
+
+    def open_state_issues(self, status="Closed"):
+        """Задачи для гистограммы времени в открытом состоянии."""
+        return self._resolved_with_status(status)
+
+    def status_time_issues(self, selected_status):
+        """Интервалы статусов задач, находящихся в выбранном статусе."""
+        return self.intervals.for_issues(self.table.status_in(selected_status))
+
+    def daily_rollup(self, days=DAILY_WINDOW_DAYS):
+        """
+        Дневные итоги для графика создания и закрытия.
+        :param days: Окно в днях до сегодняшнего дня (None или 0 - вся история).
+        """
+        if self.rollup is None:
+            table = self.table
+            self.rollup = DailyRollup.from_table(table.take(table.status_in(*DAILY_STATUSES)))
+        return _window(self.rollup, days)
+
+    def user_issues(self):
+        """Задачи с исполнителем и репортером."""
+        table = self.table
+        return table.take((table.assignee.codes >= 0) & (table.reporter.codes >= 0))
+
+    def time_spent_issues(self):
+        """Закрытые задачи для анализа времени выполнения."""
+        return self.table.take(self.table.status_in("Closed"))
+
+    def priority_issues(self):
+        """Закрытые задачи для анализа приоритетов."""
+        return self.table.take(self.table.status_in("Closed"))
+
+    def query(self):
+        """Запрос к задачам набора (query.Query); индексы строятся один раз и общие для всех запросов."""
+        if self._index is None:
+            self._index = TableIndex(self.table)
+        return Query(self._index)
+
+    def chart_view(self, chart, selected_status="Closed", daily_days=DAILY_WINDOW_DAYS):
+        """
+        Представление данных для графика из tasks.CHARTS.
+        :param daily_days: Окно графика создания и закрытия в днях (None или 0 - вся история).
+        """
+        if chart == "open_state":
+            return self.open_state_issues(selected_status)
+        if chart == "status_time":
+            return self.status_time_issues(selected_status)
+        if chart == "daily":
+            return self.daily_rollup(daily_days)
+        if chart == "users":
+            return self.user_issues()
+        if chart == "time_spent":
+            return self.time_spent_issues()
+        if chart == "priority":
+            return self.priority_issues()
+        if chart == "status":
+            return self.table
+        raise ValueError(f"Неизвестный график: {chart}")
+
+
+def summary_view(project_key, chart, selected_status="Closed", daily_days=DAILY_WINDOW_DAYS):
+    """
+    Данные графика из SUMMARY_CHARTS без сборки таблицы задач: задачи читаются из хранилища
+    страницами, и каждая страница сразу сворачивается в сводку (streaming.fold), поэтому
+    память не зависит от числа задач. Результат совпадает с ProjectDataset.chart_view
+    с точностью до погрешности перцентилей.
+    """
+    if chart == "open_state":
+        pages = iter_project_records(
+            project_key, "status = ? COLLATE NOCASE AND resolutiondate IS NOT NULL", (selected_status,)
+        )
+        return fold(pages, summarize_open_state) or summarize_open_state([])
+    if chart == "time_spent":
+        # Как ProjectDataset.time_spent_issues
+        pages = iter_project_records(project_key, "status = 'Closed' COLLATE NOCASE")
+        return fold(pages, summarize_time_spent) or summarize_time_spent([])
+    if chart == "daily":
+        return _window(load_daily_rollup(project_key, statuses=DAILY_STATUSES), daily_days)
+    raise ValueError(f"График {chart} строится только по таблице задач")
+
+
+_snapshot_dir = None
+
+
+def set_snapshot_dir(path):
+    """
+    Брать наборы проектов из снимков в папке path (<path>/<KEY>) вместо Jira.
+    None - снова загружать из Jira.
+    """
+    global _snapshot_dir
+    _snapshot_dir = path
+    clear_datasets()
+
+
+def get_snapshot_dir():
+    return _snapshot_dir
+
+
+def load_dataset(project_key, selected_status=None):
+    """
+    Синхронизировать проект и загрузить свежий набор задач из хранилища (без кеша сессии).
+    Если задана папка снимков (set_snapshot_dir), набор читается из снимка без сети.
+    :param project_key: Ключ проекта Jira.
+    :param selected_status: Ограничить набор одним статусом (None - весь проект).
+    """
+    if _snapshot_dir is not None:
+        if selected_status:
+            raise ValueError("Снимок содержит весь проект: фильтр статуса при загрузке не поддерживается")
+        dataset = load_snapshot(snapshot_path(_snapshot_dir, project_key))
+        logger.info(f"Набор данных проекта {project_key} загружен из снимка: {len(dataset.table)} задач.")
+        return dataset
+    table = load_project_table(project_key, selected_status)
+    transitions = load_project_transitions(project_key)
+    # Предрассчитанные итоги из хранилища относятся ко всему проекту
+    rollup = None if selected_status else load_daily_rollup(project_key, statuses=DAILY_STATUSES)
+    dataset = ProjectDataset(project_key, table, selected_status, transitions, rollup)
+    logger.info(f"Набор данных проекта {project_key} загружен: {len(table)} задач.")
+    return dataset
+
+
+_datasets = {}
+_datasets_lock = threading.Lock()
+_loading_locks = {}
+
+
+def get_dataset(project_key, selected_status=None):
+    """
+    Получить набор задач проекта для текущей сессии.
+    Набор загружается один раз на пару (проект, фильтр статуса) и
+    переиспользуется всеми командами.
+    :param project_key: Ключ проекта Jira.
+    :param selected_status: Ограничить набор одним статусом (None - весь проект).
+    """
+    cache_key = (project_key.upper(), selected_status.lower() if selected_status else None)
+    with _datasets_lock:
+        dataset = _datasets.get(cache_key)
+        if dataset is not None:
+            return dataset
+        # Отдельная блокировка на ключ: разные проекты загружаются параллельно
+        key_lock = _loading_locks.setdefault(cache_key, threading.Lock())
+
+    with key_lock:
+        dataset = _datasets.get(cache_key)
+        if dataset is None:
+            dataset = load_dataset(project_key, selected_status)
+            with _datasets_lock:
+                _datasets[cache_key] = dataset
+        return dataset
+
+
+def clear_datasets():
+    """Сбросить наборы данных сессии (например, чтобы подтянуть свежие изменения)."""
+    with _datasets_lock:
+        _datasets.clear()
@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+
+import utils
+
+FORMATS = ("png", "json", "csv")
+
+
+def _histogram_rows(histogram, prefix=()):
+    edges, counts = histogram["edges"], histogram["counts"]
+    return [(*prefix, edges[i], edges[i + 1], count) for i, count in enumerate(counts)]
+
+
+def aggregate_table(aggregate):
+    """
+    Представить агрегат графика таблицей для CSV.
+    Гистограммы - строки (начало корзины, конец, число), гистограммы по статусам -
+    те же строки с колонкой статуса, остальные графики - параллельные ряды значений.
+    :return: Пара (заголовок, строки).
+    """
+    if "edges" in aggregate:
+        return ["bin_start", "bin_end", "count"], _histogram_rows(aggregate)
+    values = list(aggregate.values())
+    if values and all(isinstance(value, dict) and "edges" in value for value in values):
+        rows = []
+        for status, histogram in aggregate.items():
+            rows.extend(_histogram_rows(histogram, (status,)))
+        return ["status", "bin_start", "bin_end", "count"], rows
+    columns = [name for name, value in aggregate.items() if isinstance(value, list)]
+    return columns, list(zip(*(aggregate[name] for name in columns)))
+
+
+def write_aggregate(project_key, chart, aggregate, output_format, output_dir=None):
+    """
+    Сохранить агрегат графика в JSON или CSV вместо картинки.
+    :param output_dir: Папка выгрузки (по умолчанию utils.RESULTS_DIR).
+    :return: Путь к файлу.
+    """
+    output_dir = output_dir or utils.RESULTS_DIR
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    path = os.path.join(output_dir, f"{project_key}_{chart}.{output_format}")
+    if output_format == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(aggregate, f, ensure_ascii=False, indent=1)
+    elif output_format == "csv":
+        header, rows = aggregate_table(aggregate)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    else:
+        raise ValueError(f"Неизвестный формат: {output_format}. Доступны: json, csv")
+    return path
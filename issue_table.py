@@ -0,0 +1,290 @@
+import sys
+
+import numpy as np
+
+from metrics import metrics
+
+JIRA_LOCAL_PART = 23  # Длина "YYYY-MM-DDTHH:MM:SS.fff" в датах Jira
+DAY = np.timedelta64(1, "D")
+
+_offsets = {}
+
+
+def _offset_minutes(suffix):
+    """Перевести смещение часового пояса вида '+0300' в минуты (с кешем)."""
+    minutes = _offsets.get(suffix)
+    if minutes is None:
+        sign = -1 if suffix[0] == "-" else 1
+        minutes = sign * (int(suffix[1:3]) * 60 + int(suffix[-2:]))
+        _offsets[suffix] = minutes
+    return minutes
+
+
+def parse_jira_dates(values):
+    """
+    Быстро разобрать даты Jira в массив datetime64[ms] (UTC).
+    Локальная часть разбирается numpy целиком, смещение - по кешу.
+    :param values: Последовательность строк вида '2023-09-01T12:00:00.000+0000' или None.
+    :return: Массив datetime64[ms], NaT на месте пустых значений.
+    """
+    local = np.array(
+        [value[:JIRA_LOCAL_PART] if value else "NaT" for value in values],
+        dtype="datetime64[ms]",
+    )
+    offsets = np.array(
+        [_offset_minutes(value[JIRA_LOCAL_PART:]) if value else 0 for value in values],
+        dtype="timedelta64[m]",
+    )
+    return local - offsets
+
+
+def parse_jira_date(value):
+    """Разобрать одну дату Jira в datetime64[ms] (UTC)."""
+    return parse_jira_dates([value])[0]
+
+
+class Categorical:
+    """Категориальная колонка: целочисленные коды и список значений (-1 - пусто)."""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def encode(cls, values, index=None):
+        """Закодировать значения; общий index позволяет делить словарь между колонками."""
+        index = {} if index is None else index
+        codes = np.fromiter(
+            (index.setdefault(value, len(index)) if value is not None else -1 for value in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return cls(codes, index)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def names(self):
+        return list(self.categories)
+
+    def code_mask(self, *names):
+        """Маска строк, значение которых входит в names (без учета регистра)."""
+        wanted = {name.lower() for name in names}
+        selected = [code for name, code in self.categories.items() if name.lower() in wanted]
+        return np.isin(self.codes, selected)
+
+    def counts(self):
+        """Количество строк для каждой категории (в порядке кодов)."""
+        return np.bincount(self.codes[self.codes >= 0], minlength=len(self.categories))
+
+    def take(self, selector):
+        return Categorical(self.codes[selector], self.categories)
+
+
+def _name(field, attr="name"):
+    """Достать имя из вложенного объекта Jira (статус, приоритет, пользователь)."""
+    return field.get(attr) if field else None
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+class IssueRecord:
+    """
+    Компактная запись задачи: только поля, которые читают графики.
+    Даты остаются строками Jira (разбираются пачкой при сборке таблицы),
+    статусы, приоритеты и пользователи интернируются - одинаковые строки
+    всех задач указывают на один объект.
+    """
+
+    __slots__ = ("key", "created", "resolved", "timespent", "status", "priority", "assignee", "reporter")
+
+    def __init__(self, key, created, resolved, timespent, status, priority, assignee, reporter):
+        self.key = key
+        self.created = created
+        self.resolved = resolved
+        self.timespent = timespent
+        self.status = _intern(status)
+        self.priority = _intern(priority)
+        self.assignee = _intern(assignee)
+        self.reporter = _intern(reporter)
+
+    @classmethod
+    def from_issue(cls, issue):
+        """Запись из задачи в формате ответа Jira."""
+        fields = issue.get("fields", {})
+        return cls(
+            issue.get("key", ""),
+            fields.get("created"),
+            fields.get("resolutiondate"),
+            fields.get("timespent"),
+            _name(fields.get("status")),
+            _name(fields.get("priority")),
+            _name(fields.get("assignee"), "displayName"),
+            _name(fields.get("reporter"), "displayName"),
+        )
+
+
+class IssueTableBuilder:
+    """
+    Сборка IssueTable по страницам: каждая страница сразу превращается
+    в колонки numpy с общими словарями категорий, а сами задачи не хранятся.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._statuses, self._priorities = {}, {}
+        self._users = {}  # Исполнители и репортеры делят один словарь
+
+    def __len__(self):
+        return sum(len(chunk[0]) for chunk in self._chunks)
+
+    def add(self, items):
+        """Добавить страницу задач Jira или записей IssueRecord."""
+        items = list(items)
+        if items and not isinstance(items[0], IssueRecord):
+            items = [IssueRecord.from_issue(issue) for issue in items]
+        if not items:
+            return self
+        self._chunks.append((
+            np.array([record.key for record in items], dtype=object),
+            parse_jira_dates([record.created for record in items]),
+            parse_jira_dates([record.resolved for record in items]),
+            np.array(
+                [record.timespent if record.timespent is not None else np.nan for record in items],
+                dtype=np.float64,
+            ),
+            Categorical.encode([record.status for record in items], self._statuses).codes,
+            Categorical.encode([record.priority for record in items], self._priorities).codes,
+            Categorical.encode([record.assignee for record in items], self._users).codes,
+            Categorical.encode([record.reporter for record in items], self._users).codes,
+        ))
+        return self
+
+    def build(self):
+        if self._chunks:
+            columns = [np.concatenate(column) for column in zip(*self._chunks)]
+        else:
+            columns = [
+                np.array([], dtype=object), np.array([], dtype="datetime64[ms]"),
+                np.array([], dtype="datetime64[ms]"), np.array([], dtype=np.float64),
+            ] + [np.array([], dtype=np.int32)] * 4
+        keys, created, resolved, timespent, status, priority, assignee, reporter = columns
+        return IssueTable(
+            keys=keys,
+            created=created,
+            resolved=resolved,
+            timespent=timespent,
+            status=Categorical(status, self._statuses),
+            priority=Categorical(priority, self._priorities),
+            assignee=Categorical(assignee, self._users),
+            reporter=Categorical(reporter, self._users),
+        )
+
+
+class IssueTable:
+    """
+    Колоночное представление задач Jira.
+    Даты хранятся в datetime64[ms], время выполнения - в секундах (NaN - нет данных),
+    статусы, приоритеты и пользователи - категориальными кодами.
+    """
+
+    def __init__(self, keys, created, resolved, timespent, status, priority, assignee, reporter):
+        self.keys = keys
+        self.created = created
+        self.resolved = resolved
+        self.timespent = timespent
+        self.status = status
+        self.priority = priority
+        self.assignee = assignee
+        self.reporter = reporter
+
+    @classmethod
+    def from_issues(cls, issues):
+        """Построить таблицу из задач в формате ответа Jira или записей IssueRecord."""
+        return cls.from_pages([issues])
+
+    @classmethod
+    def from_pages(cls, pages):
+        """
+        Построить таблицу по мере поступления страниц (задачи Jira или IssueRecord).
+        В памяти одновременно находится только одна страница исходных задач.
+        """
+        with metrics.span("parse", stage="issue_table"):
+            builder = IssueTableBuilder()
+            for page in pages:
+                builder.add(page)
+            table = builder.build()
+        metrics.add("issues_parsed", len(table))
+        return table
+
+    def __len__(self):
+        return len(self.keys)
+
+    def take(self, selector):
+        """Выбрать строки по булевой маске или индексам."""
+        return IssueTable(
+            keys=self.keys[selector],
+            created=self.created[selector],
+            resolved=self.resolved[selector],
+            timespent=self.timespent[selector],
+            status=self.status.take(selector),
+            priority=self.priority.take(selector),
+            assignee=self.assignee.take(selector),
+            reporter=self.reporter.take(selector),
+        )
+
+    def status_in(self, *statuses):
+        """Маска задач в одном из статусов."""
+        return self.status.code_mask(*statuses)
+
+    def upsert(self, records):
+        """
+        Таблица, в которой строки задач из records заменены, а новые задачи добавлены в конец.
+        Исходная таблица не меняется; словари категорий копируются и дополняются новыми значениями.
+        :param records: Записи IssueRecord с разными ключами.
+        """
+        records = list(records)
+        if not records:
+            return self
+        positions = {key: row for row, key in enumerate(self.keys)}
+        rows = np.array([positions.get(record.key, -1) for record in records], dtype=np.int64)
+        users = dict(self.assignee.categories)
+        shared_users = self.reporter.categories is self.assignee.categories
+        changes = (
+            np.array([record.key for record in records], dtype=object),
+            parse_jira_dates([record.created for record in records]),
+            parse_jira_dates([record.resolved for record in records]),
+            np.array([record.timespent if record.timespent is not None else np.nan for record in records],
+                     dtype=np.float64),
+            Categorical.encode([record.status for record in records], dict(self.status.categories)),
+            Categorical.encode([record.priority for record in records], dict(self.priority.categories)),
+            Categorical.encode([record.assignee for record in records], users),
+            Categorical.encode([record.reporter for record in records],
+                               users if shared_users else dict(self.reporter.categories)),
+        )
+        existing, new = rows >= 0, rows < 0
+        columns = []
+        for column, change in zip(
+            (self.keys, self.created, self.resolved, self.timespent, self.status, self.priority,
+             self.assignee, self.reporter),
+            changes,
+        ):
+            if isinstance(column, Categorical):
+                codes = np.concatenate([column.codes, change.codes[new]])
+                codes[rows[existing]] = change.codes[existing]
+                columns.append(Categorical(codes, change.categories))
+            else:
+                values = np.concatenate([column, change[new]])
+                values[rows[existing]] = change[existing]
+                columns.append(values)
+        return IssueTable(*columns)
+
+
+def as_table(issues):
+    """Привести задачи (таблицу или список задач Jira) к IssueTable."""
+    if isinstance(issues, IssueTable):
+        return issues
+    return IssueTable.from_issues(issues)
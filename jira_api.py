@@ -1,98 +1,485 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 
+import ratelimit
+from json_stream import JsonArrayStream
+from metrics import metrics
+from issue_table import IssueTable, IssueTableBuilder
+from storage import STORE_FIELDS, IssueStore
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://issues.apache.org/jira/rest/api/2/search"
+ISSUE_URL = "https://issues.apache.org/jira/rest/api/2/issue"
+PRIORITY_URL = "https://issues.apache.org/jira/rest/api/2/priority"
+PROJECT_URL = "https://issues.apache.org/jira/rest/api/2/project"
+PAGE_SIZE = 1000  # Запрашиваемый размер страницы (сервер может его урезать)
+MAX_WORKERS = 8  # Максимум одновременных запросов к Jira
+REQUEST_TIMEOUT = 60  # Таймаут одного запроса в секундах
+CHANGELOG_PAGE_SIZE = 100  # Размер страницы истории изменений одной задачи
+STREAM_CHUNK = 1 << 16  # Байт за одно чтение тела ответа при потоковом разборе
+STREAM_BATCH = 200  # Задач в одной порции потокового поиска
 
+_session = None
+_store = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Получить общую HTTP-сессию с пулом keep-alive соединений."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Потоковый поиск держит открытыми MAX_WORKERS ответов вперед и еще один дочитывает
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS + 1)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _send(url, params, stream=False):
+    """
+    Выполнить GET-запрос через общую сессию.
+    Запросы проходят через общий ограничитель скорости; ответы 429 и
+    временные 5xx повторяются с учетом Retry-After и экспоненциальной задержкой.
+    :param stream: Не читать тело ответа сразу (response.iter_content).
+    :return: Успешный ответ requests.
+    """
+    attempt = 0
+    while True:
+        ratelimit.limiter.acquire()
+        try:
+            with metrics.span("jira_request"):
+                response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= ratelimit.MAX_RETRIES:
+                raise
+            delay = ratelimit.retry_delay(attempt)
+            logger.warning(f"Сбой соединения с Jira ({e}), повтор через {delay:.1f} с.")
+            metrics.add("jira_retries", reason="connection")
+        else:
+            metrics.add("jira_requests", status=response.status_code)
+            if response.status_code not in ratelimit.RETRY_STATUSES or attempt >= ratelimit.MAX_RETRIES:
+                response.raise_for_status()
+                return response
+            response.close()
+            delay = ratelimit.retry_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"Jira ответила {response.status_code}, повтор через {delay:.1f} с.")
+            metrics.add("jira_retries", reason=str(response.status_code))
+        time.sleep(delay)
+        attempt += 1
+
+
+def _get_json(url, params):
+    """Выполнить GET-запрос (с повторами, см. _send) и вернуть JSON."""
+    response = _send(url, params)
+    metrics.add("jira_response_bytes", len(response.content))
+    with metrics.span("json_decode"):
+        return response.json()
+
+
+def _get_page(params, start_at, max_results):
+    """Загрузить одну страницу результатов поиска."""
+    return _get_json(BASE_URL, dict(params, startAt=start_at, maxResults=max_results))
+
+
+def fetch_changelog_histories(issue_key, start_at=0):
+    """
+    Постранично загрузить историю изменений одной задачи.
+    :param issue_key: Ключ задачи.
+    :param start_at: С какой записи истории начинать.
+    :return: Список записей истории (histories).
+    """
+    histories = []
+    while True:
+        data = _get_json(
+            f"{ISSUE_URL}/{issue_key}/changelog",
+            {"startAt": start_at, "maxResults": CHANGELOG_PAGE_SIZE},
+        )
+        values = data.get("values", [])
+        histories.extend(values)
+        start_at += len(values)
+        if not values or data.get("isLast", True) or start_at >= data.get("total", 0):
+            return histories
+
+
+def _complete_changelogs(issues, max_workers=MAX_WORKERS):
+    """Догрузить истории изменений, которые поиск вернул не полностью."""
+    truncated = [
+        issue for issue in issues
+        if issue.get("changelog", {}).get("total", 0) > len(issue["changelog"].get("histories", []))
+    ]
+    if not truncated:
+        return
+
+    def complete(issue):
+        changelog = issue["changelog"]
+        histories = changelog.setdefault("histories", [])
+        histories.extend(fetch_changelog_histories(issue["key"], len(histories)))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(truncated)))) as pool:
+        list(pool.map(complete, truncated))
+    logger.info(f"Догружены истории изменений для {len(truncated)} задач.")
+
+
+def search_params(jql, fields, expand=None):
+    """
+    Параметры поискового запроса без startAt и maxResults.
+    Без явной сортировки выдача упорядочивается по ключу, чтобы страницы не пересекались.
+    """
+    if "order by" not in jql.lower():
+        jql = f"{jql} ORDER BY key"
+    params = {"jql": jql, "fields": fields}
+    if expand:
+        params["expand"] = expand
+    return params
+
+
+def page_offsets(meta, received, start_at=0):
+    """
+    Смещения следующих страниц по ответу страницы start_at.
+    Шаг берется из ответа: Jira ограничивает maxResults своим лимитом.
+    :param meta: Ответ страницы (total и maxResults).
+    :param received: Сколько задач пришло на странице (шаг, если maxResults нет).
+    :return: Пара (шаг, range смещений startAt следующих страниц).
+    """
+    step = meta.get("maxResults") or received
+    if not step:
+        return step, range(0)
+    return step, range(start_at + step, meta.get("total", start_at + received), step)
+
+
+def iter_search_pages(jql, fields, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, expand=None):
+    """
+    Получать задачи по JQL-запросу постранично, по мере загрузки.
+    Первая страница сообщает total, следующие (startAt) загружаются параллельно,
+    но не больше max_workers страниц вперед, поэтому память не растет с размером выдачи.
+    :param jql: JQL-запрос.
+    :param fields: Список полей через запятую.
+    :param page_size: Желаемый размер страницы.
+    :param max_workers: Число потоков для загрузки страниц.
+    :param expand: Параметр expand (например, 'changelog').
+    :return: Генератор списков задач в порядке выдачи Jira.
+    """
+    params = search_params(jql, fields, expand)
+
+    def finish(page):
+        issues = page.get("issues", [])
+        metrics.add("jira_pages")
+        metrics.add("issues_fetched", len(issues))
+        if expand and "changelog" in expand:
+            _complete_changelogs(issues, max_workers)
+        return issues
+
+    first_page = _get_page(params, 0, page_size)
+    step, remaining = page_offsets(first_page, len(first_page.get("issues", [])))
+    yield finish(first_page)
+    if not remaining:
+        return
+    offsets = iter(remaining)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(remaining)))) as pool:
+        pending = deque(pool.submit(_get_page, params, start_at, step) for start_at in islice(offsets, max_workers))
+        while pending:
+            page = pending.popleft().result()
+            start_at = next(offsets, None)
+            if start_at is not None:
+                pending.append(pool.submit(_get_page, params, start_at, step))
+            yield finish(page)
+
+
+def search_issues(jql, fields, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, expand=None):
+    """
+    Получить все задачи по JQL-запросу (все страницы iter_search_pages).
+    :return: Список задач в порядке выдачи Jira.
+    """
+    issues = []
+    for page in iter_search_pages(jql, fields, page_size, max_workers, expand):
+        issues.extend(page)
+    return issues
+
+
+def _open_page(params, start_at, max_results):
+    """Запросить страницу результатов поиска, не читая тело ответа."""
+    return _send(BASE_URL, dict(params, startAt=start_at, maxResults=max_results), stream=True)
+
+
+def _iter_chunks(response):
+    """Части тела ответа по мере получения (с учетом размера в метриках)."""
+    size = 0
+    for chunk in response.iter_content(STREAM_CHUNK):
+        size += len(chunk)
+        yield chunk
+    metrics.add("jira_response_bytes", size)
+
+
+def iter_search_stream(jql, fields, page_size=PAGE_SIZE, batch_size=STREAM_BATCH, expand=None,
+                       max_workers=MAX_WORKERS):
+    """
+    Получать задачи по JQL-запросу небольшими порциями прямо из тела ответа.
+    Задачи разбираются по одной по мере чтения (JsonArrayStream), поэтому обработка
+    порции начинается до окончания загрузки страницы, а в памяти находится одна порция,
+    а не страница целиком. Как только первая страница сообщила total и maxResults,
+    следующие страницы запрашиваются параллельно, как в iter_search_pages: открыто
+    не больше max_workers ответов вперед, их тела ждут, пока дочитывается текущая страница.
+    :param batch_size: Наибольшее число задач в порции.
+    :param expand: Параметр expand (например, 'changelog'); неполные истории изменений
+        догружаются для каждой порции.
+    :param max_workers: Сколько страниц запрашивать вперед.
+    :return: Генератор списков задач в порядке выдачи Jira.
+    """
+    params = search_params(jql, fields, expand)
+    offsets = None  # Смещения следующих страниц, известны после начала первой
+    step = page_size
+
+    def finish(batch):
+        metrics.add("issues_fetched", len(batch))
+        if expand and "changelog" in expand:
+            _complete_changelogs(batch)
+        return batch
+
+    def request_ahead():
+        while offsets is not None and len(pending) < max_workers:
+            start_at = next(offsets, None)
+            if start_at is None:
+                return
+            pending.append(pool.submit(_open_page, params, start_at, step))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = deque([pool.submit(_open_page, params, 0, page_size)])
+        try:
+            while pending:
+                response = pending.popleft().result()
+                request_ahead()
+                stream = JsonArrayStream(_iter_chunks(response), "issues")
+                batch, received = [], 0
+                try:
+                    for issue in stream:
+                        received += 1
+                        # Jira отдает total и maxResults до массива задач
+                        if offsets is None and "total" in stream.meta and "maxResults" in stream.meta:
+                            step, remaining = page_offsets(stream.meta, received)
+                            offsets = iter(remaining)
+                            request_ahead()
+                        batch.append(issue)
+                        if len(batch) >= batch_size:
+                            yield finish(batch)
+                            batch = []
+                finally:
+                    response.close()
+                if batch:
+                    yield finish(batch)
+                metrics.add("jira_pages")
+                if offsets is None:
+                    step, remaining = page_offsets(stream.meta, received)
+                    offsets = iter(remaining)
+                    request_ahead()
+        finally:
+            # Потребитель остановился раньше: ответы уже запрошенных страниц не нужны
+            for future in pending:
+                future.add_done_callback(_close_response)
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
+
+
+def _jql_value(value):
+    """Значение для JQL в кавычках."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
 
-# def fetch_jira_issues(project_key):
-def fetch_jira_issues(project_key, selected_status):
-    """Получить задачи из Jira для проекта."""
-    try:
-        params = {
-            # "jql": f"project={project_key} AND status=Closed",
-            "jql": f"project={project_key} AND status={selected_status}",
-            "fields": "created, resolutiondate, status",
-            "maxResults": 1000,
-        }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Загружено {len(data.get('issues', []))} задач для проекта {project_key}.")
-        return data.get("issues", [])
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Ошибка при запросе задач Jira: {str(e)}")
-        raise
 
+def count_issues(jql):
+    """Число задач по JQL-запросу: только total, без самих задач (maxResults=0)."""
+    metrics.add("jira_count_queries")
+    return _get_json(BASE_URL, {"jql": jql, "maxResults": 0, "fields": "key"}).get("total", 0)
 
-def get_project_issues(project_key):
-    """Получить задачи для анализа по проекту."""
+
+def count_by_values(jql, field, values, max_workers=MAX_WORKERS):
+    """
+    Посчитать задачи по каждому значению поля параллельными запросами maxResults=0.
+    :param jql: Базовый JQL-запрос (например, project="KAFKA").
+    :param field: Поле JQL (priority, status).
+    :param values: Значения поля.
+    :return: Словарь значение -> число задач (в порядке values, без нулевых).
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(values)))) as pool:
+        totals = pool.map(lambda value: count_issues(f"{jql} AND {field} = {_jql_value(value)}"), values)
+        counts = dict(zip(values, totals))
+    return {value: total for value, total in counts.items() if total}
+
+
+def list_priorities():
+    """Приоритеты Jira в порядке важности."""
+    return [priority["name"] for priority in _get_json(PRIORITY_URL, {})]
+
+
+def list_project_statuses(project_key):
+    """Статусы всех типов задач проекта (без повторов)."""
+    issue_types = _get_json(f"{PROJECT_URL}/{project_key}/statuses", {})
+    return list(dict.fromkeys(status["name"] for issue_type in issue_types for status in issue_type.get("statuses", [])))
+
+
+def count_priorities(project_key, selected_status="Closed"):
+    """Распределение задач проекта в статусе selected_status по приоритетам (без загрузки задач)."""
+    jql = f"project = {_jql_value(project_key)}"
+    if selected_status:
+        jql += f" AND status = {_jql_value(selected_status)}"
+    counts = count_by_values(jql, "priority", list_priorities())
+    logger.info(f"Подсчитаны задачи проекта {project_key} по {len(counts)} приоритетам.")
+    return counts
+
+
+def count_statuses(project_key):
+    """Распределение задач проекта по статусам (без загрузки задач)."""
+    counts = count_by_values(f"project = {_jql_value(project_key)}", "status", list_project_statuses(project_key))
+    logger.info(f"Подсчитаны задачи проекта {project_key} по {len(counts)} статусам.")
+    return counts
+
+
+def _search_logged(jql, fields, expand=None):
+    """
+    Получать задачи порциями из потока ответа (iter_search_stream), записав ошибку запроса в лог.
+    Хранилище сохраняет каждую порцию сразу, поэтому вся выдача не собирается в памяти.
+    """
     try:
-        params = {
-            "jql": f"project={project_key} AND status in (Open, Closed) AND created >= -60d",
-            "fields": "created, resolutiondate",
-            "maxResults": 1000,
-        }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Загружено {len(data.get('issues', []))} задач для проекта {project_key} за последние 60 дней.")
-        return data.get("issues", [])
+        yield from iter_search_stream(jql, fields, expand=expand)
     except requests.exceptions.RequestException as e:
         logger.error(f"Ошибка при запросе задач Jira: {str(e)}")
         raise
 
 
+def get_store():
+    """Получить общее локальное хранилище задач."""
+    global _store
+    with _session_lock:
+        if _store is None:
+            _store = IssueStore()
+        return _store
+
+
+def _project_query(project_key, where="", params=()):
+    """Синхронизировать проект с Jira и выбрать задачи из локального хранилища."""
+    store = get_store()
+    store.sync(project_key, _search_logged)
+    return store.query(project_key, where, params)
+
+
+def load_project_issues(project_key, selected_status=None):
+    """Получить все задачи проекта со всеми полями, нужными графикам."""
+    if selected_status:
+        issues = _project_query(project_key, "status = ? COLLATE NOCASE", (selected_status,))
+    else:
+        issues = _project_query(project_key)
+    logger.info(f"Загружено {len(issues)} задач для проекта {project_key}.")
+    return issues
+
+
+def load_project_table(project_key, selected_status=None):
+    """
+    Синхронизировать проект и собрать таблицу задач.
+    При первой загрузке таблица собирается из тех же порций потока ответа, что сохраняются
+    в хранилище: записи IssueRecord строятся один раз на порцию, и ни выдача Jira,
+    ни хранилище целиком в памяти не оказываются. Иначе хранилище читается страницами записей.
+    """
+    store = get_store()
+    plan = store.plan_sync(project_key)
+    if plan is not None and plan[1]:
+        wanted = selected_status.lower() if selected_status else None
+        writer = store.begin_sync(project_key, True)
+        builder = IssueTableBuilder()
+        for page in _search_logged(plan[0], STORE_FIELDS, "changelog"):
+            records = writer.add(page)
+            builder.add(records if wanted is None else
+                        [record for record in records if record.status and record.status.lower() == wanted])
+        writer.finish()
+        table = builder.build()
+    else:
+        if plan is not None:
+            store.apply_pages(project_key, _search_logged(plan[0], STORE_FIELDS, "changelog"), False)
+        if selected_status:
+            pages = store.iter_records(project_key, "status = ? COLLATE NOCASE", (selected_status,))
+        else:
+            pages = store.iter_records(project_key)
+        table = IssueTable.from_pages(pages)
+    logger.info(f"Загружено {len(table)} задач для проекта {project_key}.")
+    return table
+
+
+def iter_project_records(project_key, where="", params=()):
+    """Синхронизировать проект и читать его задачи из хранилища страницами IssueRecord."""
+    store = get_store()
+    store.sync(project_key, _search_logged)
+    return store.iter_records(project_key, where, params)
+
+
+def count_stored_issues(project_key):
+    """Число задач проекта в локальном хранилище."""
+    return get_store().count(project_key)
+
+
+def load_project_transitions(project_key):
+    """Получить переходы статусов проекта из локального хранилища."""
+    return get_store().query_transitions(project_key)
+
+
+def load_daily_rollup(project_key, since=None, until=None, statuses=None):
+    """Синхронизировать проект и получить его дневные итоги (создано, решено) из хранилища."""
+    store = get_store()
+    store.sync(project_key, _search_logged)
+    return store.daily_rollup(project_key, since, until, statuses)
+
+
+def fetch_jira_issues(project_key, selected_status="Closed"):
+    """Получить задачи из Jira для проекта."""
+    issues = _project_query(project_key, "status = ? COLLATE NOCASE", (selected_status,))
+    logger.info(f"Загружено {len(issues)} задач для проекта {project_key}.")
+    return issues
+
+
+def get_project_issues(project_key, days=None):
+    """
+    Получить задачи для анализа по проекту.
+    :param days: Только задачи, созданные за последние days дней (None - вся история).
+    """
+    where, params = "status IN ('Open', 'Closed')", ()
+    if days:
+        where += " AND created_ms >= ?"
+        params = (int((time.time() - days * 24 * 3600) * 1000),)
+    issues = _project_query(project_key, where, params)
+    period = f"за последние {days} дней" if days else "за всю историю"
+    logger.info(f"Загружено {len(issues)} задач для проекта {project_key} {period}.")
+    return issues
+
+
 def get_assignee_issues(project_key):
     """Получить задачи с исполнителями и репортерами."""
-    try:
-        params = {
-            "jql": f"project={project_key} AND assignee IS NOT EMPTY AND reporter IS NOT EMPTY",
-            "fields": "assignee, reporter",
-            "maxResults": 1000,
-        }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Загружено {len(data.get('issues', []))} задач с назначенными исполнителями и репортерами.")
-        return data.get("issues", [])
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Ошибка при запросе задач Jira: {str(e)}")
-        raise
+    issues = _project_query(project_key, "assignee IS NOT NULL AND reporter IS NOT NULL")
+    logger.info(f"Загружено {len(issues)} задач с назначенными исполнителями и репортерами.")
+    return issues
 
 
 def analyse_time_spent(project_key):
     """Анализ времени выполнения задач."""
-    try:
-        params = {
-            "jql": f'project="{project_key}" AND status=Closed',
-            "fields": "timespent",
-            "maxResults": 1000,
-        }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Загружено {len(data.get('issues', []))} задач для анализа времени выполнения.")
-        return data.get("issues", [])
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Ошибка при запросе задач Jira: {str(e)}")
-        raise
+    issues = _project_query(project_key, "status = 'Closed'")
+    logger.info(f"Загружено {len(issues)} задач для анализа времени выполнения.")
+    return issues
 
 
 def analyse_issues_with_priority(project_key):
     """Анализ задач по приоритету."""
-    try:
-        params = {
-            "jql": f'project="{project_key}" AND status=Closed',
-            "fields": "priority",
-            "maxResults": 1000,
-        }
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-        logger.info(f"Загружено {len(data.get('issues', []))} задач для анализа приоритетов.")
-        return data.get("issues", [])
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Ошибка при запросе задач Jira: {str(e)}")
-        raise
+    issues = _project_query(project_key, "status = 'Closed'")
+    logger.info(f"Загружено {len(issues)} задач для анализа приоритетов.")
+    return issues
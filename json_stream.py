@@ -0,0 +1,104 @@
+import codecs
+import json
+
+WHITESPACE = " \t\n\r"
+COMPACT_AT = 1 << 16  # Отбрасывать разобранное начало буфера, когда оно длиннее этого
+
+
+class JsonArrayStream:
+    """
+    Потоковый разбор JSON-объекта верхнего уровня по частям ответа:
+    элементы массива array_key отдаются по одному, как только элемент пришел
+    целиком, остальные ключи верхнего уровня собираются в meta.
+    В памяти одновременно находятся только текущий элемент и недочитанный хвост.
+
+        stream = JsonArrayStream(response.iter_content(65536), "issues")
+        for issue in stream:
+            ...
+        stream.meta["total"]
+    """
+
+    def __init__(self, chunks, array_key):
+        self.array_key = array_key
+        self.meta = {}
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def _read(self):
+        """Дочитать следующую часть ответа; False, если ответ закончился."""
+        if self._exhausted:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if self._pos > COMPACT_AT:
+            self._buffer, self._pos = self._buffer[self._pos:], 0
+        self._buffer += text
+        return True
+
+    def _skip(self):
+        """Пропустить пробелы; вернуть следующий значимый символ."""
+        while True:
+            buffer, pos = self._buffer, self._pos
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._read():
+                raise ValueError("Неожиданный конец JSON")
+
+    def _expect(self, char):
+        if self._skip() != char:
+            raise ValueError(f"Ожидался '{char}' в позиции {self._pos}, получен '{self._buffer[self._pos]}'")
+        self._pos += 1
+
+    def _value(self):
+        """Разобрать одно значение целиком, дочитывая ответ, пока значение не придет полностью."""
+        self._skip()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # Число или литерал в конце буфера может продолжаться в следующей части
+            if end == len(self._buffer) and not isinstance(value, (dict, list, str)) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        self._expect("{")
+        if self._skip() == "}":
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f"Ожидался ключ объекта в позиции {self._pos}")
+            self._expect(":")
+            if key == self.array_key and self._skip() == "[":
+                self._pos += 1
+                if self._skip() != "]":
+                    while True:
+                        yield self._value()
+                        char = self._skip()
+                        if char == "]":
+                            break
+                        self._expect(",")
+                self._pos += 1
+            else:
+                self.meta[key] = self._value()
+            char = self._skip()
+            if char == "}":
+                self._pos += 1
+                return
+            self._expect(",")
@@ -1,3 +1,8 @@
+import argparse
+import cProfile
+import sys
+import time
+
 from colorama import Fore, Style
 from tasks import (
     task_build_open_state_histogram,
@@ -8,15 +13,15 @@ from tasks import (
     task_build_priority_chart,
 )
 from utils import get_user_input, setup_logging
-from jira_api import (
-    fetch_jira_issues,
-    get_project_issues,
-    get_assignee_issues,
-    analyse_time_spent,
-    analyse_issues_with_priority,
-)
+from dataset import DAILY_WINDOW_DAYS, get_dataset, set_snapshot_dir
+from batch import parse_charts, print_report, run_batch
+from compare import run_compare
+from export import FORMATS
+from metrics import metrics
+from snapshot import save_snapshot, snapshot_path
+from watch import WATCH_INTERVAL, watch
+
 
-logger = setup_logging()  # Настройка логирования
 def choose_status():
     statuses = ["Open", "Closed", "Reopened", "Resolved", "Patch Available", "In Progress"]
     print("Выберите начальный статус:")
@@ -33,59 +38,188 @@ def choose_status():
         except ValueError:
             print("Неверный ввод. Пожалуйста, введите число.")
 
-def main():
+def parse_args(argv=None):
+    """Разобрать аргументы командной строки."""
+    parser = argparse.ArgumentParser(description="Графики по проектам Jira.")
+    parser.add_argument("--projects", help="Ключи проектов через запятую (пакетный режим), например KAFKA,HADOOP")
+    parser.add_argument("--charts", default="all", help="Графики через запятую или 'all'")
+    parser.add_argument("--status", default="Closed", help="Статус для графиков времени (по умолчанию Closed)")
+    parser.add_argument("--days", type=int, default=DAILY_WINDOW_DAYS,
+                        help=f"Окно графика создания и закрытия в днях, 0 - вся история (по умолчанию {DAILY_WINDOW_DAYS})")
+    parser.add_argument("--pushdown", action="store_true",
+                        help="Графики priority и status считать запросами maxResults=0, не загружая задачи")
+    parser.add_argument("--format", default="png", choices=FORMATS,
+                        help="png - картинки, json/csv - агрегаты графиков без отрисовки (по умолчанию png)")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов отрисовки")
+    parser.add_argument("--metrics-dir", help="Папка для сводки запуска (JSON) и метрик Prometheus")
+    parser.add_argument("--profile", help="Файл профиля cProfile (.prof) для всего запуска")
+    parser.add_argument("--snapshot", help="Строить графики по снимкам из папки (<папка>/<KEY>) без обращения к Jira")
+    parser.add_argument("--export-snapshot", help="Сохранить наборы проектов пакетного запуска в папку снимков")
+    parser.add_argument("--compare", action="store_true",
+                        help="Сравнить проекты --projects на общих графиках и в сводной таблице")
+    parser.add_argument("--watch", action="store_true",
+                        help="Следить за проектами --projects и перестраивать графики по изменениям в Jira")
+    parser.add_argument("--interval", type=int, default=WATCH_INTERVAL,
+                        help=f"Секунд между опросами одного проекта в режиме --watch (по умолчанию {WATCH_INTERVAL})")
+    parser.add_argument("--serve", action="store_true", help="Запустить HTTP-сервер графиков для дашбордов")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес HTTP-сервера (по умолчанию 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Порт HTTP-сервера (по умолчанию 8080)")
+    parser.add_argument("--log-level", help="Минимальный уровень логов (DEBUG, INFO, ERROR)")
+    parser.add_argument("--log-json", action="store_true", help="Дополнительно писать логи в logs/log.jsonl")
+    return parser.parse_args(argv)
+
+
+def run_headless(args):
+    """Пакетный режим: все графики для нескольких проектов без интерактивного ввода."""
+    projects = [project.strip().upper() for project in args.projects.split(",") if project.strip()]
+    try:
+        charts = parse_charts(args.charts)
+    except ValueError as e:
+        print(Fore.RED + str(e) + Style.RESET_ALL)
+        return 2
+    started = time.perf_counter()
+    report = run_batch(projects, charts, args.status, args.workers, args.days, args.pushdown, args.format)
+    if args.export_snapshot:
+        export_snapshots(report, args.export_snapshot)
+    print_report(report, time.perf_counter() - started)
+    return 1 if any(result["errors"] for result in report.values()) else 0
+
+
+def export_snapshots(report, directory):
+    """
+    Сохранить снимки проектов, загруженных без ошибок; ошибки сохранения попадают в report.
+    """
+    for project_key, result in report.items():
+        if result["errors"]:
+            continue
+        try:
+            path = save_snapshot(get_dataset(project_key), snapshot_path(directory, project_key))
+        except Exception as e:
+            result["errors"].append(f"снимок: {type(e).__name__}: {e}")
+            continue
+        print(f"Снимок {project_key} сохранен: {path}")
+
+
+def run_comparison(args):
+    """Режим сравнения: одни и те же графики нескольких проектов на общих осях."""
+    projects = [project.strip().upper() for project in (args.projects or "").split(",") if project.strip()]
+    if len(projects) < 2:
+        print(Fore.RED + "Для --compare нужно хотя бы два проекта в --projects" + Style.RESET_ALL)
+        return 2
+    try:
+        charts = parse_charts(args.charts)
+    except ValueError as e:
+        print(Fore.RED + str(e) + Style.RESET_ALL)
+        return 2
+    started = time.perf_counter()
+    report = run_compare(projects, charts, args.status, args.workers, args.days)
+    print_report(report, time.perf_counter() - started)
+    return 1 if any(result["errors"] for result in report.values()) else 0
+
+
+def run_watch(args):
+    """Режим наблюдения: графики проектов перестраиваются по мере изменений в Jira."""
+    projects = [project.strip().upper() for project in (args.projects or "").split(",") if project.strip()]
+    if not projects:
+        print(Fore.RED + "Для --watch нужен список проектов --projects" + Style.RESET_ALL)
+        return 2
     try:
-        # Приветствие
-        print(Fore.GREEN + "Добро пожаловать и спасибо, что выбрали мой скрипт!" + Style.RESET_ALL)
-
-        # Выбор проекта
-        project_key = get_user_input("Введите ключ проекта (например, 'KAFKA'): ")
-        print(Fore.GREEN + f"Проект '{project_key}' успешно выбран." + Style.RESET_ALL)
-
-        # Основной цикл
-        while True:
-            print("\nВыберите команду:")
-            print("1 - Построить гистограмму времени задач в открытом состоянии")
-            print("2 - Построить диаграммы распределения времени по состояниям")
-            print("3 - Построить график создания и закрытия задач с накопительным итогом")
-            print("4 - Построить график задач для пользователей")
-            print("5 - Построить гистограмму времени выполнения задач")
-            print("6 - Построить график задач по степени серьезности")
-            print("7 - Завершить работу")
-
-            command = get_user_input("Введите номер команды: ")
-
-            if command == "1":
-                issues = fetch_jira_issues(project_key)
-                task_build_open_state_histogram(issues, project_key)
-            elif command == "2":
-                # abo_bus = choose_status()
-                # print(f"Выбранный статус: {abo_bus}")
-                selected_status = choose_status()  # Запрос на выбор статуса
-                # issues = fetch_jira_issues(project_key)
-                issues = fetch_jira_issues(project_key, selected_status)
-                task_build_status_time_diagrams(issues, project_key, selected_status)
-            elif command == "3":
-                issues = get_project_issues(project_key)
-                task_build_daily_tasks_graph(issues, project_key)
-            elif command == "4":
-                issues = get_assignee_issues(project_key)
-                task_build_user_task_chart(issues, project_key)
-            elif command == "5":
-                issues = analyse_time_spent(project_key)
-                build_time_spent_histogram(issues, project_key)
-            elif command == "6":
-                issues = analyse_issues_with_priority(project_key)
-                task_build_priority_chart(issues, project_key)
-            elif command == "7":
-                print(Fore.BLUE + "Завершение работы. Спасибо, что использовали мой скрипт!" + Style.RESET_ALL)
+        charts = parse_charts(args.charts)
+    except ValueError as e:
+        print(Fore.RED + str(e) + Style.RESET_ALL)
+        return 2
+    return watch(projects, charts, args.status, args.interval, args.days, args.format)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(level=args.log_level, json_lines=args.log_json or None)  # Настройка логирования
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if args.snapshot:
+        set_snapshot_dir(args.snapshot)
+    try:
+        if args.serve:
+            from server import serve  # Сервер нужен только в этом режиме
+            return serve(args.host, args.port)
+        if args.watch:
+            return run_watch(args)
+        if args.compare:
+            return run_comparison(args)
+        if args.projects:
+            return run_headless(args)
+        interactive()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Профиль сохранен: {args.profile} (snakeviz/flameprof)")
+        if args.metrics_dir:
+            summary_path, prometheus_path = metrics.export(args.metrics_dir)
+            print(f"Метрики сохранены: {summary_path}, {prometheus_path}")
+
+
+def run_command(command, project_key):
+    """
+    Выполнить команду меню.
+    :return: False, если пользователь завершил работу.
+    """
+    if command == "1":
+        issues = get_dataset(project_key).open_state_issues()
+        task_build_open_state_histogram(issues, project_key)
+    elif command == "2":
+        selected_status = choose_status()  # Запрос на выбор статуса
+        issues = get_dataset(project_key).status_time_issues(selected_status)
+        task_build_status_time_diagrams(issues, project_key, selected_status)
+    elif command == "3":
+        rollup = get_dataset(project_key).daily_rollup()
+        task_build_daily_tasks_graph(rollup, project_key)
+    elif command == "4":
+        issues = get_dataset(project_key).user_issues()
+        task_build_user_task_chart(issues, project_key)
+    elif command == "5":
+        issues = get_dataset(project_key).time_spent_issues()
+        build_time_spent_histogram(issues, project_key)
+    elif command == "6":
+        issues = get_dataset(project_key).priority_issues()
+        task_build_priority_chart(issues, project_key)
+    elif command == "7":
+        print(Fore.BLUE + "Завершение работы. Спасибо, что использовали мой скрипт!" + Style.RESET_ALL)
+        return False
+    else:
+        print(Fore.RED + "Неверная команда. Пожалуйста, выберите из списка." + Style.RESET_ALL)
+    return True
+
+
+def interactive():
+    # Приветствие
+    print(Fore.GREEN + "Добро пожаловать и спасибо, что выбрали мой скрипт!" + Style.RESET_ALL)
+
+    # Выбор проекта
+    project_key = get_user_input("Введите ключ проекта (например, 'KAFKA'): ")
+    print(Fore.GREEN + f"Проект '{project_key}' успешно выбран." + Style.RESET_ALL)
+
+    # Основной цикл: ошибка одной команды (например, недоступность Jira) не завершает работу
+    while True:
+        print("\nВыберите команду:")
+        print("1 - Построить гистограмму времени задач в открытом состоянии")
+        print("2 - Построить диаграммы распределения времени по состояниям")
+        print("3 - Построить график создания и закрытия задач с накопительным итогом")
+        print("4 - Построить график задач для пользователей")
+        print("5 - Построить гистограмму времени выполнения задач")
+        print("6 - Построить график задач по степени серьезности")
+        print("7 - Завершить работу")
+
+        command = get_user_input("Введите номер команды: ")
+        try:
+            if not run_command(command, project_key):
                 break
-            else:
-                print(Fore.RED + "Неверная команда. Пожалуйста, выберите из списка." + Style.RESET_ALL)
-    except Exception as e:
-        logger("ERROR", f"Произошла ошибка: {str(e)}")
-        print(Fore.RED + "Ошибка в работе программы. Проверьте логи для деталей." + Style.RESET_ALL)
+        except Exception as e:
+            setup_logging()("ERROR", f"Произошла ошибка: {str(e)}")
+            print(Fore.RED + "Ошибка в работе программы. Проверьте логи для деталей." + Style.RESET_ALL)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
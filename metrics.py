@@ -0,0 +1,130 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "jira_report"
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """
+    Метрики запуска: интервалы времени по этапам (загрузка, разбор,
+    агрегирование, отрисовка) и счетчики (запросы, байты, страницы, задачи).
+    Экспортируются в JSON-сводку и текстовый формат Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._spans = {}
+            self._counters = {}
+
+    def observe(self, name, seconds, **labels):
+        """Учесть длительность этапа."""
+        with self._lock:
+            span = self._spans.setdefault(_key(name, labels), {"count": 0, "seconds": 0.0, "max": 0.0})
+            span["count"] += 1
+            span["seconds"] += seconds
+            span["max"] = max(span["max"], seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Замерить время блока кода как этап name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name, **labels):
+        """Декоратор: замерять каждый вызов функции как этап name."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add(self, name, value=1, **labels):
+        """Увеличить счетчик."""
+        with self._lock:
+            key = _key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Снимок метрик в JSON-совместимом виде (для сводки и передачи между процессами)."""
+        with self._lock:
+            return {
+                "spans": [dict(name=name, labels=dict(labels), **span) for (name, labels), span in self._spans.items()],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+            }
+
+    def merge(self, snapshot):
+        """Добавить метрики из снимка другого процесса."""
+        with self._lock:
+            for item in snapshot["spans"]:
+                span = self._spans.setdefault(_key(item["name"], item["labels"]), {"count": 0, "seconds": 0.0, "max": 0.0})
+                span["count"] += item["count"]
+                span["seconds"] += item["seconds"]
+                span["max"] = max(span["max"], item["max"])
+            for item in snapshot["counters"]:
+                key = _key(item["name"], item["labels"])
+                self._counters[key] = self._counters.get(key, 0) + item["value"]
+
+    def summary(self):
+        """JSON-сводка запуска."""
+        return dict(started=self.started, wall_seconds=round(time.time() - self.started, 3), **self.snapshot())
+
+    def to_prometheus(self):
+        """Метрики в текстовом формате Prometheus."""
+        def labels_text(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._spans}):
+                metric = f"{PREFIX}_{name}_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for (span_name, labels), span in sorted(self._spans.items()):
+                    if span_name == name:
+                        lines.append(f"{metric}_sum{labels_text(labels)} {span['seconds']:.6f}")
+                        lines.append(f"{metric}_count{labels_text(labels)} {span['count']}")
+            for name in sorted({name for name, _ in self._counters}):
+                metric = f"{PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter_name, labels), value in sorted(self._counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{metric}{labels_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory):
+        """Записать run_summary.json и metrics.prom в папку directory."""
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        summary_path = os.path.join(directory, "run_summary.json")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=1)
+        prometheus_path = os.path.join(directory, "metrics.prom")
+        with open(prometheus_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        return summary_path, prometheus_path
+
+
+# Метрики текущего процесса
+metrics = Metrics()
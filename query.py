@@ -0,0 +1,294 @@
+"""
+Запросы к загруженному набору задач без обращения к Jira.
+
+    python -m query KAFKA --where status=Closed --window created:2024-01-01:2024-06-30 \
+        --group-by month --agg p90:open_days
+    python -m query KAFKA --group-by user --top 10
+
+    from dataset import get_dataset
+    get_dataset("KAFKA").query().where(priority=["Blocker", "Critical"]).group_by("week").run()
+"""
+import argparse
+import heapq
+
+import numpy as np
+
+from issue_table import DAY
+
+DATE_COLUMNS = ("created", "resolved")
+CATEGORY_COLUMNS = ("status", "priority", "assignee", "reporter")
+TIME_GROUPS = ("day", "week", "month")
+# Группировка и фильтр по пользователю учитывают и исполнителя, и репортера
+GROUPS = TIME_GROUPS + CATEGORY_COLUMNS + ("user",)
+MEASURES = ("open_days", "timespent_hours")
+EPOCH_WEEKDAY = 3  # 1970-01-01 - четверг: сдвиг, чтобы недели начинались с понедельника
+
+
+def _open_days(table):
+    return (table.resolved - table.created) / DAY
+
+
+def _timespent_hours(table):
+    return table.timespent / 3600
+
+
+_MEASURES = {"open_days": _open_days, "timespent_hours": _timespent_hours}
+
+
+class TableIndex:
+    """
+    Индексы таблицы задач, строятся при первом обращении к колонке:
+    для дат - порядок строк по значению (выборка окна двоичным поиском),
+    для категорий - номера строк каждого значения.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._sorted = {}  # Колонка дат -> (порядок строк, отсортированные значения)
+        self._postings = {}  # Категориальная колонка -> (порядок строк, границы кодов)
+
+    def date_rows(self, column, since=None, until=None):
+        """Номера строк с датой column в [since, until] (until - день включительно)."""
+        if column not in self._sorted:
+            values = getattr(self.table, column)
+            order = np.argsort(values, kind="stable")  # NaT оказываются в конце
+            self._sorted[column] = order, values[order]
+        order, values = self._sorted[column]
+        low = 0 if since is None else np.searchsorted(values, np.datetime64(since, "ms"), "left")
+        if until is None:
+            high = len(values) - int(np.isnat(values).sum())
+        else:
+            high = np.searchsorted(values, (np.datetime64(until, "D") + DAY).astype("datetime64[ms]"), "left")
+        return order[low:high]
+
+    def category_rows(self, column, names):
+        """Номера строк, значение column которых входит в names (без учета регистра)."""
+        if column not in self._postings:
+            codes = getattr(self.table, column).codes
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes + 1, minlength=len(getattr(self.table, column).categories) + 1)
+            bounds = np.concatenate([[0], np.cumsum(counts)])  # Код -1 (пусто) - первым
+            self._postings[column] = order, bounds
+        order, bounds = self._postings[column]
+        categorical = getattr(self.table, column)
+        wanted = {name.lower() for name in names}
+        codes = [code for name, code in categorical.categories.items() if name.lower() in wanted]
+        return np.concatenate([order[bounds[code + 1]:bounds[code + 2]] for code in codes] or [[]]).astype(np.int64)
+
+
+class Query:
+    """
+    Запрос к таблице задач: фильтры, окно по дате, группировка и агрегат.
+    Методы возвращают новый запрос, исходный не меняется.
+    """
+
+    def __init__(self, index, filters=(), window=None, group=None, aggregate="count", measure=None, top=None):
+        self.index = index
+        self.filters = filters
+        self.date_window = window
+        self.group = group
+        self.agg = aggregate
+        self.measure = measure
+        self.limit = top
+
+    def _replace(self, **changes):
+        params = {
+            "filters": self.filters, "window": self.date_window, "group": self.group,
+            "aggregate": self.agg, "measure": self.measure, "top": self.limit,
+        }
+        params.update(changes)
+        return Query(self.index, **params)
+
+    def where(self, **conditions):
+        """
+        Оставить задачи с заданными значениями: status, priority, assignee, reporter
+        или user (исполнитель или репортер); значение - строка или список строк.
+        """
+        filters = list(self.filters)
+        for column, names in conditions.items():
+            if column not in CATEGORY_COLUMNS + ("user",):
+                raise ValueError(f"Неизвестное поле фильтра: {column}")
+            filters.append((column, [names] if isinstance(names, str) else list(names)))
+        return self._replace(filters=tuple(filters))
+
+    def window(self, column="created", since=None, until=None):
+        """Оставить задачи с датой column (created, resolved) в [since, until]."""
+        if column not in DATE_COLUMNS:
+            raise ValueError(f"Окно задается по created или resolved, а не {column}")
+        return self._replace(window=(column, since, until))
+
+    def group_by(self, group):
+        """Группировать по day, week, month (дата окна, по умолчанию created), status, priority, user и т. д."""
+        if group not in GROUPS:
+            raise ValueError(f"Неизвестная группировка: {group}. Доступны: {', '.join(GROUPS)}")
+        return self._replace(group=group)
+
+    def aggregate(self, aggregate="count", measure=None):
+        """
+        Агрегат по группам: count, sum, mean или перцентиль pNN величины measure
+        (open_days - дни до решения, timespent_hours - затраченные часы).
+        """
+        if aggregate != "count":
+            percentile = aggregate[:1] == "p" and aggregate[1:].isdigit() and 0 <= int(aggregate[1:]) <= 100
+            if aggregate not in ("sum", "mean") and not percentile:
+                raise ValueError(f"Неизвестный агрегат: {aggregate} (перцентиль - от p0 до p100)")
+            if measure not in MEASURES:
+                raise ValueError(f"Для {aggregate} нужна величина: {', '.join(MEASURES)}")
+        return self._replace(aggregate=aggregate, measure=measure)
+
+    def top(self, k):
+        """Оставить k групп с наибольшими значениями агрегата."""
+        return self._replace(top=k)
+
+    def rows(self):
+        """Номера строк таблицы, прошедших фильтры и окно (выбираются по индексам)."""
+        index = self.index
+        mask = None
+        selections = []
+        if self.date_window is not None:
+            selections.append(index.date_rows(*self.date_window))
+        for column, names in self.filters:
+            if column == "user":
+                rows = np.union1d(index.category_rows("assignee", names), index.category_rows("reporter", names))
+            else:
+                rows = index.category_rows(column, names)
+            selections.append(rows)
+        for rows in selections:
+            selected = np.zeros(len(index.table), dtype=bool)
+            selected[rows] = True
+            mask = selected if mask is None else mask & selected
+        return np.arange(len(index.table)) if mask is None else np.flatnonzero(mask)
+
+    def _group_keys(self, table):
+        """
+        Номера строк и ключи их групп; строки без ключа (нет даты или значения) не входят,
+        при группировке по пользователю строка входит за исполнителя и за репортера.
+        """
+        if self.group in TIME_GROUPS:
+            dates = getattr(table, self.date_window[0] if self.date_window else "created")
+            present = ~np.isnat(dates)
+            days = dates[present].astype("datetime64[D]")
+            if self.group == "week":
+                days = days - (days.astype(np.int64) + EPOCH_WEEKDAY) % 7
+            elif self.group == "month":
+                days = days.astype("datetime64[M]")
+            return np.flatnonzero(present), days
+        if self.group == "user":
+            rows = np.concatenate([np.arange(len(table)), np.arange(len(table))])
+            codes = np.concatenate([table.assignee.codes, table.reporter.codes])
+        else:
+            rows, codes = np.arange(len(table)), getattr(table, self.group).codes
+        present = codes >= 0
+        return rows[present], codes[present]
+
+    def _labels(self, table, keys):
+        if self.group in TIME_GROUPS:
+            return [str(key) for key in keys]
+        column = "assignee" if self.group == "user" else self.group
+        names = getattr(table, column).names
+        return [names[key] for key in keys]
+
+    def _values(self, values, inverse, groups):
+        if self.agg == "count":
+            return np.bincount(inverse, minlength=groups).tolist()
+        present = ~np.isnan(values)
+        values, inverse = values[present], inverse[present]
+        if self.agg in ("sum", "mean"):
+            sums = np.bincount(inverse, weights=values, minlength=groups)
+            if self.agg == "sum":
+                return sums.tolist()
+            counts = np.bincount(inverse, minlength=groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return [None if count == 0 else float(total / count) for total, count in zip(sums, counts)]
+        # Перцентиль: значения сортируются по группе и величине, группы - подряд идущие отрезки
+        order = np.lexsort((values, inverse))
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=groups))])
+        values = values[order]
+        q = float(self.agg[1:])
+        return [
+            float(np.percentile(values[bounds[g]:bounds[g + 1]], q)) if bounds[g + 1] > bounds[g] else None
+            for g in range(groups)
+        ]
+
+    def run(self):
+        """
+        Выполнить запрос.
+        :return: {"groups": метки групп, "values": значения агрегата}; без группировки -
+            одна группа "all". С top - группы по убыванию значения, иначе - по возрастанию ключа.
+        """
+        table = self.index.table
+        if self.filters or self.date_window:
+            table = table.take(self.rows())
+        values = _MEASURES[self.measure](table) if self.measure else np.zeros(len(table))
+        if self.group is None:
+            rows, keys = np.arange(len(table)), np.zeros(len(table), dtype=np.int64)
+        else:
+            rows, keys = self._group_keys(table)
+        if self.group in TIME_GROUPS:
+            unique, inverse = np.unique(keys, return_inverse=True)
+        else:
+            # Ключи - небольшие целые коды: группы находятся подсчетом без сортировки
+            unique = np.flatnonzero(np.bincount(keys))
+            positions = np.zeros(len(unique) and unique[-1] + 1, dtype=np.int64)
+            positions[unique] = np.arange(len(unique))
+            inverse = positions[keys]
+        labels = ["all"] if self.group is None else self._labels(table, unique)
+        results = self._values(values[rows].astype(np.float64), inverse.reshape(-1), len(unique))
+        pairs = list(zip(labels, results))
+        if self.group is None and not pairs:
+            pairs = [("all", 0 if self.agg == "count" else None)]
+        if self.limit is not None:
+            pairs = heapq.nlargest(self.limit, (pair for pair in pairs if pair[1] is not None), key=lambda pair: pair[1])
+        return {"groups": [label for label, _ in pairs], "values": [value for _, value in pairs]}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Запрос к задачам проекта из локального хранилища или снимка")
+    parser.add_argument("project", help="Ключ проекта Jira")
+    parser.add_argument("--where", action="append", default=[],
+                        help="Фильтр поле=значение[,значение] (status, priority, assignee, reporter, user)")
+    parser.add_argument("--window", help="Окно по дате: created|resolved[:с[:по]], даты YYYY-MM-DD")
+    parser.add_argument("--group-by", choices=GROUPS, help="Группировка")
+    parser.add_argument("--agg", default="count",
+                        help="Агрегат: count или sum|mean|pNN:величина (open_days, timespent_hours)")
+    parser.add_argument("--top", type=int, help="Оставить K групп с наибольшими значениями")
+    parser.add_argument("--snapshot", help="Читать проект из папки снимков вместо Jira")
+    return parser.parse_args(argv)
+
+
+def build_query(query, args):
+    """Применить к запросу параметры командной строки."""
+    for condition in args.where:
+        column, _, names = condition.partition("=")
+        query = query.where(**{column.strip(): [name.strip() for name in names.split(",")]})
+    if args.window:
+        column, since, until = (args.window.split(":") + [None, None])[:3]
+        query = query.window(column, since or None, until or None)
+    if args.group_by:
+        query = query.group_by(args.group_by)
+    aggregate, _, measure = args.agg.partition(":")
+    query = query.aggregate(aggregate, measure or None)
+    if args.top:
+        query = query.top(args.top)
+    return query
+
+
+def main(argv=None):
+    import dataset
+
+    args = parse_args(argv)
+    if args.snapshot:
+        dataset.set_snapshot_dir(args.snapshot)
+    try:
+        query = build_query(dataset.get_dataset(args.project.upper()).query(), args)
+    except ValueError as e:
+        print(e)
+        return 2
+    result = query.run()
+    for group, value in zip(result["groups"], result["values"]):
+        print(f"{group}\t{value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RATE = 10.0  # Средняя скорость запросов к Jira (запросов в секунду) на весь процесс
+BURST = 20  # Сколько запросов можно отправить подряд без ожидания
+MAX_RETRIES = 5  # Повторов при 429 и временных ошибках 5xx
+BACKOFF_BASE = 1.0  # Начальная задержка повтора в секундах
+BACKOFF_MAX = 60.0  # Максимальная задержка повтора
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Ограничитель скорости запросов (token bucket), общий для потоков и asyncio.
+    """
+
+    def __init__(self, rate=RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Забронировать один токен.
+        :return: Сколько секунд нужно подождать перед запросом.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        """Дождаться разрешения на запрос (блокирующий вариант)."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Дождаться разрешения на запрос, не блокируя цикл событий."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def parse_retry_after(value):
+    """Разобрать заголовок Retry-After (секунды или HTTP-дата) в секунды."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, retry_after=None):
+    """
+    Задержка перед повтором: Retry-After от сервера или экспоненциальная с джиттером.
+    :param attempt: Номер повтора, начиная с 0.
+    :param retry_after: Значение заголовка Retry-After.
+    """
+    delay = parse_retry_after(retry_after)
+    if delay is not None:
+        return min(delay, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+# Общий ограничитель для всех запросов процесса
+limiter = TokenBucket()
@@ -0,0 +1,90 @@
+import numpy as np
+
+from issue_table import DAY
+
+
+class DailyRollup:
+    """
+    Дневные итоги проекта: сколько задач создано и решено в каждый день.
+    Открытый бэклог на конец дня - это все созданные минус все решенные,
+    включая задачи до начала окна (created_before, resolved_before).
+    """
+
+    def __init__(self, days, created, resolved, created_before=0, resolved_before=0):
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.created = np.asarray(created, dtype=np.int64)
+        self.resolved = np.asarray(resolved, dtype=np.int64)
+        self.created_before = int(created_before)
+        self.resolved_before = int(resolved_before)
+
+    @classmethod
+    def from_table(cls, table):
+        """Посчитать дневные итоги по таблице задач (даты в UTC)."""
+        created_days = table.created[~np.isnat(table.created)].astype("datetime64[D]")
+        resolved_days = table.resolved[~np.isnat(table.resolved)].astype("datetime64[D]")
+        all_days = np.concatenate([created_days, resolved_days])
+        if not all_days.size:
+            return cls([], [], [])
+        first, last = all_days.min(), all_days.max()
+        length = int((last - first) // DAY) + 1
+        return cls(
+            np.arange(first, last + DAY, DAY),
+            np.bincount((created_days - first) // DAY, minlength=length),
+            np.bincount((resolved_days - first) // DAY, minlength=length),
+        )
+
+    @classmethod
+    def from_counts(cls, days, created, resolved, created_before=0, resolved_before=0):
+        """
+        Собрать непрерывный ряд из разреженных дневных итогов (дни без событий - нули).
+        :param days: Дни с ненулевыми итогами по возрастанию.
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+        if not days.size:
+            return cls([], [], [], created_before, resolved_before)
+        offsets = (days - days[0]) // DAY
+        length = int(offsets[-1]) + 1
+        return cls(
+            np.arange(days[0], days[-1] + DAY, DAY),
+            np.bincount(offsets, weights=created, minlength=length),
+            np.bincount(offsets, weights=resolved, minlength=length),
+            created_before,
+            resolved_before,
+        )
+
+    def __len__(self):
+        return len(self.days)
+
+    def window(self, since=None, until=None):
+        """
+        Оставить дни [since, until]; итоги более ранних дней переходят в *_before.
+        Ряд дополняется нулевыми днями до заданных границ, поэтому окно не зависит от того,
+        в какие дни были события (пустой ряд остается пустым, если событий не было вовсе).
+        :param since: Первый день окна (datetime64 или строка 'YYYY-MM-DD', None - с первого события).
+        :param until: Последний день окна включительно (None - до последнего события).
+        """
+        since = None if since is None else np.datetime64(since, "D")
+        until = None if until is None else np.datetime64(until, "D")
+        before = np.zeros(len(self.days), dtype=bool) if since is None else self.days < since
+        selected = ~before if until is None else ~before & (self.days <= until)
+        created_before = self.created_before + int(self.created[before].sum())
+        resolved_before = self.resolved_before + int(self.resolved[before].sum())
+        history = len(self.days) or self.created_before or self.resolved_before
+        first = since if since is not None else (self.days[0] if len(self.days) else None)
+        last = until if until is not None else (self.days[-1] if len(self.days) else None)
+        if not history or first is None or last is None or first > last:
+            return DailyRollup([], [], [], created_before, resolved_before)
+        length = int((last - first) // DAY) + 1
+        offsets = (self.days[selected] - first) // DAY
+        return DailyRollup(
+            np.arange(first, last + DAY, DAY),
+            np.bincount(offsets, weights=self.created[selected], minlength=length),
+            np.bincount(offsets, weights=self.resolved[selected], minlength=length),
+            created_before,
+            resolved_before,
+        )
+
+    @property
+    def backlog(self):
+        """Число открытых задач на конец каждого дня."""
+        return self.created_before - self.resolved_before + np.cumsum(self.created - self.resolved)
@@ -0,0 +1,239 @@
+"""
+HTTP-сервис графиков для дашбордов.
+
+    python main.py --serve --port 8080
+
+    GET /projects/KAFKA/charts/priority.png
+    GET /projects/KAFKA/charts/priority.json
+    GET /projects/KAFKA/charts/status_time.png?status=Closed&part=1
+    GET /projects/KAFKA/charts/daily.png?days=365
+"""
+import json
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from chart_cache import chart_key
+from dataset import DAILY_WINDOW_DAYS, load_dataset
+from metrics import metrics
+from storage import SYNC_INTERVAL
+from tasks import CHARTS, RENDER_PARAMS, render_chart_images
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DATASET_TTL = SYNC_INTERVAL  # Набор проекта старше этого перечитывается из Jira
+MAX_DATASETS = 8  # Наборов проектов в памяти
+MAX_AGGREGATES = 256  # Агрегатов графиков в памяти
+MAX_IMAGES = 256  # Картинок графиков в памяти
+
+
+class LRUCache:
+    """Потокобезопасный кеш с вытеснением давно не использованных значений."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Coalescer:
+    """
+    Объединение одинаковых запросов: пока значение для ключа вычисляется,
+    остальные потоки ждут тот же результат, а не запускают работу повторно.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, *args):
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            metrics.add("server_coalesced")
+            return future.result()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+
+class ChartService:
+    """
+    Графики и агрегаты проектов с кешами в памяти.
+    Набор задач проекта загружается один раз на DATASET_TTL секунд, агрегат
+    считается один раз на набор, картинка рисуется один раз на агрегат;
+    одновременные одинаковые запросы ждут одну загрузку и одну отрисовку.
+    """
+
+    def __init__(self, dataset_ttl=DATASET_TTL, loader=load_dataset):
+        self.dataset_ttl = dataset_ttl
+        self.loader = loader
+        self.datasets = LRUCache(MAX_DATASETS)
+        self.aggregates = LRUCache(MAX_AGGREGATES)
+        self.images = LRUCache(MAX_IMAGES)
+        self._coalescer = Coalescer()
+        self._render_lock = threading.Lock()  # pyplot не потокобезопасен
+
+    def dataset(self, project_key):
+        dataset = self.datasets.get(project_key)
+        if dataset is None or time.time() - dataset.loaded_at > self.dataset_ttl:
+            dataset = self._coalescer.run(("dataset", project_key), self.loader, project_key)
+            self.datasets.put(project_key, dataset)
+        return dataset
+
+    def aggregate(self, project_key, chart, selected_status="Closed", days=DAILY_WINDOW_DAYS):
+        """
+        Агрегат графика и его хеш (от данных и параметров отрисовки, основа ETag).
+        :return: Пара (агрегат или None, если данных нет, хеш).
+        """
+        dataset = self.dataset(project_key)
+        key = (project_key, chart, selected_status, days, dataset.loaded_at)
+        cached = self.aggregates.get(key)
+        if cached is None:
+            cached = self._coalescer.run(("aggregate", key), self._compute_aggregate, dataset, chart,
+                                         selected_status, days)
+            self.aggregates.put(key, cached)
+        return cached
+
+    def _compute_aggregate(self, dataset, chart, selected_status, days):
+        aggregate = CHARTS[chart][0](dataset.chart_view(chart, selected_status, days))
+        return aggregate, chart_key(dataset.project_key, chart, aggregate, RENDER_PARAMS)
+
+    def images_for(self, project_key, chart, aggregate, digest):
+        """
+        PNG-картинки графика (у status_time - по одной на статус).
+        :param digest: Хеш агрегата из aggregate().
+        """
+        images = self.images.get(digest)
+        if images is None:
+            images = self._coalescer.run(("image", digest), self._render, project_key, chart, aggregate)
+            self.images.put(digest, images)
+        return images
+
+    def _render(self, project_key, chart, aggregate):
+        # Картинки рисуются в память: у графиков с разными параметрами (например, status)
+        # общий файл в results/, и чужая отрисовка могла бы его перезаписать
+        with self._render_lock:
+            return render_chart_images(chart, aggregate, project_key)
+
+
+def _make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 4 or parts[0] != "projects" or parts[2] != "charts" or "." not in parts[3]:
+                self._send_json(404, {"error": "Ожидается /projects/<KEY>/charts/<chart>.png|json"})
+                return
+            project_key = parts[1].upper()
+            chart, extension = parts[3].rsplit(".", 1)
+            if chart not in CHARTS or extension not in ("png", "json"):
+                self._send_json(404, {"error": f"Неизвестный график: {parts[3]}", "charts": list(CHARTS)})
+                return
+            query = parse_qs(url.query)
+            try:
+                selected_status = query.get("status", ["Closed"])[0]
+                days = int(query.get("days", [DAILY_WINDOW_DAYS])[0])
+                part = int(query.get("part", ["0"])[0])
+            except ValueError:
+                self._send_json(400, {"error": "Параметры days и part должны быть числами"})
+                return
+
+            started = time.perf_counter()
+            try:
+                aggregate, digest = service.aggregate(project_key, chart, selected_status, days)
+                if not aggregate:
+                    self._send_json(404, {"error": f"Нет данных для графика {chart} проекта {project_key}"})
+                    return
+                etag = f'"{digest}-{extension}-{part}"'
+                if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                    self._send(304, b"", None, etag)
+                    return
+                if extension == "json":
+                    self._send_json(200, aggregate, etag)
+                    return
+                images = service.images_for(project_key, chart, aggregate, digest)
+                if not 0 <= part < len(images):
+                    self._send_json(404, {"error": f"У графика {chart} нет картинки {part}"})
+                    return
+                self._send(200, images[part], "image/png", etag)
+            except Exception as e:
+                logger.error(f"Ошибка построения {chart} для проекта {project_key}: {e}")
+                self._send_json(502, {"error": f"{type(e).__name__}: {e}"})
+            finally:
+                metrics.observe("server_request", time.perf_counter() - started, chart=chart, format=extension)
+
+        def _send_json(self, status, payload, etag=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self._send(status, body, "application/json; charset=utf-8", etag)
+
+        def _send(self, status, body, content_type, etag=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            metrics.add("server_responses", status=status)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, service=None):
+    """Создать HTTP-сервер графиков (port=0 - свободный порт)."""
+    server = ThreadingHTTPServer((host, port), _make_handler(service or ChartService()))
+    server.daemon_threads = True
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Запустить сервер и обслуживать запросы до Ctrl+C."""
+    server = make_server(host, port)
+    logger.info(f"Сервер графиков запущен: http://{host}:{server.server_port}/projects/<KEY>/charts/<chart>.png")
+    print(f"Сервер графиков: http://{host}:{server.server_port}/projects/<KEY>/charts/<chart>.png (Ctrl+C - остановить)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
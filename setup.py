@@ -13,6 +13,7 @@ setup(
         'colorama',
         'requests',
         'matplotlib',
+        'numpy',
     ],
     entry_points={
         'console_scripts': [
@@ -24,5 +25,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+import logging
+
+import numpy as np
+
+from changelog import StatusIntervals
+from issue_table import Categorical, IssueTable
+from rollups import DailyRollup
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+META_FILE = "meta.json"
+# Колонки таблицы задач, интервалов статусов и дневных итогов: имя файла -> атрибут
+_TABLE_COLUMNS = ("keys", "created", "resolved", "timespent")
+_TABLE_CATEGORICALS = ("status", "priority", "assignee", "reporter")
+_INTERVAL_COLUMNS = ("issue", "enter", "exit")
+_ROLLUP_COLUMNS = ("days", "created", "resolved")
+
+
+def _save(directory, name, values):
+    np.save(os.path.join(directory, f"{name}.npy"), values, allow_pickle=False)
+
+
+def _load(directory, name, mmap_mode):
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+
+
+def snapshot_path(directory, project_key):
+    """Папка снимка проекта внутри directory."""
+    return os.path.join(directory, project_key.upper())
+
+
+def save_snapshot(dataset, path):
+    """
+    Сохранить набор проекта в колоночный снимок: по файлу .npy на колонку и meta.json.
+    В снимок входят таблица задач, интервалы статусов и дневные итоги за всю историю.
+    :param dataset: ProjectDataset.
+    :param path: Папка снимка (создается; файлы прежнего снимка перезаписываются).
+    :return: path.
+    """
+    os.makedirs(path, exist_ok=True)
+    table, intervals, rollup = dataset.table, dataset.intervals, dataset.daily_rollup(days=None)
+
+    # Ключи сохраняются строками фиксированной длины: объектные массивы нельзя отобразить в память
+    _save(path, "table.keys", np.asarray(table.keys, dtype=str))
+    for name in _TABLE_COLUMNS[1:]:
+        _save(path, f"table.{name}", getattr(table, name))
+    for name in _TABLE_CATEGORICALS:
+        _save(path, f"table.{name}", getattr(table, name).codes)
+    for name in _INTERVAL_COLUMNS:
+        _save(path, f"intervals.{name}", getattr(intervals, name))
+    _save(path, "intervals.status", intervals.status.codes)
+    for name in _ROLLUP_COLUMNS:
+        _save(path, f"rollup.{name}", getattr(rollup, name))
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "project": dataset.project_key.upper(),
+        "selected_status": dataset.selected_status,
+        "loaded_at": dataset.loaded_at,
+        "saved_at": time.time(),
+        "issues": len(table),
+        "intervals": len(intervals),
+        "categories": {
+            "status": table.status.names,
+            "priority": table.priority.names,
+            "users": table.assignee.names,  # Исполнители и репортеры делят словарь
+            "interval_status": intervals.status.names,
+        },
+        "rollup": {"created_before": rollup.created_before, "resolved_before": rollup.resolved_before},
+    }
+    tmp_path = os.path.join(path, f"{META_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(path, META_FILE))  # meta.json появляется последним
+    logger.info(f"Снимок проекта {meta['project']} сохранен в {path}: {len(table)} задач.")
+    return path
+
+
+def load_snapshot(path, mmap=True):
+    """
+    Загрузить набор проекта из снимка без обращения к Jira.
+    :param path: Папка снимка.
+    :param mmap: Отобразить колонки в память (mmap_mode='r') вместо чтения целиком.
+    :return: ProjectDataset.
+    """
+    from dataset import ProjectDataset  # dataset импортирует этот модуль
+
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка {meta.get('version')} в {path}")
+    mmap_mode = "r" if mmap else None
+    categories = {name: {value: code for code, value in enumerate(values)}
+                  for name, values in meta["categories"].items()}
+
+    def categorical(name, index):
+        return Categorical(_load(path, f"table.{name}", mmap_mode), index)
+
+    table = IssueTable(
+        *(_load(path, f"table.{name}", mmap_mode) for name in _TABLE_COLUMNS),
+        status=categorical("status", categories["status"]),
+        priority=categorical("priority", categories["priority"]),
+        assignee=categorical("assignee", categories["users"]),
+        reporter=categorical("reporter", categories["users"]),
+    )
+    intervals = StatusIntervals(
+        table.keys,
+        _load(path, "intervals.issue", mmap_mode),
+        Categorical(_load(path, "intervals.status", mmap_mode), categories["interval_status"]),
+        _load(path, "intervals.enter", mmap_mode),
+        _load(path, "intervals.exit", mmap_mode),
+    )
+    rollup = DailyRollup(*(_load(path, f"rollup.{name}", mmap_mode) for name in _ROLLUP_COLUMNS),
+                         **meta["rollup"])
+    dataset = ProjectDataset(meta["project"], table, meta["selected_status"], rollup=rollup, intervals=intervals)
+    dataset.loaded_at = meta["loaded_at"]
+    return dataset
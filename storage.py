@@ -0,0 +1,482 @@
+import os
+import sqlite3
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from changelog import extract_status_transitions
+from issue_table import IssueRecord, parse_jira_date, parse_jira_dates
+from rollups import DailyRollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join("cache", "issues.sqlite3")
+SCHEMA_VERSION = 3
+# Объединение полей, которые нужны всем графикам
+STORE_FIELDS = "created, updated, resolutiondate, status, priority, assignee, reporter, timespent"
+SYNC_INTERVAL = 60  # Не синхронизировать проект чаще, чем раз в столько секунд
+JIRA_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+RECORD_BATCH = 10000  # Записей на страницу при потоковом чтении задач
+ROLLUP_CHUNK = 500  # Ключей в одном запросе при чтении прежних значений задач
+# Поля задачи, изменения которых отслеживаются при синхронизации (в порядке колонок _issue_to_row)
+CHANGE_FIELDS = ("created", "resolutiondate", "status", "priority", "assignee", "reporter", "timespent")
+_CHANGE_POSITIONS = (3, 6, 7, 8, 9, 10, 11)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    id TEXT,
+    created TEXT,
+    created_ms INTEGER,
+    updated TEXT,
+    resolutiondate TEXT,
+    status TEXT,
+    priority TEXT,
+    assignee TEXT,
+    reporter TEXT,
+    timespent INTEGER,
+    PRIMARY KEY (project, key)
+);
+CREATE INDEX IF NOT EXISTS idx_issues_status ON issues (project, status);
+CREATE INDEX IF NOT EXISTS idx_issues_created ON issues (project, created_ms);
+CREATE TABLE IF NOT EXISTS transitions (
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    changed_ms INTEGER NOT NULL,
+    from_status TEXT,
+    to_status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transitions_key ON transitions (project, key);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    project TEXT NOT NULL,
+    day TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created INTEGER NOT NULL DEFAULT 0,
+    resolved INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project, day, status)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    project TEXT PRIMARY KEY,
+    last_updated TEXT,
+    synced_at REAL,
+    schema_version INTEGER
+);
+"""
+
+# Колонки в порядке аргументов IssueRecord
+_RECORD_COLUMNS = ("key", "created", "resolutiondate", "timespent", "status", "priority", "assignee", "reporter")
+_COLUMNS = (
+    "key", "id", "created", "updated", "resolutiondate",
+    "status", "priority", "assignee", "reporter", "timespent",
+)
+
+
+def _parse_date(value):
+    """Разобрать дату Jira, None остается None (для единичных дат; страницы - parse_jira_dates)."""
+    return datetime.strptime(value, JIRA_DATE_FORMAT) if value else None
+
+
+def _issue_to_row(project_key, issue, record, created_ms):
+    """
+    Строка таблицы issues из задачи Jira и ее записи IssueRecord.
+    :param created_ms: Дата создания, разобранная вместе со всей страницей (datetime64[ms], NaT - нет даты).
+    """
+    fields = issue.get("fields", {})
+    return (
+        project_key,
+        record.key,
+        issue.get("id"),
+        record.created,
+        None if np.isnat(created_ms) else int(created_ms.astype(np.int64)),
+        fields.get("updated"),
+        record.resolved,
+        record.status,
+        record.priority,
+        record.assignee,
+        record.reporter,
+        record.timespent,
+    )
+
+
+def _row_to_issue(row):
+    """Восстановить задачу в формате ответа Jira из строки хранилища."""
+    key, issue_id, created, updated, resolved, status, priority, assignee, reporter, timespent = row
+    return {
+        "key": key,
+        "id": issue_id,
+        "fields": {
+            "created": created,
+            "updated": updated,
+            "resolutiondate": resolved,
+            "status": {"name": status} if status else None,
+            "priority": {"name": priority} if priority else None,
+            "assignee": {"displayName": assignee} if assignee else None,
+            "reporter": {"displayName": reporter} if reporter else None,
+            "timespent": timespent,
+        },
+    }
+
+
+def _transition_rows(project_key, issues):
+    """Переходы статусов из историй изменений в виде строк таблицы transitions."""
+    positions, times, from_statuses, to_statuses = extract_status_transitions(issues)
+    changed_ms = parse_jira_dates(times).astype(np.int64)
+    return [
+        (project_key, issues[position]["key"], int(changed), from_status, to_status)
+        for position, changed, from_status, to_status in zip(positions, changed_ms, from_statuses, to_statuses)
+    ]
+
+
+def _rollup_deltas(project_key, rows, sign, deltas):
+    """
+    Добавить вклад задач в дневные итоги.
+    :param rows: Кортежи (created, resolutiondate, status) в формате дат Jira.
+    :param sign: 1 - добавить задачи, -1 - убрать прежние значения.
+    :param deltas: Словарь (проект, день, статус) -> [создано, решено], дополняется на месте.
+    """
+    if not rows:
+        return deltas
+    created, resolved, statuses = zip(*rows)
+    created_days = parse_jira_dates(created).astype("datetime64[D]")
+    resolved_days = parse_jira_dates(resolved).astype("datetime64[D]")
+    for created_day, resolved_day, status in zip(created_days, resolved_days, statuses):
+        status = status or ""
+        if not np.isnat(created_day):
+            deltas.setdefault((project_key, str(created_day), status), [0, 0])[0] += sign
+        if not np.isnat(resolved_day):
+            deltas.setdefault((project_key, str(resolved_day), status), [0, 0])[1] += sign
+    return deltas
+
+
+def _jql_date(value):
+    """Перевести дату Jira в формат JQL (точность до минуты, часовой пояс сервера)."""
+    return _parse_date(value).strftime("%Y/%m/%d %H:%M")
+
+
+class IssueStore:
+    """
+    Локальное хранилище задач Jira в SQLite.
+    Первая загрузка проекта полная, дальше подтягиваются только задачи
+    с updated >= даты последнего изменения из хранилища.
+    Удаленные в Jira задачи и задачи, перенесенные в другой проект, не отслеживаются.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.sync_interval = sync_interval
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # Отдельное соединение на операцию: хранилище используется из разных потоков
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _state(self, conn, project_key):
+        return conn.execute(
+            "SELECT last_updated, synced_at, schema_version FROM sync_state WHERE project = ?",
+            (project_key,),
+        ).fetchone()
+
+    def plan_sync(self, project_key, force=False):
+        """
+        Определить, какой запрос нужен для синхронизации проекта.
+        :param force: Синхронизировать, даже если интервал еще не истек.
+        :return: Пара (jql, полная загрузка) или None, если синхронизация не нужна.
+        """
+        project_key = project_key.upper()
+        with self._connect() as conn:
+            state = self._state(conn, project_key)
+        full_load = state is None or state[2] != SCHEMA_VERSION or not state[0]
+        if not full_load and not force and time.time() - state[1] < self.sync_interval:
+            return None
+
+        jql = f'project="{project_key}"'
+        if not full_load:
+            jql += f' AND updated >= "{_jql_date(state[0])}"'
+        return jql, full_load
+
+    def begin_sync(self, project_key, full_load):
+        """
+        Начать постраничное сохранение результата синхронизации.
+        При полной загрузке прежние задачи, переходы, итоги и состояние проекта удаляются сразу,
+        поэтому прерванная загрузка при следующем запуске начнется заново.
+        :param full_load: Полная ли это загрузка проекта (см. plan_sync).
+        :return: SyncWriter; страницы добавляются через add, синхронизация завершается finish.
+        """
+        project_key = project_key.upper()
+        with self._connect() as conn:
+            if full_load:
+                for table in ("issues", "transitions", "daily_rollup", "sync_state"):
+                    conn.execute(f"DELETE FROM {table} WHERE project = ?", (project_key,))
+                last_updated = None
+            else:
+                state = self._state(conn, project_key)
+                last_updated = state[0] if state else None
+        return SyncWriter(self, project_key, full_load, last_updated)
+
+    def _apply_page(self, project_key, issues, records, full_load):
+        """
+        Сохранить одну страницу задач одной транзакцией.
+        :param records: IssueRecord задач страницы (в том же порядке).
+        :return: Множество изменившихся полей (см. apply_sync).
+        """
+        created_ms = parse_jira_dates([record.created for record in records])
+        new_rows = [
+            _issue_to_row(project_key, issue, record, created)
+            for issue, record, created in zip(issues, records, created_ms)
+        ]
+        deltas = _rollup_deltas(project_key, [(row[3], row[6], row[7]) for row in new_rows], 1, {})
+        transition_rows = _transition_rows(project_key, issues)
+        changed = {*CHANGE_FIELDS, "transitions"} if full_load else set()
+        old_transitions = 0
+
+        with self._connect() as conn:
+            if not full_load:
+                # Прежний вклад изменившихся задач в дневные итоги вычитается
+                keys = [issue["key"] for issue in issues]
+                for start in range(0, len(keys), ROLLUP_CHUNK):
+                    chunk = keys[start:start + ROLLUP_CHUNK]
+                    placeholders = ", ".join("?" * len(chunk))
+                    old_rows = conn.execute(
+                        f"SELECT key, {', '.join(CHANGE_FIELDS)} FROM issues"
+                        f" WHERE project = ? AND key IN ({placeholders})",
+                        (project_key, *chunk),
+                    ).fetchall()
+                    _rollup_deltas(project_key, [row[1:4] for row in old_rows], -1, deltas)
+                    old_transitions += conn.execute(
+                        f"SELECT COUNT(*) FROM transitions WHERE project = ? AND key IN ({placeholders})",
+                        (project_key, *chunk),
+                    ).fetchone()[0]
+                    old_values = {row[0]: row[1:] for row in old_rows}
+                    for row in new_rows[start:start + ROLLUP_CHUNK]:
+                        old_row = old_values.get(row[1])
+                        new_values = [row[position] for position in _CHANGE_POSITIONS]
+                        if old_row is None:
+                            changed.update(CHANGE_FIELDS)
+                        else:
+                            changed.update(field for field, old_value, new_value
+                                           in zip(CHANGE_FIELDS, old_row, new_values) if old_value != new_value)
+                # История изменившихся задач приходит целиком и заменяет сохраненную;
+                # переходы в Jira только добавляются, поэтому новые видны по их числу
+                if old_transitions != len(transition_rows):
+                    changed.add("transitions")
+                conn.executemany(
+                    "DELETE FROM transitions WHERE project = ? AND key = ?",
+                    [(project_key, issue["key"]) for issue in issues],
+                )
+            conn.executemany(
+                "INSERT INTO transitions (project, key, changed_ms, from_status, to_status)"
+                " VALUES (?, ?, ?, ?, ?)",
+                transition_rows,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO issues (project, key, id, created, created_ms, updated,"
+                " resolutiondate, status, priority, assignee, reporter, timespent)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                new_rows,
+            )
+            conn.executemany(
+                "INSERT INTO daily_rollup (project, day, status, created, resolved) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (project, day, status) DO UPDATE SET"
+                " created = created + excluded.created, resolved = resolved + excluded.resolved",
+                [(*key, created, resolved) for key, (created, resolved) in deltas.items() if created or resolved],
+            )
+            conn.execute(
+                "DELETE FROM daily_rollup WHERE project = ? AND created = 0 AND resolved = 0",
+                (project_key,),
+            )
+        return changed
+
+    def _finish_sync(self, project_key, last_updated):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (project, last_updated, synced_at, schema_version)"
+                " VALUES (?, ?, ?, ?)",
+                (project_key, last_updated, time.time(), SCHEMA_VERSION),
+            )
+
+    def apply_pages(self, project_key, pages, full_load):
+        """
+        Сохранить результат синхронизации, полученный страницами.
+        :param pages: Списки задач по запросу из plan_sync (с историей изменений).
+        :return: Завершенный SyncWriter (число задач count и изменившиеся поля changed).
+        """
+        writer = self.begin_sync(project_key, full_load)
+        for issues in pages:
+            writer.add(issues)
+        writer.finish()
+        return writer
+
+    def apply_sync(self, project_key, issues, full_load):
+        """
+        Сохранить результат синхронизации.
+        :param issues: Задачи, полученные по запросу из plan_sync (с историей изменений).
+        :param full_load: Была ли это полная загрузка проекта.
+        :return: Множество полей из CHANGE_FIELDS, которые изменились хотя бы у одной задачи
+            (у новых задач и при полной загрузке - все поля), и "transitions", если в историях
+            изменений появились новые переходы статусов.
+        """
+        return self.apply_pages(project_key, [issues], full_load).changed
+
+    def sync(self, project_key, fetch, force=False):
+        """
+        Синхронизировать проект с Jira; задачи сохраняются по мере получения страниц.
+        :param project_key: Ключ проекта Jira.
+        :param fetch: Функция поиска fetch(jql, fields, expand) -> итератор страниц (списков задач).
+        :param force: Синхронизировать, даже если интервал еще не истек.
+        :return: Число загруженных задач (0, если синхронизация пропущена).
+        """
+        plan = self.plan_sync(project_key, force)
+        if plan is None:
+            return 0
+        jql, full_load = plan
+        return self.apply_pages(project_key, fetch(jql, STORE_FIELDS, "changelog"), full_load).count
+
+    def query(self, project_key, where="", params=()):
+        """
+        Получить задачи проекта из хранилища.
+        :param where: Дополнительное SQL-условие по колонкам таблицы issues.
+        :param params: Параметры для условия.
+        :return: Список задач в формате ответа Jira.
+        """
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM issues WHERE project = ?"
+        if where:
+            sql += f" AND ({where})"
+        sql += " ORDER BY key"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (project_key.upper(), *params)).fetchall()
+        return [_row_to_issue(row) for row in rows]
+
+    def iter_records(self, project_key, where="", params=(), batch_size=RECORD_BATCH):
+        """
+        Читать задачи проекта страницами компактных записей (без словарей в формате Jira).
+        :param where: Дополнительное SQL-условие по колонкам таблицы issues.
+        :param params: Параметры для условия.
+        :return: Генератор списков IssueRecord, упорядоченных по ключу.
+        """
+        sql = f"SELECT {', '.join(_RECORD_COLUMNS)} FROM issues WHERE project = ?"
+        if where:
+            sql += f" AND ({where})"
+        sql += " ORDER BY key"
+        with self._connect() as conn:
+            cursor = conn.execute(sql, (project_key.upper(), *params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [IssueRecord(*row) for row in rows]
+
+    def count(self, project_key):
+        """Число задач проекта в хранилище."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM issues WHERE project = ?", (project_key.upper(),)).fetchone()[0]
+
+    def query_transitions(self, project_key):
+        """
+        Получить переходы статусов проекта.
+        :return: Кортеж (ключи задач, время перехода в мс, из статуса, в статус).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, changed_ms, from_status, to_status FROM transitions WHERE project = ?",
+                (project_key.upper(),),
+            ).fetchall()
+        keys, changed_ms, from_statuses, to_statuses = zip(*rows) if rows else ((), (), (), ())
+        return list(keys), np.array(changed_ms, dtype=np.int64), list(from_statuses), list(to_statuses)
+
+    def daily_rollup(self, project_key, since=None, until=None, statuses=None):
+        """
+        Дневные итоги проекта (создано, решено) из предрассчитанной таблицы.
+        Чтение занимает O(дней окна) и не зависит от числа задач.
+        :param since: Первый день окна ('YYYY-MM-DD', None - с начала истории); дни окна без событий - нули.
+        :param until: Последний день окна включительно.
+        :param statuses: Учитывать только задачи в этих текущих статусах (None - все).
+        :return: DailyRollup.
+        """
+        where, params = "project = ?", [project_key.upper()]
+        if statuses:
+            where += f" AND status COLLATE NOCASE IN ({', '.join('?' * len(statuses))})"
+            params += list(statuses)
+        with self._connect() as conn:
+            before = (0, 0)
+            if since is not None:
+                before = conn.execute(
+                    f"SELECT COALESCE(SUM(created), 0), COALESCE(SUM(resolved), 0) FROM daily_rollup"
+                    f" WHERE {where} AND day < ?",
+                    (*params, str(since)),
+                ).fetchone()
+                where += " AND day >= ?"
+                params.append(str(since))
+            if until is not None:
+                where += " AND day <= ?"
+                params.append(str(until))
+            rows = conn.execute(
+                f"SELECT day, SUM(created), SUM(resolved) FROM daily_rollup WHERE {where}"
+                " GROUP BY day ORDER BY day",
+                params,
+            ).fetchall()
+        days, created, resolved = zip(*rows) if rows else ((), (), ())
+        # Окно дополняется нулевыми днями до since и until, как DailyRollup.window у таблицы
+        return DailyRollup.from_counts(days, created, resolved, *before).window(since, until)
+
+
+class SyncWriter:
+    """
+    Постраничное сохранение синхронизации проекта (IssueStore.begin_sync).
+    Каждая страница записывается отдельной транзакцией, а дата последнего изменения
+    попадает в sync_state только в finish, после последней страницы: если загрузка
+    прервется, следующая синхронизация повторит ее с прежней даты.
+    """
+
+    def __init__(self, store, project_key, full_load, last_updated=None):
+        self.store = store
+        self.project_key = project_key
+        self.full_load = full_load
+        self.last_updated = last_updated
+        # Наибольшая дата изменения в datetime64: строки дат страницы разбираются пачкой
+        self._last_updated_ms = parse_jira_date(last_updated) if last_updated else None
+        self.count = 0
+        self.changed = {*CHANGE_FIELDS, "transitions"} if full_load else set()
+
+    def add(self, issues):
+        """
+        Сохранить страницу задач.
+        :return: Записи IssueRecord задач страницы, из которых построены строки хранилища.
+        """
+        records = [IssueRecord.from_issue(issue) for issue in issues]
+        if not records:
+            return records
+        self.changed |= self.store._apply_page(self.project_key, issues, records, self.full_load)
+        self.count += len(issues)
+        updated = [issue.get("fields", {}).get("updated") for issue in issues]
+        updated_ms = parse_jira_dates(updated)
+        present = ~np.isnat(updated_ms)
+        if present.any():
+            latest = np.flatnonzero(present)[np.argmax(updated_ms[present])]
+            if self._last_updated_ms is None or updated_ms[latest] > self._last_updated_ms:
+                self._last_updated_ms = updated_ms[latest]
+                self.last_updated = updated[latest]
+        return records
+
+    def finish(self):
+        """
+        Завершить синхронизацию, записав дату последнего изменения.
+        :return: Изменившиеся поля (см. IssueStore.apply_sync).
+        """
+        self.store._finish_sync(self.project_key, self.last_updated)
+        kind = "Полная загрузка" if self.full_load else "Синхронизация изменений"
+        logger.info(f"{kind} проекта {self.project_key}: получено {self.count} задач.")
+        return self.changed
@@ -0,0 +1,211 @@
+import math
+
+import numpy as np
+
+from issue_table import DAY, as_table
+
+QUANTILE_ACCURACY = 0.01  # Относительная погрешность перцентилей
+PERCENTILES = (50, 90, 99)
+
+
+class FixedHistogram:
+    """
+    Гистограмма с корзинами фиксированной ширины: [origin + i*width, origin + (i+1)*width).
+    Память зависит от диапазона значений, а не от их числа; гистограммы с одинаковой
+    сеткой складываются, поэтому их можно считать по страницам и в разных процессах.
+    """
+
+    def __init__(self, width, origin=0.0):
+        self.width = width
+        self.origin = origin
+        self.start = 0  # Номер корзины counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        index = np.floor((values - self.origin) / self.width).astype(np.int64)
+        self._add_counts(int(index.min()), np.bincount(index - index.min()))
+        return self
+
+    def _add_counts(self, start, counts):
+        if not self.counts.size:
+            self.start, self.counts = start, counts.astype(np.int64)
+            return
+        first = min(self.start, start)
+        last = max(self.start + len(self.counts), start + len(counts))
+        merged = np.zeros(last - first, dtype=np.int64)
+        merged[self.start - first:self.start - first + len(self.counts)] += self.counts
+        merged[start - first:start - first + len(counts)] += counts
+        self.start, self.counts = first, merged
+
+    def merge(self, other):
+        """Добавить корзины другой гистограммы с той же сеткой."""
+        if (self.width, self.origin) != (other.width, other.origin):
+            raise ValueError("Нельзя сложить гистограммы с разной сеткой корзин")
+        if other.counts.size:
+            self._add_counts(other.start, other.counts)
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def to_aggregate(self, max_bins=None):
+        """
+        Границы и числа корзин от первой до последней непустой корзины.
+        :param max_bins: Объединять соседние корзины, пока их не станет не больше max_bins.
+        """
+        occupied = np.flatnonzero(self.counts)
+        if not occupied.size:
+            return None
+        counts = self.counts[occupied[0]:occupied[-1] + 1]
+        start = self.start + int(occupied[0])
+        factor = 1
+        if max_bins and len(counts) > max_bins:
+            factor = math.ceil(len(counts) / max_bins)
+            counts = np.pad(counts, (0, -len(counts) % factor)).reshape(-1, factor).sum(axis=1)
+        edges = self.origin + (start + np.arange(len(counts) + 1) * factor) * self.width
+        return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+class QuantileSketch:
+    """
+    Скетч квантилей в духе DDSketch: логарифмические корзины с относительной
+    погрешностью accuracy. Размер не зависит от числа значений, скетчи складываются.
+    """
+
+    def __init__(self, accuracy=QUANTILE_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}  # Номер логарифмической корзины -> число значений
+        self.zeros = 0  # Нулевые и отрицательные значения
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zeros += values.size - positive.size
+        index, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for i, count in zip(index.tolist(), counts.tolist()):
+            self.buckets[i] = self.buckets.get(i, 0) + count
+        return self
+
+    def merge(self, other):
+        """Добавить значения другого скетча с той же погрешностью."""
+        if self.accuracy != other.accuracy:
+            raise ValueError("Нельзя сложить скетчи с разной погрешностью")
+        for i, count in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Значение квантиля q (0..1) с относительной погрешностью accuracy; None для пустого скетча."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return min(self.min, 0.0)
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                value = 2 * self.gamma ** i / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentiles(self, percentiles=PERCENTILES):
+        return {f"p{p}": self.quantile(p / 100) for p in percentiles}
+
+
+class DurationSummary:
+    """Гистограмма с фиксированными корзинами и скетч перцентилей для одной величины."""
+
+    def __init__(self, width, origin=0.0, accuracy=QUANTILE_ACCURACY):
+        self.histogram = FixedHistogram(width, origin)
+        self.sketch = QuantileSketch(accuracy)
+
+    def add(self, values):
+        self.histogram.add(values)
+        self.sketch.add(values)
+        return self
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def count(self):
+        return self.sketch.count
+
+    def to_aggregate(self, max_bins=None, percentiles=PERCENTILES):
+        """Гистограмма для графика и перцентили; None, если значений нет."""
+        aggregate = self.histogram.to_aggregate(max_bins)
+        if aggregate is not None:
+            aggregate["percentiles"] = self.sketch.percentiles(percentiles)
+        return aggregate
+
+
+def fold(pages, summarize):
+    """
+    Свернуть поток страниц в одну сводку.
+    :param pages: Итерируемые страницы (таблицы задач, списки задач Jira, интервалы).
+    :param summarize: Функция страница -> сводка с методом merge.
+    :return: Сводка по всем страницам или None, если страниц нет.
+    """
+    result = None
+    for page in pages:
+        summary = summarize(page)
+        result = summary if result is None else result.merge(summary)
+    return result
+
+
+def open_state_summary(issues, bin_days=10):
+    """Время решенных задач в открытом состоянии (целые дни)."""
+    table = as_table(issues)
+    done = ~np.isnat(table.resolved)
+    return DurationSummary(bin_days).add(((table.resolved[done] - table.created[done]) // DAY).astype(np.float64))
+
+
+def time_spent_summary(issues, bin_hours=1):
+    """Затраченное время задач (часы)."""
+    table = as_table(issues)
+    return DurationSummary(bin_hours).add(table.timespent / 3600)
+
+
+class StatusTimeSummary:
+    """Сводки времени пребывания (целые дни больше нуля) по каждому статусу."""
+
+    def __init__(self, summaries=None):
+        self.summaries = summaries or {}
+
+    @classmethod
+    def from_intervals(cls, intervals, now=None):
+        return cls({
+            status: DurationSummary(1).add(days)
+            for status, days in intervals.durations_by_status(now).items()
+        })
+
+    def merge(self, other):
+        for status, summary in other.summaries.items():
+            if status in self.summaries:
+                self.summaries[status].merge(summary)
+            else:
+                self.summaries[status] = summary
+        return self
@@ -1,257 +1,405 @@
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
-from collections import defaultdict
-from utils import save_plot, setup_logging
+import numpy as np
 
-# Настройка логирования
-log = setup_logging()
+from changelog import StatusIntervals
+from chart_cache import chart_key, get_cache
+from issue_table import as_table
+from metrics import metrics
+from rollups import DailyRollup
+from streaming import DurationSummary, StatusTimeSummary, open_state_summary, time_spent_summary
+from utils import plots_in_memory, pyplot, save_plot, setup_logging
+
+OPEN_STATE_BIN_DAYS = 10  # Интервал для группировки времени в открытом состоянии
+TIME_SPENT_BINS = 10  # Наибольшее число корзин гистограммы времени выполнения
+TIME_SPENT_BIN_HOURS = 1  # Ширина исходных корзин времени выполнения, часы
+TOP_USERS = 30  # Сколько пользователей показывать на графике
+STATUS_TIME_BINS = 20  # Наибольшее число корзин гистограмм времени в статусе
+RENDER_VERSION = 3  # Увеличить при изменении внешнего вида графиков, чтобы сбросить кеш
+RENDER_PARAMS = {"version": RENDER_VERSION, "top_users": TOP_USERS}
+
+
+def log(level_name, message):
+    """Записать сообщение в лог (логирование настраивается при первом сообщении)."""
+    setup_logging()(level_name, message)
+
+
+def _format_percentiles(percentiles):
+    return ", ".join(f"{name}={value:.1f}" for name, value in percentiles.items())
+
+
+def _mark_percentiles(percentiles):
+    """Отметить перцентили вертикальными линиями на текущем графике."""
+    plt = pyplot()
+    for (name, value), style in zip(percentiles.items(), ("--", "-.", ":")):
+        plt.axvline(value, color="red", linestyle=style, linewidth=1, label=f"{name} = {value:.1f}")
+    plt.legend()
+
+
+def summarize_open_state(issues):
+    """Сводка времени в открытом состоянии по одной странице задач (для streaming.fold)."""
+    return open_state_summary(issues, OPEN_STATE_BIN_DAYS)
+
+
+def summarize_time_spent(issues):
+    """Сводка затраченного времени по одной странице задач (для streaming.fold)."""
+    return time_spent_summary(issues, TIME_SPENT_BIN_HOURS)
+
+
+@metrics.timed("aggregate", chart="open_state")
+def aggregate_open_state(issues):
+    """
+    Посчитать распределение времени задач в открытом состоянии.
+    :param issues: DurationSummary (накопленная по страницам), таблица задач или список задач из Jira.
+    :return: Словарь с границами корзин (дни), числом задач и перцентилями, None если данных нет.
+    """
+    summary = issues if isinstance(issues, DurationSummary) else summarize_open_state(issues)
+    return summary.to_aggregate()
+
+
+@metrics.timed("render", chart="open_state")
+def render_open_state(aggregate, project_key):
+    """Нарисовать и сохранить гистограмму времени в открытом состоянии."""
+    plt = pyplot()
+    edges = aggregate["edges"]
+    plt.hist(edges[:-1], bins=edges, weights=aggregate["counts"], alpha=0.8, color='skyblue', edgecolor='blue')
+    _mark_percentiles(aggregate["percentiles"])
+    plt.xlabel('Время в открытом состоянии (дни)')
+    plt.ylabel('Количество задач')
+    plt.title(f'Гистограмма времени в открытом состоянии (проект: {project_key})')
+    plt.grid(axis='y')
+    return [save_plot("open_state_histogram", project_key)]
 
 
 def task_build_open_state_histogram(issues, project_key):
     """
     Построить гистограмму времени задач в открытом состоянии.
-    :param issues: Список задач из Jira.
+    :param issues: Таблица задач или список задач из Jira.
     :param project_key: Ключ проекта Jira.
     """
     try:
-        open_times = []
-        for issue in issues:
-            created = datetime.strptime(issue['fields']['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            closed = datetime.strptime(issue['fields']['resolutiondate'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            open_time = (closed - created).days
-            open_times.append(open_time)
-
-        bin_size = 10  # Интервал для группировки
-        bins = range(0, max(open_times) + bin_size, bin_size)
-        plt.hist(open_times, bins=bins, alpha=0.8, color='skyblue', edgecolor='blue')
-        plt.xlabel('Время в открытом состоянии (дни)')
-        plt.ylabel('Количество задач')
-        plt.title(f'Гистограмма времени в открытом состоянии (проект: {project_key})')
-        plt.grid(axis='y')
-        save_plot("open_state_histogram", project_key)
+        aggregate = aggregate_open_state(issues)
+        if aggregate is None:
+            log("INFO", "Нет данных для построения гистограммы времени в открытом состоянии.")
+            return
+        render_chart("open_state", aggregate, project_key)
+        log("INFO", f"Время в открытом состоянии (дни): {_format_percentiles(aggregate['percentiles'])}")
         log("INFO", "Гистограмма времени в открытом состоянии успешно построена.")
     except Exception as e:
         log("ERROR", f"Ошибка в task_build_open_state_histogram: {e}")
 
 
+@metrics.timed("aggregate", chart="status_time")
+def aggregate_status_times(issues, transitions=None):
+    """
+    Посчитать распределение времени пребывания в каждом статусе.
+    :param issues: StatusTimeSummary, StatusIntervals, список задач Jira с историей изменений
+        или таблица задач / записи IssueRecord вместе с transitions.
+    :param transitions: Переходы статусов из хранилища (IssueStore.query_transitions).
+    :return: Словарь статус -> границы корзин, число интервалов и перцентили (дни).
+    """
+    if isinstance(issues, StatusTimeSummary):
+        summary = issues
+    else:
+        if isinstance(issues, StatusIntervals):
+            intervals = issues
+        elif transitions is not None:
+            intervals = StatusIntervals.from_transitions(issues, transitions)
+        else:
+            intervals = StatusIntervals.from_issues(issues)
+        summary = StatusTimeSummary.from_intervals(intervals)
+    return {status: status_summary.to_aggregate(STATUS_TIME_BINS) for status, status_summary in summary.summaries.items()}
+
+
+@metrics.timed("render", chart="status_time")
+def render_status_times(aggregate, project_key):
+    """Нарисовать и сохранить гистограммы времени по статусам."""
+    plt = pyplot()
+    paths = []
+    for status, histogram in aggregate.items():
+        edges = histogram["edges"]
+        plt.hist(edges[:-1], bins=edges, weights=histogram["counts"], alpha=0.8, color='skyblue', edgecolor='blue')
+        _mark_percentiles(histogram["percentiles"])
+        plt.xlabel('Время (дни)')
+        plt.ylabel('Количество задач')
+        plt.title(f'Время в статусе {status} (проект: {project_key})')
+        plt.grid(axis='y')
+        paths.append(save_plot(f"status_{status}_time_distribution", project_key))
+    return paths
+
 
-def task_build_status_time_diagrams(issues, project_key, selected_status):
-    """Построить диаграммы распределения времени по состояниям задачи с учетом выбранного начального статуса."""
+def task_build_status_time_diagrams(issues, project_key, selected_status, transitions=None):
+    """
+    Построить диаграммы распределения времени по состояниям задачи.
+    :param issues: StatusIntervals, список задач Jira с историей изменений
+        или таблица задач / записи IssueRecord вместе с transitions.
+    :param project_key: Ключ проекта Jira.
+    :param selected_status: Статус, по которому отобраны задачи.
+    :param transitions: Переходы статусов из хранилища (IssueStore.query_transitions).
+    """
     try:
-        status_data = defaultdict(list)
-        for issue in issues:
-            changelog = issue.get('changelog', {}).get('histories', [])
-            previous_status = selected_status  # Начинаем с выбранного статуса
-            previous_time = datetime.strptime(issue['fields']['created'], '%Y-%m-%dT%H:%M:%S.%f%z')
-
-            for history in changelog:
-                if 'field' in history['items'][0] and history['items'][0]['field'] == 'status':
-                    current_status = history['items'][0]['toString']
-                    current_time = datetime.strptime(history['created'], '%Y-%m-%dT%H:%M:%S.%f%z')
-                    time_spent = (current_time - previous_time).days
-                    if time_spent > 0:
-                        status_data[previous_status].append(time_spent)
-                    previous_status = current_status
-                    previous_time = current_time
-
-            resolved_time = datetime.strptime(issue['fields']['resolutiondate'], '%Y-%m-%dT%H:%M:%S.%f%z')
-            time_spent = (resolved_time - previous_time).days
-            if time_spent > 0:
-                status_data[previous_status].append(time_spent)
-
-        for status, times in status_data.items():
-            plt.hist(times, bins=20, alpha=0.8, color='skyblue', edgecolor='blue')
-            plt.xlabel('Время (дни)')
-            plt.ylabel('Количество задач')
-            plt.title(f'Время в статусе {status} (проект: {project_key})')
-            plt.grid(axis='y')
-            save_plot(f"status_{status}_time_distribution", project_key)
+        aggregate = aggregate_status_times(issues, transitions)
+        if not aggregate:
+            log("INFO", f"Нет данных для построения диаграмм по статусу '{selected_status}'.")
+            return
+        render_chart("status_time", aggregate, project_key)
+        for status, histogram in aggregate.items():
+            log("INFO", f"Время в статусе {status} (дни): {_format_percentiles(histogram['percentiles'])}")
         log("INFO", "Диаграммы распределения времени по состояниям успешно построены.")
     except Exception as e:
         log("ERROR", f"Ошибка в task_build_status_time_diagrams: {e}")
 
 
+@metrics.timed("aggregate", chart="time_spent")
+def aggregate_time_spent(issues, bins=TIME_SPENT_BINS):
+    """
+    Посчитать распределение затраченного времени (часы).
+    :param issues: DurationSummary (накопленная по страницам), таблица задач или список задач из Jira.
+    :param bins: Наибольшее число корзин; соседние часовые корзины объединяются.
+    :return: Словарь с границами корзин, числом задач и перцентилями, None если данных нет.
+    """
+    summary = issues if isinstance(issues, DurationSummary) else summarize_time_spent(issues)
+    return summary.to_aggregate(bins)
+
+
+@metrics.timed("render", chart="time_spent")
+def render_time_spent(aggregate, project_key):
+    """Нарисовать и сохранить гистограмму затраченного времени."""
+    plt = pyplot()
+    edges, counts = aggregate["edges"], aggregate["counts"]
+    plt.figure(figsize=(10, 6))
+    plt.hist(edges[:-1], bins=edges, weights=counts, color='skyblue', edgecolor='blue')
+    _mark_percentiles(aggregate["percentiles"])
+    plt.xlabel('Затраченное время (часы)')
+    plt.ylabel('Количество задач')
+    plt.title(f'Гистограмма затраченного времени на выполнение задач (проект: {project_key})')
+    plt.grid(axis='y')
+    return [save_plot("time_spent_histogram", project_key)]
+
 
 # Функция для построения гистограммы времени выполнения задач
 def task_build_time_spent_histogram(issues, project_key):
     """
     Построить гистограмму времени выполнения задач.
-    :param issues: Список задач из Jira.
+    :param issues: Таблица задач или список задач из Jira.
     :param project_key: Ключ проекта Jira.
     """
     try:
-        time_spent_counts = defaultdict(int)
-        time_spent_values = []
-
-        for issue in issues:
-            time_spent = issue['fields'].get('timespent')
-            if time_spent is not None:
-                time_spent_hours = time_spent / 3600  # Переводим секунды в часы
-                time_spent_counts[time_spent_hours] += 1
-                time_spent_values.append(time_spent_hours)
-
-        if not time_spent_values:
+        aggregate = aggregate_time_spent(issues)
+        if aggregate is None:
             log("INFO", "Нет данных для построения гистограммы времени выполнения задач.")
             return
+        render_chart("time_spent", aggregate, project_key)
+        log("INFO", f"Затраченное время (часы): {_format_percentiles(aggregate['percentiles'])}")
+        log("INFO", f"Гистограмма времени выполнения задач для проекта '{project_key}' успешно построена.")
+    except Exception as e:
+        log("ERROR", f"Ошибка в task_build_time_spent_histogram: {e}")
 
-        # Построение гистограммы
-        plt.figure(figsize=(10, 6))
-        # plt.bar(times, counts, color='skyblue', edgecolor='blue')
-        counts, bins, patches = plt.hist(time_spent_values, bins=10, color='skyblue', edgecolor='blue')
-        plt.xlabel('Затраченное время (часы)')
-        plt.ylabel('Количество задач')
-        plt.title(f'Гистограмма затраченного времени на выполнение задач (проект: {project_key})')
-        plt.grid(axis='y')
-        # plt.xticks(range(0, int(max(times))+1, 1)) # задает последовательность чисел от 0 до int(max(times)) + 1 с шагом 10
-        save_plot(f"time_spent_histogram", project_key)
 
-        # Печатаем количество задач в каждой корзине
-        for i in range(len(counts)):
-            print(f"Корзина {i + 1} (с интервалом от {bins[i]} до {bins[i + 1]}): {counts[i]} задач")
+# Оставлено для совместимости с прежним именем команды 5
+build_time_spent_histogram = task_build_time_spent_histogram
 
-    except Exception as e:
-        log("ERROR", f"Ошибка в task_build_time_spent_histogram: {e}")
+
+@metrics.timed("aggregate", chart="daily")
+def aggregate_daily_tasks(issues):
+    """
+    Посчитать ежедневное число созданных и закрытых задач, накопленные итоги и бэклог.
+    :param issues: Дневные итоги DailyRollup, таблица задач или список задач из Jira.
+    :return: Словарь с датами (ISO) и рядами значений, None если данных нет.
+    """
+    rollup = issues if isinstance(issues, DailyRollup) else DailyRollup.from_table(as_table(issues))
+    if not len(rollup):
+        return None
+    return {
+        "dates": [str(date) for date in rollup.days],
+        "created": rollup.created.tolist(),
+        "closed": rollup.resolved.tolist(),
+        "cumulative_created": np.cumsum(rollup.created).tolist(),
+        "cumulative_closed": np.cumsum(rollup.resolved).tolist(),
+        "backlog": rollup.backlog.tolist(),
+    }
+
+
+@metrics.timed("render", chart="daily")
+def render_daily_tasks(aggregate, project_key):
+    """Нарисовать и сохранить график создания и закрытия задач."""
+    plt = pyplot()
+    all_dates = np.array(aggregate["dates"], dtype="datetime64[D]")
+    plt.figure(figsize=(12, 6))
+    plt.plot(all_dates, aggregate["created"], label="Ежедневно создано", color="blue")
+    plt.plot(all_dates, aggregate["closed"], label="Ежедневно закрыто", color="green")
+    plt.plot(all_dates, aggregate["cumulative_created"], label="Накопленный итог созданных", color="blue", linestyle="--")
+    plt.plot(all_dates, aggregate["cumulative_closed"], label="Накопленный итог закрытых", color="red", linestyle="--")
+    plt.plot(all_dates, aggregate["backlog"], label="Открытый бэклог", color="gray", linestyle=":")
+    plt.xlabel("Дата")
+    plt.ylabel("Количество задач")
+    plt.legend()
+    plt.grid(True)
+    plt.title(f"График создания и закрытия задач (проект: {project_key})")
+    return [save_plot("daily_tasks_graph", project_key)]
 
 
 def task_build_daily_tasks_graph(issues, project_key):
     """Построить график количества заведенных и закрытых задач."""
     try:
-        created_task_counts = defaultdict(int)
-        closed_task_counts = defaultdict(int)
-
-        for issue in issues:
-            created_date = datetime.strptime(issue['fields']['created'], '%Y-%m-%dT%H:%M:%S.%f%z').date()
-            created_task_counts[created_date] += 1
-            if issue['fields']['resolutiondate']:
-                closed_date = datetime.strptime(issue['fields']['resolutiondate'], '%Y-%m-%dT%H:%M:%S.%f%z').date()
-                closed_task_counts[closed_date] += 1
-
-        min_date = min(created_task_counts.keys() | closed_task_counts.keys())
-        max_date = max(created_task_counts.keys() | closed_task_counts.keys())
-        all_dates = [min_date + timedelta(days=x) for x in range((max_date - min_date).days + 1)]
-
-        daily_created_counts = []
-        daily_closed_counts = []
-        cumulative_created = []
-        cumulative_closed = []
-        cumulative_created_total = 0
-        cumulative_closed_total = 0
-
-        for date in all_dates:
-            daily_created_counts.append(created_task_counts.get(date, 0))
-            daily_closed_counts.append(closed_task_counts.get(date, 0))
-            cumulative_created_total += created_task_counts.get(date, 0)
-            cumulative_closed_total += closed_task_counts.get(date, 0)
-            cumulative_created.append(cumulative_created_total)
-            cumulative_closed.append(cumulative_closed_total)
-
-        plt.figure(figsize=(12, 6))
-        plt.plot(all_dates, daily_created_counts, label="Ежедневно создано", color="blue")
-        plt.plot(all_dates, daily_closed_counts, label="Ежедневно закрыто", color="green")
-        plt.plot(all_dates, cumulative_created, label="Накопленный итог созданных", color="blue", linestyle="--")
-        plt.plot(all_dates, cumulative_closed, label="Накопленный итог закрытых", color="red", linestyle="--")
-        plt.xlabel("Дата")
-        plt.ylabel("Количество задач")
-        plt.legend()
-        plt.grid(True)
-        plt.title(f"График создания и закрытия задач (проект: {project_key})")
-        save_plot("daily_tasks_graph", project_key)
+        aggregate = aggregate_daily_tasks(issues)
+        if aggregate is None:
+            log("INFO", "Нет данных для построения графика создания и закрытия задач.")
+            return
+        render_chart("daily", aggregate, project_key)
         log("INFO", "График создания и закрытия задач успешно построен.")
     except Exception as e:
         log("ERROR", f"Ошибка в task_build_daily_tasks_graph: {e}")
 
 
+@metrics.timed("aggregate", chart="users")
+def aggregate_user_tasks(issues, top=TOP_USERS):
+    """
+    Посчитать пользователей с наибольшим числом задач (исполнитель + репортер).
+    :param issues: Таблица задач или список задач из Jira.
+    :param top: Сколько пользователей оставить.
+    """
+    table = as_table(issues)
+    # Исполнители и репортеры закодированы общим словарем пользователей
+    counts = table.assignee.counts() + table.reporter.counts()
+    order = np.argsort(-counts, kind="stable")[:top]
+    order = order[counts[order] > 0]
+    names = table.assignee.names
+    return {"users": [names[i] for i in order], "counts": counts[order].tolist()}
+
+
+@metrics.timed("render", chart="users")
+def render_user_tasks(aggregate, project_key):
+    """Нарисовать и сохранить график задач для пользователей."""
+    plt = pyplot()
+    plt.barh(aggregate["users"], aggregate["counts"], color='skyblue')
+    plt.xlabel("Количество задач")
+    plt.ylabel("Пользователи")
+    plt.title(f"Топ-{TOP_USERS} пользователей по задачам (проект: {project_key})")
+    plt.grid(axis='x')
+    plt.gca().invert_yaxis()
+    return [save_plot("user_task_chart", project_key)]
+
+
 def task_build_user_task_chart(issues, project_key):
     """Построить график задач для пользователей."""
     try:
-        user_task_counts = defaultdict(int)
-        for issue in issues:
-            assignee = issue['fields'].get('assignee', {}).get('displayName')
-            reporter = issue['fields'].get('reporter', {}).get('displayName')
-            if assignee:
-                user_task_counts[assignee] += 1
-            if reporter:
-                user_task_counts[reporter] += 1
-
-        top_users = sorted(user_task_counts.items(), key=lambda x: x[1], reverse=True)[:30]
-        usernames = [user[0] for user in top_users]
-        task_counts = [user[1] for user in top_users]
-
-        plt.barh(usernames, task_counts, color='skyblue')
-        plt.xlabel("Количество задач")
-        plt.ylabel("Пользователи")
-        plt.title(f"Топ-30 пользователей по задачам (проект: {project_key})")
-        plt.grid(axis='x')
-        plt.gca().invert_yaxis()
-        save_plot("user_task_chart", project_key)
+        render_chart("users", aggregate_user_tasks(issues), project_key)
         log("INFO", "График задач для пользователей успешно построен.")
     except Exception as e:
         log("ERROR", f"Ошибка в task_build_user_task_chart: {e}")
 
 
-def build_time_spent_histogram(issues, project_key):
-    """
-    Построить гистограмму времени выполнения задач.
-    :param issues: Список задач из Jira.
-    :param project_key: Ключ проекта Jira.
-    """
-    try:
-        # Словарь для хранения затраченного времени
-        time_spent_counts = defaultdict(int)
-        time_spent_values = []
-
-        # Обрабатываем каждую задачу
-        for issue in issues:
-            time_spent = issue['fields'].get('timespent')
-            if time_spent is not None:  # Проверка, если поле `timespent` не пустое
-                time_spent_hours = time_spent / 3600  # Переводим секунды в часы
-                time_spent_counts[time_spent_hours] += 1
-                time_spent_values.append(time_spent_hours)
-                print(f"ID задачи {issue['id']} ")
-                print("Затраченное время", time_spent_hours)
-        # Если данных нет, выводим сообщение
-        if not time_spent_values:
-            log("INFO", "Нет данных для построения гистограммы времени выполнения задач.")
-            return
+def _category_counts(issues, column):
+    """Число задач по значениям категориальной колонки (только встречающиеся значения)."""
+    if isinstance(issues, dict):
+        # Готовые итоги подсчета на стороне Jira (jira_api.count_priorities/count_statuses)
+        present = {name: count for name, count in issues.items() if count}
+        return list(present), list(present.values())
+    categorical = getattr(as_table(issues), column)
+    counts = categorical.counts()
+    present = np.flatnonzero(counts)
+    names = categorical.names
+    return [names[i] for i in present], counts[present].tolist()
 
-        # Строим гистограмму
-        plt.figure(figsize=(10, 6))
-        counts, bins, patches = plt.hist(time_spent_values, bins=10, color='skyblue', edgecolor='blue')
-        plt.xlabel('Затраченное время (часы)')
-        plt.ylabel('Количество задач')
-        plt.title(f'Гистограмма затраченного времени на выполнение задач (проект: {project_key})')
-        plt.grid(axis='y')
 
-        # Сохраняем график
-        save_plot(f"time_spent_histogram", project_key)
+@metrics.timed("aggregate", chart="priority")
+def aggregate_priorities(issues):
+    """
+    Посчитать число задач по приоритетам.
+    :param issues: Таблица задач, список задач из Jira или словарь приоритет -> число задач.
+    """
+    names, counts = _category_counts(issues, "priority")
+    return {"priorities": names, "counts": counts}
 
-        # Печатаем количество задач в каждой корзине
-        for i in range(len(counts)):
-            print(f"Корзина {i + 1} (с интервалом от {bins[i]} до {bins[i + 1]}): {counts[i]} задач")
 
-        log("INFO", f"Гистограмма времени выполнения задач для проекта '{project_key}' успешно построена.")
+@metrics.timed("render", chart="priority")
+def render_priorities(aggregate, project_key):
+    """Нарисовать и сохранить график задач по приоритетам."""
+    plt = pyplot()
+    plt.bar(aggregate["priorities"], aggregate["counts"], color='skyblue', edgecolor='blue')
+    plt.xlabel("Приоритет задачи")
+    plt.ylabel("Количество задач")
+    plt.title(f"Распределение задач по приоритетам (проект: {project_key})")
+    plt.grid(axis='y')
+    return [save_plot("priority_chart", project_key)]
 
-    except Exception as e:
-        log("ERROR", f"Ошибка в task_build_time_spent_histogram: {e}")
 
 def task_build_priority_chart(issues, project_key):
     """Построить график задач по степени серьезности."""
     try:
-        priority_counts = defaultdict(int)
-        for issue in issues:
-            priority = issue['fields'].get('priority', {}).get('name')
-            if priority:
-                priority_counts[priority] += 1
-
-        priorities = list(priority_counts.keys())
-        counts = list(priority_counts.values())
-
-        plt.bar(priorities, counts, color='skyblue', edgecolor='blue')
-        plt.xlabel("Приоритет задачи")
-        plt.ylabel("Количество задач")
-        plt.title(f"Распределение задач по приоритетам (проект: {project_key})")
-        plt.grid(axis='y')
-        save_plot("priority_chart", project_key)
+        render_chart("priority", aggregate_priorities(issues), project_key)
         log("INFO", "График задач по степени серьезности успешно построен.")
     except Exception as e:
         log("ERROR", f"Ошибка в task_build_priority_chart: {e}")
+
+
+@metrics.timed("aggregate", chart="status")
+def aggregate_statuses(issues):
+    """
+    Посчитать число задач по статусам.
+    :param issues: Таблица задач, список задач из Jira или словарь статус -> число задач.
+    """
+    names, counts = _category_counts(issues, "status")
+    return {"statuses": names, "counts": counts}
+
+
+@metrics.timed("render", chart="status")
+def render_statuses(aggregate, project_key):
+    """Нарисовать и сохранить график задач по статусам."""
+    plt = pyplot()
+    plt.bar(aggregate["statuses"], aggregate["counts"], color='skyblue', edgecolor='blue')
+    plt.xlabel("Статус задачи")
+    plt.ylabel("Количество задач")
+    plt.title(f"Распределение задач по статусам (проект: {project_key})")
+    plt.xticks(rotation=30, ha="right")
+    plt.grid(axis='y')
+    plt.tight_layout()
+    return [save_plot("status_chart", project_key)]
+
+
+def task_build_status_chart(issues, project_key):
+    """Построить график задач по статусам."""
+    try:
+        render_chart("status", aggregate_statuses(issues), project_key)
+        log("INFO", "График задач по статусам успешно построен.")
+    except Exception as e:
+        log("ERROR", f"Ошибка в task_build_status_chart: {e}")
+
+
+# Графики: имя -> (агрегирование, отрисовка)
+CHARTS = {
+    "open_state": (aggregate_open_state, render_open_state),
+    "status_time": (aggregate_status_times, render_status_times),
+    "daily": (aggregate_daily_tasks, render_daily_tasks),
+    "users": (aggregate_user_tasks, render_user_tasks),
+    "time_spent": (aggregate_time_spent, render_time_spent),
+    "priority": (aggregate_priorities, render_priorities),
+    "status": (aggregate_statuses, render_statuses),
+}
+
+
+def render_chart(chart, aggregate, project_key):
+    """
+    Отрисовать график через кеш: если такой же график по тем же данным
+    уже сохранен, файл переиспользуется без обращения к matplotlib.
+    :return: Список путей к файлам графика.
+    """
+    cache = get_cache()
+    key = chart_key(project_key, chart, aggregate, RENDER_PARAMS)
+    paths = cache.lookup(key)
+    if paths is not None:
+        metrics.add("chart_cache_hits", chart=chart)
+        log("INFO", f"График {chart} для проекта {project_key} не изменился, используется сохраненный.")
+        return paths
+    metrics.add("chart_cache_misses", chart=chart)
+    paths = CHARTS[chart][1](aggregate, project_key)
+    cache.store(key, paths)
+    return paths
+
+
+def render_chart_images(chart, aggregate, project_key):
+    """
+    Отрисовать график в память, минуя папку результатов и кеш файлов графиков.
+    :return: Список байтов PNG (у status_time - по картинке на статус).
+    """
+    with plots_in_memory():
+        return CHARTS[chart][1](aggregate, project_key)
@@ -0,0 +1,14 @@
+"""
+Тесты пишут графики, выгрузки и логи во временную папку, а не в results/ и logs/ репозитория.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+import utils
+
+_output_dir = tempfile.mkdtemp(prefix="jira-tests-")
+atexit.register(shutil.rmtree, _output_dir, ignore_errors=True)
+utils.RESULTS_DIR = os.path.join(_output_dir, "results")
+utils.LOG_DIR = os.path.join(_output_dir, "logs")
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from async_api import AsyncJiraClient, sync_projects_async
+from ratelimit import TokenBucket
+from storage import IssueStore
+
+TOTAL = 250
+PAGE_CAP = 100
+
+
+class StubJiraHandler(BaseHTTPRequestHandler):
+    """Заглушка /rest/api/2/search: первый запрос получает 429, дальше постраничная выдача."""
+
+    hits = []
+    throttle_first = True
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        with self.lock:
+            self.hits.append(self.path)
+            throttle = StubJiraHandler.throttle_first
+            StubJiraHandler.throttle_first = False
+        if throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        time.sleep(0.05)  # Задержка, чтобы одинаковые запросы успели совпасть по времени
+        start_at = int(query["startAt"][0])
+        size = min(int(query["maxResults"][0]), PAGE_CAP)
+        issues = [
+            {"key": f"T-{i}", "fields": {"updated": "2024-01-01T00:00:00.000+0000"}}
+            for i in range(start_at, min(start_at + size, TOTAL))
+        ]
+        if "expand" in query:
+            for issue in issues:
+                issue["changelog"] = {"total": 0, "histories": []}
+        body = json.dumps({"total": TOTAL, "maxResults": size, "issues": issues}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordingSession(requests.Session):
+    """Сессия, запоминающая ответы и то, какие из них закрыты."""
+
+    def __init__(self):
+        super().__init__()
+        self.responses = []
+
+    def get(self, *args, **kwargs):
+        response = super().get(*args, **kwargs)
+        response.closed = False
+        close = response.close
+
+        def record_close():
+            response.closed = True
+            close()
+
+        response.close = record_close
+        self.responses.append(response)
+        return response
+
+
+class TestAsyncJiraClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubJiraHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/rest/api/2/search"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubJiraHandler.hits = []
+        StubJiraHandler.throttle_first = True
+
+    def _client(self, session=None):
+        return AsyncJiraClient(search_url=self.url, limiter=TokenBucket(rate=1000, capacity=100),
+                               session=session or requests.Session())
+
+    def test_search_retries_and_paginates(self):
+        """После 429 запрос повторяется, все страницы загружаются по порядку."""
+        session = RecordingSession()
+
+        async def run():
+            return await self._client(session).search("project=T", "created")
+
+        issues = asyncio.run(run())
+        self.assertEqual([issue["key"] for issue in issues], [f"T-{i}" for i in range(TOTAL)])
+        self.assertEqual(len(StubJiraHandler.hits), 4)  # 429 + три страницы
+        # Ответ 429 закрыт до повтора: соединение вернулось в пул
+        self.assertEqual([response.status_code for response in session.responses if response.closed], [429])
+
+    def test_identical_requests_are_coalesced(self):
+        """Одинаковые одновременные запросы разделяют один ответ."""
+        StubJiraHandler.throttle_first = False
+
+        async def run():
+            client = self._client()
+            params = {"jql": "project=T", "startAt": 0, "maxResults": 100}
+            return await asyncio.gather(*(client.get_json(self.url, params) for _ in range(5)))
+
+        pages = asyncio.run(run())
+        self.assertEqual(len(StubJiraHandler.hits), 1)
+        self.assertTrue(all(page == pages[0] for page in pages))
+
+    def test_sync_projects_saves_pages(self):
+        """Синхронизация сохраняет страницы в хранилище по мере получения."""
+        StubJiraHandler.throttle_first = False
+        with tempfile.TemporaryDirectory() as tmp:
+            store = IssueStore(os.path.join(tmp, "issues.sqlite3"))
+            results = asyncio.run(sync_projects_async(["T"], store, self._client()))
+            self.assertEqual(results, {"T": TOTAL})
+            self.assertEqual(len(store.query("T")), TOTAL)
+            self.assertIsNone(store.plan_sync("T"))  # Синхронизация завершена, состояние записано
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+import batch
+from dataset import ProjectDataset
+from metrics import metrics
+from tests.test_changelog import ISSUES
+
+
+def _load(project_key):
+    if project_key == "BROKEN":
+        raise RuntimeError("нет доступа")
+    return ProjectDataset(project_key, ISSUES)
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_reports_success_and_failure_per_project(self):
+        """Ошибка загрузки одного проекта не мешает остальным."""
+        with mock.patch.object(batch, "get_dataset", side_effect=_load), \
+                mock.patch.object(batch, "sync_projects", side_effect=lambda projects: dict.fromkeys(projects, 0)):
+            report = batch.run_batch(["TEST", "BROKEN"], ["priority", "status_time"], workers=1)
+        self.assertEqual(report["TEST"]["charts"], 2)
+        self.assertEqual(report["TEST"]["errors"], [])
+        self.assertEqual(report["TEST"]["issues"], 2)
+        self.assertEqual(len(report["BROKEN"]["errors"]), 1)
+        # Метрики процессов-обработчиков сводятся в основной процесс
+        spans = {(span["name"], span["labels"].get("chart")) for span in metrics.snapshot()["spans"]}
+        self.assertIn(("aggregate", "priority"), spans)
+
+    def test_pushdown_skips_loading(self):
+        """В режиме подсчета графики распределений не загружают задачи."""
+        with mock.patch.object(batch, "get_dataset") as get_dataset, \
+                mock.patch.object(batch, "sync_projects") as sync_projects, \
+                mock.patch.object(batch, "count_priorities", return_value={"Major": 120, "Minor": 3}), \
+                mock.patch.object(batch, "count_statuses", return_value={"Open": 5, "Closed": 118}):
+            report = batch.run_batch(["TEST"], ["priority", "status"], workers=1, pushdown=True)
+        self.assertEqual(report["TEST"]["charts"], 2)
+        self.assertEqual(report["TEST"]["errors"], [])
+        get_dataset.assert_not_called()
+        sync_projects.assert_not_called()
+
+    def test_summary_charts_skip_table(self):
+        """Графикам-сводкам таблица задач не нужна: данные собираются по страницам хранилища."""
+        with mock.patch.object(batch, "get_dataset") as get_dataset, \
+                mock.patch.object(batch, "sync_projects", side_effect=lambda projects: dict.fromkeys(projects, 0)), \
+                mock.patch.object(batch, "summary_view",
+                                  side_effect=lambda project, chart, *args: _load(project).chart_view(chart)), \
+                mock.patch.object(batch, "count_stored_issues", return_value=2):
+            report = batch.run_batch(["TEST"], ["open_state", "daily"], workers=1, output_format="json")
+        self.assertEqual(report["TEST"]["errors"], [])
+        self.assertEqual(report["TEST"]["issues"], 2)
+        get_dataset.assert_not_called()
+
+    def test_parse_charts(self):
+        """Список графиков проверяется до запуска."""
+        self.assertEqual(batch.parse_charts("all"), list(batch.CHART_NAMES))
+        with self.assertRaises(ValueError):
+            batch.parse_charts("priority,bogus")
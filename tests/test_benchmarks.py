@@ -0,0 +1,28 @@
+import unittest
+
+from benchmarks.run import run_benchmarks
+from benchmarks.synthetic import generate_issues, search_page
+from tasks import CHARTS
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generator_is_deterministic(self):
+        """Синтетический набор воспроизводится при одинаковом зерне."""
+        self.assertEqual(generate_issues(20, seed=1), generate_issues(20, seed=1))
+        # Страница строится отдельно от остального набора и совпадает с ним
+        self.assertEqual(search_page(20, 10, 5, seed=1)["issues"], generate_issues(20, seed=1)[10:15])
+
+    def test_all_stages_measured(self):
+        """Замер проходит через заглушку Jira и покрывает все этапы."""
+        results = run_benchmarks([300], render=False)
+        stages = {record["stage"] for record in results}
+        self.assertEqual(stages, {"fetch", "load", "parse", "aggregate"})
+        fetch = results[0]
+        self.assertEqual(fetch["function"], "jira_api.iter_search_pages")
+        self.assertGreaterEqual(fetch["requests"], 1)
+        loads = {record["function"]: record for record in results if record["stage"] == "load"}
+        self.assertEqual(set(loads), {"async_api.sync_projects_async", "jira_api.load_project_table",
+                                      "dataset.load_dataset"})
+        self.assertGreaterEqual(loads["jira_api.load_project_table"]["requests"], 1)
+        self.assertEqual(loads["dataset.load_dataset"]["requests"], 0)  # Повторная загрузка - из хранилища
+        self.assertEqual(len([r for r in results if r["stage"] == "aggregate"]), len(CHARTS))
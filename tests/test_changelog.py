@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from changelog import StatusIntervals
+
+
+def _history(created, *items):
+    return {"created": created, "items": list(items)}
+
+
+def _status_item(from_status, to_status):
+    return {"field": "status", "fromString": from_status, "toString": to_status}
+
+
+ISSUES = [
+    {
+        "key": "T-1",
+        "fields": {
+            "created": "2023-09-01T00:00:00.000+0000",
+            "resolutiondate": "2023-09-11T00:00:00.000+0000",
+            "status": {"name": "Closed"},
+        },
+        "changelog": {"histories": [
+            # Статус может быть не первым элементом записи истории
+            _history("2023-09-03T00:00:00.000+0000",
+                     {"field": "assignee", "fromString": None, "toString": "Alice"},
+                     _status_item("Open", "In Progress")),
+            _history("2023-09-10T00:00:00.000+0000", _status_item("In Progress", "Closed")),
+        ]},
+    },
+    {
+        "key": "T-2",
+        "fields": {
+            "created": "2023-09-01T00:00:00.000+0000",
+            "resolutiondate": None,
+            "status": {"name": "Open"},
+        },
+        "changelog": {"histories": []},
+    },
+]
+
+
+class TestStatusIntervals(unittest.TestCase):
+    def setUp(self):
+        self.intervals = StatusIntervals.from_issues(ISSUES)
+
+    def test_intervals_cover_every_transition(self):
+        """Интервалы строятся по всем переходам, включая начальный статус."""
+        self.assertEqual(len(self.intervals), 4)
+        days = self.intervals.durations_by_status()
+        self.assertEqual(days["Open"].tolist(), [2])
+        self.assertEqual(days["In Progress"].tolist(), [7])
+        self.assertEqual(days["Closed"].tolist(), [1])
+
+    def test_open_interval_closed_by_now(self):
+        """Незавершенный интервал учитывается только при заданном now."""
+        now = np.datetime64("2023-09-06T00:00:00.000")
+        open_time = self.intervals.time_in_status("Open", now=now)
+        self.assertEqual((open_time / 86400000).tolist(), [2.0, 5.0])
+
+    def test_cycle_time_percentiles(self):
+        """Перцентили считаются по суммарному времени задач в статусах."""
+        percentiles = self.intervals.cycle_time_percentiles(["In Progress", "Closed"], percentiles=(50,))
+        self.assertEqual(percentiles, {"p50": 8.0})
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from chart_cache import ChartCache, chart_key
+
+
+class TestChartCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ChartCache(self.tmp.name, max_bytes=10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, size):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_hit_only_for_same_aggregate(self):
+        """Тот же агрегат дает попадание, измененный - промах."""
+        key = chart_key("T", "priority", {"counts": [1, 2]})
+        self.assertIsNone(self.cache.lookup(key))
+        path = self._write("T_priority_chart.png", 4)
+        self.cache.store(key, [path])
+        self.assertEqual(self.cache.lookup(key), [path])
+        self.assertIsNone(self.cache.lookup(chart_key("T", "priority", {"counts": [1, 3]})))
+
+    def test_overwritten_file_invalidates_old_key(self):
+        """Перерисованный файл больше не отдается по старому ключу."""
+        old_key = chart_key("T", "priority", {"counts": [1]})
+        new_key = chart_key("T", "priority", {"counts": [2]})
+        path = self._write("T_priority_chart.png", 4)
+        self.cache.store(old_key, [path])
+        self.cache.store(new_key, [path])
+        self.assertIsNone(self.cache.lookup(old_key))
+
+    def test_eviction_by_size(self):
+        """При превышении объема удаляются давно не использованные графики."""
+        first = self._write("A.png", 6)
+        self.cache.store("a", [first])
+        second = self._write("B.png", 6)
+        self.cache.store("b", [second])
+        self.assertFalse(os.path.exists(first))
+        self.assertIsNone(self.cache.lookup("a"))
+        self.assertEqual(self.cache.lookup("b"), [second])
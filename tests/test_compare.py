@@ -0,0 +1,44 @@
+import csv
+import os
+import unittest
+from unittest import mock
+
+import batch
+import compare
+from dataset import ProjectDataset
+from tests.test_changelog import ISSUES
+from tests.test_query import ISSUES as OTHER_ISSUES
+
+
+def _load(project_key):
+    return ProjectDataset(project_key, ISSUES if project_key == "TEST_A" else OTHER_ISSUES)
+
+
+class TestCompare(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(batch, "get_dataset", side_effect=_load), \
+                mock.patch.object(batch, "sync_projects", side_effect=lambda projects: dict.fromkeys(projects, 0)):
+            self.aggregates, self.report = compare.compute_aggregates(
+                ["TEST_A", "TEST_B"], list(batch.CHART_NAMES), workers=2, daily_days=None)
+
+    def test_aggregates_per_project(self):
+        """Агрегаты считаются для каждого проекта и идут в порядке проектов."""
+        self.assertEqual(list(self.aggregates["priority"]), ["TEST_A", "TEST_B"])
+        self.assertEqual(self.report["TEST_B"]["issues"], len(OTHER_ISSUES))
+        self.assertEqual([result["errors"] for result in self.report.values()], [[], []])
+
+    def test_comparison_charts_and_summary(self):
+        for chart, per_project in self.aggregates.items():
+            with self.subTest(chart=chart):
+                self.assertTrue(os.path.exists(compare.render_comparison(chart, per_project)))
+        rows = compare.summary_rows(self.aggregates, self.report)
+        self.assertEqual([row[0] for row in rows], ["TEST_A", "TEST_B"])
+        summary = dict(zip(compare.SUMMARY_COLUMNS, rows[1]))
+        self.assertEqual((summary["created"], summary["closed"], summary["backlog"]), (5, 3, 2))
+        self.assertEqual((summary["top_priority"], summary["top_priority_share"]), ("Blocker", 0.667))
+        with open(compare.write_summary(rows, ["TEST_A", "TEST_B"]), encoding="utf-8") as f:
+            self.assertEqual(len(list(csv.reader(f))), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
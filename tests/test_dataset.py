@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dataset
+import jira_api
+from issue_table import as_table
+from storage import IssueStore
+from tasks import CHARTS
+from tests.test_changelog import ISSUES
+
+
+def _issue(key, status, resolved=None, assignee=None):
+    return {
+        "key": key,
+        "fields": {
+            "created": "2023-09-01T12:00:00.000+0000",
+            "resolutiondate": resolved,
+            "status": {"name": status},
+            "assignee": {"displayName": assignee} if assignee else None,
+            "reporter": {"displayName": "Bob"},
+        },
+    }
+
+
+class TestProjectDataset(unittest.TestCase):
+    def setUp(self):
+        dataset.clear_datasets()
+
+    def test_loaded_once_per_project(self):
+        """Набор загружается один раз и переиспользуется всеми командами."""
+        issues = [_issue("T-1", "Closed", "2023-09-05T12:00:00.000+0000", "Alice"), _issue("T-2", "Open")]
+        with mock.patch.object(dataset, "load_project_table", return_value=as_table(issues)) as load, \
+                mock.patch.object(dataset, "load_project_transitions", return_value=([], [], [], [])), \
+                mock.patch.object(dataset, "load_daily_rollup", return_value=None):
+            first = dataset.get_dataset("T")
+            second = dataset.get_dataset("t")
+        self.assertIs(first, second)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(list(first.open_state_issues().keys), ["T-1"])
+        self.assertEqual(list(first.user_issues().keys), ["T-1"])
+        self.assertEqual(len(first.priority_issues()), 1)
+        rollup = first.daily_rollup(days=None)
+        self.assertEqual((rollup.created.sum(), rollup.resolved.sum(), rollup.backlog[-1]), (2, 1, 1))
+
+
+class TestSummaryView(unittest.TestCase):
+    def test_matches_chart_view(self):
+        """Сводки по страницам хранилища дают те же агрегаты, что и таблица задач."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = IssueStore(os.path.join(tmp.name, "issues.sqlite3"))
+        with mock.patch.object(jira_api, "get_store", return_value=store), \
+                mock.patch.object(jira_api, "_search_logged", side_effect=lambda *args: ([issue] for issue in ISSUES)):
+            reference = dataset.ProjectDataset("T", ISSUES)
+            for chart in dataset.SUMMARY_CHARTS:
+                with self.subTest(chart=chart):
+                    aggregate = CHARTS[chart][0]
+                    self.assertEqual(aggregate(dataset.summary_view("T", chart, daily_days=None)),
+                                     aggregate(reference.chart_view(chart, daily_days=None)))
+
+    def test_daily_window_matches_table(self):
+        """Окно дневных итогов из хранилища и по таблице задач - одни и те же дни от since до until."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = IssueStore(os.path.join(tmp.name, "issues.sqlite3"))
+        store.apply_sync("T", ISSUES, True)
+        reference = dataset.ProjectDataset("T", ISSUES).daily_rollup(days=None)
+        for since, until in [("2023-08-20", "2023-09-30"), ("2023-09-05", "2023-09-08"), ("2023-09-05", None)]:
+            with self.subTest(since=since, until=until):
+                stored = store.daily_rollup("T", since, until, statuses=dataset.DAILY_STATUSES)
+                table = reference.window(since, until)
+                self.assertEqual(str(stored.days[0]), since)
+                self.assertEqual(stored.days.tolist(), table.days.tolist())
+                self.assertEqual(stored.backlog.tolist(), table.backlog.tolist())
+                self.assertEqual(stored.resolved.tolist(), table.resolved.tolist())
+
+        days = 2000  # Окно до сегодняшнего дня, начинается до первого события
+        stored = store.daily_rollup("T", statuses=dataset.DAILY_STATUSES)
+        with mock.patch.object(dataset, "load_daily_rollup", return_value=stored):
+            aggregate = CHARTS["daily"][0](dataset.summary_view("T", "daily", daily_days=days))
+        table_view = dataset.ProjectDataset("T", ISSUES).chart_view("daily", daily_days=days)
+        self.assertEqual(aggregate, CHARTS["daily"][0](table_view))
+        self.assertEqual(len(aggregate["dates"]), days + 1)
+
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from issue_table import IssueRecord, IssueTable, parse_jira_dates
+
+
+class TestParseJiraDates(unittest.TestCase):
+    def test_offsets_and_empty(self):
+        """Смещение часового пояса учитывается, пустые даты становятся NaT."""
+        dates = parse_jira_dates(["2023-09-01T12:00:00.000+0300", "2023-09-01T12:00:00.000-0130", None])
+        self.assertEqual(dates[0], np.datetime64("2023-09-01T09:00:00.000"))
+        self.assertEqual(dates[1], np.datetime64("2023-09-01T13:30:00.000"))
+        self.assertTrue(np.isnat(dates[2]))
+
+
+class TestIssueTable(unittest.TestCase):
+    def test_take_keeps_categories(self):
+        """Выборка строк сохраняет общий словарь категорий."""
+        table = IssueTable.from_issues([
+            {"key": "T-1", "fields": {"created": "2023-09-01T12:00:00.000+0000", "status": {"name": "Closed"}}},
+            {"key": "T-2", "fields": {"created": "2023-09-02T12:00:00.000+0000", "status": {"name": "Open"}}},
+        ])
+        closed = table.take(table.status_in("closed"))
+        self.assertEqual(list(closed.keys), ["T-1"])
+        self.assertEqual(closed.status.counts().tolist(), [1, 0])
+        self.assertTrue(np.isnan(closed.timespent[0]))
+
+    def test_pages_of_records_match_issues(self):
+        """Таблица, собранная по страницам записей, совпадает с таблицей из задач Jira."""
+        issues = [
+            {"key": f"T-{i}", "fields": {
+                "created": "2023-09-01T12:00:00.000+0000", "timespent": 60 * i,
+                "status": {"name": "Open" if i % 2 else "Closed"},
+                "assignee": {"displayName": f"user{i % 3}"}, "reporter": {"displayName": "user0"},
+            }}
+            for i in range(7)
+        ]
+        records = [IssueRecord.from_issue(issue) for issue in issues]
+        self.assertIs(records[1].status, records[3].status)  # Строки интернированы
+        paged = IssueTable.from_pages([records[:3], records[3:]])
+        whole = IssueTable.from_issues(issues)
+        self.assertEqual(list(paged.keys), list(whole.keys))
+        self.assertEqual(paged.status.names, whole.status.names)
+        np.testing.assert_array_equal(paged.assignee.codes, whole.assignee.codes)
+        np.testing.assert_array_equal(paged.timespent, whole.timespent)
+
+    def test_upsert_replaces_and_appends_rows(self):
+        """Строки изменившихся задач заменяются, новые добавляются, исходная таблица не меняется."""
+        table = IssueTable.from_issues([
+            IssueRecord("T-1", "2023-09-01T12:00:00.000+0000", None, 3600, "Open", "Major", "Alice", "Bob"),
+            IssueRecord("T-2", "2023-09-02T12:00:00.000+0000", None, None, "Open", "Minor", None, "Alice"),
+        ])
+        updated = table.upsert([
+            IssueRecord("T-2", "2023-09-02T12:00:00.000+0000", "2023-09-05T12:00:00.000+0000", 7200,
+                        "Closed", "Minor", "Carol", "Alice"),
+            IssueRecord("T-3", "2023-09-03T12:00:00.000+0000", None, None, "Open", "Blocker", None, None),
+        ])
+        self.assertEqual(list(updated.keys), ["T-1", "T-2", "T-3"])
+        self.assertEqual([updated.status.names[code] for code in updated.status.codes], ["Open", "Closed", "Open"])
+        self.assertEqual(updated.assignee.names[updated.assignee.codes[1]], "Carol")
+        self.assertEqual(updated.reporter.names[updated.reporter.codes[1]], "Alice")
+        np.testing.assert_array_equal(updated.timespent[:2], [3600, 7200])
+        self.assertEqual(table.status.names, ["Open"])
+        self.assertTrue(np.isnat(table.resolved[1]))
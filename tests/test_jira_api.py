@@ -0,0 +1,149 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import jira_api
+from storage import IssueStore
+from tests.test_storage import _issue
+
+
+def _fake_page(total, cap):
+    """Сымитировать постраничную выдачу Jira с ограничением maxResults."""
+    def get_page(params, start_at, max_results):
+        size = min(max_results, cap)
+        stop = min(start_at + size, total)
+        return {
+            "total": total,
+            "maxResults": size,
+            "issues": [{"key": f"T-{i}"} for i in range(start_at, stop)],
+        }
+    return get_page
+
+
+class TestSearchIssues(unittest.TestCase):
+    def test_fetches_all_pages_in_order(self):
+        """Все страницы загружаются, порядок задач сохраняется."""
+        with mock.patch.object(jira_api, "_get_page", side_effect=_fake_page(2500, 1000)) as get_page:
+            issues = jira_api.search_issues("project=T", "created")
+        self.assertEqual([issue["key"] for issue in issues], [f"T-{i}" for i in range(2500)])
+        self.assertEqual(get_page.call_count, 3)
+
+    def test_single_page(self):
+        """Если все задачи поместились в первую страницу, доп. запросов нет."""
+        with mock.patch.object(jira_api, "_get_page", side_effect=_fake_page(5, 1000)) as get_page:
+            issues = jira_api.search_issues("project=T", "created")
+        self.assertEqual(len(issues), 5)
+        self.assertEqual(get_page.call_count, 1)
+
+    def test_appends_stable_order(self):
+        """К запросу без сортировки добавляется ORDER BY key."""
+        with mock.patch.object(jira_api, "_get_page", side_effect=_fake_page(0, 1000)) as get_page:
+            jira_api.search_issues("project=T", "created")
+        self.assertEqual(get_page.call_args[0][0]["jql"], "project=T ORDER BY key")
+
+    def test_page_offsets_follow_server_limit(self):
+        """Следующие страницы идут с шагом maxResults из ответа, а не запрошенного размера."""
+        self.assertEqual(jira_api.page_offsets({"total": 250, "maxResults": 100}, 100),
+                         (100, range(100, 250, 100)))
+        self.assertEqual(list(jira_api.page_offsets({"total": 250, "maxResults": 100}, 100, 200)[1]), [])
+        self.assertEqual(list(jira_api.page_offsets({}, 0)[1]), [])
+        self.assertEqual(jira_api.search_params("project=T ORDER BY created", "key", "changelog"),
+                         {"jql": "project=T ORDER BY created", "fields": "key", "expand": "changelog"})
+
+
+class TestCountPushdown(unittest.TestCase):
+    def test_counts_priorities_by_total_only(self):
+        """Распределение по приоритетам считается по total запросов maxResults=0."""
+        totals = {"Blocker": 0, "Major": 120, "Minor": 7}
+
+        def get_json(url, params):
+            if url == jira_api.PRIORITY_URL:
+                return [{"name": name} for name in totals]
+            self.assertEqual(params["maxResults"], 0)
+            name = params["jql"].rsplit("priority = ", 1)[1].strip('"')
+            return {"total": totals[name], "issues": []}
+
+        with mock.patch.object(jira_api, "_get_json", side_effect=get_json) as get:
+            counts = jira_api.count_priorities("KAFKA")
+        self.assertEqual(counts, {"Major": 120, "Minor": 7})
+        self.assertEqual(get.call_count, 4)
+        self.assertIn('project = "KAFKA" AND status = "Closed" AND priority = "Major"',
+                      [call.args[1].get("jql") for call in get.call_args_list])
+
+
+class _Response:
+    def __init__(self, payload, chunk_size=7):
+        self.data = json.dumps(payload).encode("utf-8")
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), self.chunk_size):
+            yield self.data[i:i + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class TestSearchStream(unittest.TestCase):
+    def test_streams_all_pages_in_batches(self):
+        """Задачи всех страниц приходят порциями по batch_size в порядке выдачи."""
+        get_page = _fake_page(25, 10)
+        responses = []
+
+        def open_page(params, start_at, max_results):
+            responses.append(_Response(get_page(params, start_at, max_results)))
+            return responses[-1]
+
+        with mock.patch.object(jira_api, "_open_page", side_effect=open_page) as opened:
+            batches = list(jira_api.iter_search_stream("project=T", "created", page_size=100, batch_size=4))
+        self.assertEqual([issue["key"] for batch in batches for issue in batch], [f"T-{i}" for i in range(25)])
+        self.assertEqual(max(len(batch) for batch in batches), 4)
+        self.assertEqual(sorted(call.args[1:] for call in opened.call_args_list), [(0, 100), (10, 10), (20, 10)])
+        self.assertTrue(all(response.closed for response in responses))
+
+    def test_pages_are_requested_concurrently(self):
+        """Следующие страницы запрашиваются параллельно, не больше max_workers вперед."""
+        get_page = _fake_page(100, 10)
+        lock = threading.Lock()
+        active = [0, 0]  # Сейчас запрашивается, наибольшее одновременно
+
+        def open_page(params, start_at, max_results):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return _Response(get_page(params, start_at, max_results), chunk_size=4096)
+
+        with mock.patch.object(jira_api, "_open_page", side_effect=open_page):
+            batches = list(jira_api.iter_search_stream("project=T", "created", page_size=100, max_workers=4))
+        self.assertEqual([issue["key"] for batch in batches for issue in batch], [f"T-{i}" for i in range(100)])
+        self.assertEqual(active[1], 4)
+
+
+class TestLoadProjectTable(unittest.TestCase):
+    def test_first_load_builds_table_from_stream(self):
+        """Первая загрузка собирает таблицу из порций потока, не перечитывая хранилище."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = IssueStore(os.path.join(tmp.name, "issues.sqlite3"), sync_interval=0)
+        pages = [
+            [_issue("T-1", "2023-09-05T12:00:00.000+0000"), _issue("T-2", "2023-09-06T08:30:00.000+0000", "Open")],
+            [_issue("T-3", "2023-09-07T10:00:00.000+0000")],
+        ]
+        with mock.patch.object(jira_api, "get_store", return_value=store), \
+                mock.patch.object(jira_api, "_search_logged", side_effect=lambda *args: iter(pages)), \
+                mock.patch.object(store, "iter_records", wraps=store.iter_records) as iter_records:
+            table = jira_api.load_project_table("T", "closed")
+            iter_records.assert_not_called()
+            self.assertEqual(list(table.keys), ["T-1", "T-3"])
+            self.assertEqual([issue["key"] for issue in store.query("T")], ["T-1", "T-2", "T-3"])
+            # Следующая загрузка - синхронизация изменений и чтение из хранилища
+            self.assertEqual(list(jira_api.load_project_table("T").keys), ["T-1", "T-2", "T-3"])
+            iter_records.assert_called_once()
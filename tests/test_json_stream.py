@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from json_stream import JsonArrayStream
+
+PAGE = {
+    "startAt": 0,
+    "maxResults": 3,
+    "total": 3,
+    "issues": [{"key": f"T-{i}", "fields": {"summary": "задача " * i, "timespent": i * 1.5}} for i in range(3)],
+    "warnings": [],
+}
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJsonArrayStream(unittest.TestCase):
+    def test_items_and_meta_for_any_chunking(self):
+        """Элементы и ключи верхнего уровня не зависят от разбиения ответа (включая середину UTF-8 символа)."""
+        data = json.dumps(PAGE, ensure_ascii=False, indent=1).encode("utf-8")
+        for size in (1, 5, 64, len(data)):
+            with self.subTest(size=size):
+                stream = JsonArrayStream(_chunks(data, size), "issues")
+                self.assertEqual(list(stream), PAGE["issues"])
+                self.assertEqual(stream.meta, {key: value for key, value in PAGE.items() if key != "issues"})
+
+    def test_items_arrive_before_end_of_response(self):
+        """Элемент отдается, как только пришел целиком, а не после всего ответа."""
+        parts = [b'{"total": 12345, "issues": [{"key": "T-1"}', b', {"key": "T-2"}', b"]}"]
+        read = []
+
+        def chunks():
+            for part in parts:
+                read.append(part)
+                yield part
+
+        stream = iter(JsonArrayStream(chunks(), "issues"))
+        self.assertEqual(next(stream), {"key": "T-1"})
+        self.assertEqual(len(read), 1)
+
+    def test_truncated_response(self):
+        with self.assertRaises(ValueError):
+            list(JsonArrayStream([b'{"issues": [{"key": "T-1"}, {"ke'], "issues"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus_and_merge(self):
+        """Этапы и счетчики экспортируются в формат Prometheus и сводятся между процессами."""
+        main, worker = Metrics(), Metrics()
+        main.observe("render", 0.5, chart="priority")
+        worker.observe("render", 0.25, chart="priority")
+        worker.add("jira_requests", 3, status=200)
+        main.merge(worker.snapshot())
+
+        text = main.to_prometheus()
+        self.assertIn('jira_report_render_seconds_sum{chart="priority"} 0.750000', text)
+        self.assertIn('jira_report_render_seconds_count{chart="priority"} 2', text)
+        self.assertIn('jira_report_jira_requests_total{status="200"} 3', text)
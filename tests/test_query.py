@@ -0,0 +1,79 @@
+import unittest
+
+from dataset import ProjectDataset
+from query import Query, TableIndex, build_query, parse_args
+
+
+def _issue(key, created, resolved=None, status="Closed", priority="Major", assignee="Alice", reporter="Bob",
+           timespent=None):
+    return {
+        "key": key,
+        "fields": {
+            "created": f"{created}T12:00:00.000+0000",
+            "resolutiondate": f"{resolved}T12:00:00.000+0000" if resolved else None,
+            "status": {"name": status},
+            "priority": {"name": priority},
+            "assignee": {"displayName": assignee} if assignee else None,
+            "reporter": {"displayName": reporter} if reporter else None,
+            "timespent": timespent,
+        },
+    }
+
+
+ISSUES = [
+    _issue("T-1", "2024-01-01", "2024-01-03", timespent=3600),
+    _issue("T-2", "2024-01-02", "2024-01-12", priority="Blocker", timespent=7200),
+    _issue("T-3", "2024-01-08", status="Open", assignee=None),
+    _issue("T-4", "2024-02-05", "2024-02-06", priority="Blocker", assignee="Carol"),
+    _issue("T-5", "2024-02-20", status="Open", reporter="Alice"),
+]
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.dataset = ProjectDataset("T", ISSUES)
+
+    def test_group_by_time(self):
+        query = self.dataset.query()
+        self.assertEqual(query.group_by("month").run(), {"groups": ["2024-01", "2024-02"], "values": [3, 2]})
+        # Недели начинаются с понедельника: 2024-01-01 - понедельник
+        self.assertEqual(query.group_by("week").run()["groups"][:2], ["2024-01-01", "2024-01-08"])
+        resolved = query.window("resolved", "2024-01-01", "2024-01-31").group_by("day").run()
+        self.assertEqual(resolved["groups"], ["2024-01-03", "2024-01-12"])
+
+    def test_filter_window_and_aggregates(self):
+        query = self.dataset.query().where(status="closed")
+        self.assertEqual(query.run(), {"groups": ["all"], "values": [3]})
+        self.assertEqual(query.aggregate("mean", "open_days").group_by("priority").run(),
+                         {"groups": ["Major", "Blocker"], "values": [2.0, 5.5]})
+        self.assertEqual(query.window("created", until="2024-01-31").aggregate("p50", "timespent_hours").run(),
+                         {"groups": ["all"], "values": [1.5]})
+        self.assertEqual(self.dataset.query().where(user="alice").run()["values"], [3])
+        self.assertEqual(self.dataset.query().where(priority="Trivial").run()["values"], [0])
+
+    def test_top_users(self):
+        """Пользователи считаются и как исполнители, и как репортеры; top - по убыванию."""
+        result = self.dataset.query().group_by("user").top(2).run()
+        self.assertEqual(result, {"groups": ["Alice", "Bob"], "values": [4, 4]})
+
+    def test_index_built_once(self):
+        index = TableIndex(self.dataset.table)
+        Query(index).where(status="Open").window("created", "2024-01-05").run()
+        sorted_created, postings = index._sorted["created"], index._postings["status"]
+        Query(index).where(status="Closed").window("created", "2024-02-01").run()
+        self.assertIs(index._sorted["created"], sorted_created)
+        self.assertIs(index._postings["status"], postings)
+
+    def test_command_line(self):
+        args = parse_args(["T", "--where", "status=Closed,Open", "--window", "created:2024-01-01:2024-01-31",
+                           "--group-by", "priority", "--agg", "count", "--top", "1"])
+        self.assertEqual(build_query(self.dataset.query(), args).run(), {"groups": ["Major"], "values": [2]})
+        with self.assertRaises(ValueError):
+            build_query(self.dataset.query(), parse_args(["T", "--agg", "mean"]))
+        with self.assertRaises(ValueError):
+            build_query(self.dataset.query(), parse_args(["T", "--agg", "p150:open_days"]))
+        self.assertEqual(build_query(self.dataset.query(), parse_args(["T", "--agg", "p100:open_days"])).agg, "p100")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import server
+import utils
+from dataset import ProjectDataset
+from tests.test_changelog import ISSUES
+
+
+class TestChartServer(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+
+        def loader(project_key):
+            self.loads += 1
+            return ProjectDataset(project_key, ISSUES)
+
+        self.service = server.ChartService(loader=loader)
+        self.server = server.make_server(port=0, service=self.service)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}/projects/test/charts"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get(self, path, headers=None):
+        request = urllib.request.Request(self.base + path, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_concurrent_viewers_share_one_load_and_render(self):
+        """Одновременные запросы одного графика - одна загрузка и одна отрисовка; ETag дает 304."""
+        with mock.patch.object(server, "render_chart_images", wraps=server.render_chart_images) as render:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                responses = list(pool.map(lambda _: self._get("/priority.png"), range(16)))
+        self.assertEqual({status for status, _, _ in responses}, {200})
+        self.assertTrue(all(body.startswith(b"\x89PNG") for _, _, body in responses))
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(render.call_count, 1)
+
+        etag = responses[0][1]["ETag"]
+        status, _, body = self._get("/priority.png", {"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+
+    def test_chart_variants_render_in_memory(self):
+        """Варианты одного графика с разными параметрами не делят файл в results/."""
+        resolved = {"key": "T-3", "fields": {"created": "2023-09-01T00:00:00.000+0000",
+                                             "resolutiondate": "2023-09-03T00:00:00.000+0000",
+                                             "status": {"name": "Resolved"}}, "changelog": {"histories": []}}
+        self.service.loader = lambda project_key: ProjectDataset(project_key, ISSUES + [resolved])
+        results = tempfile.TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        with mock.patch.object(utils, "RESULTS_DIR", results.name), ThreadPoolExecutor(max_workers=2) as pool:
+            responses = list(pool.map(self._get, ["/open_state.png?status=Closed", "/open_state.png?status=Resolved"]))
+        self.assertEqual([status for status, _, _ in responses], [200, 200])
+        for (_, _, body), status in zip(responses, ["Closed", "Resolved"]):
+            aggregate, _ = self.service.aggregate("TEST", "open_state", status)
+            self.assertEqual(body, server.render_chart_images("open_state", aggregate, "TEST")[0])
+        self.assertNotEqual(responses[0][2], responses[1][2])
+        self.assertEqual(os.listdir(results.name), [])
+
+    def test_json_and_errors(self):
+        """JSON-вариант отдает агрегат; неизвестный график - 404."""
+        status, headers, body = self._get("/priority.json")
+        self.assertEqual(status, 200)
+        self.assertIn("priorities", json.loads(body))
+        self.assertTrue(headers["ETag"].endswith('-json-0"'))
+        self.assertEqual(self._get("/bogus.png")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
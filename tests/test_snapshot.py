@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import dataset
+import main
+from dataset import ProjectDataset
+from snapshot import load_snapshot, save_snapshot, snapshot_path
+from tasks import CHARTS
+from tests.test_changelog import ISSUES
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(dataset.set_snapshot_dir, None)
+        self.original = ProjectDataset("T", ISSUES)
+        self.path = save_snapshot(self.original, snapshot_path(self.tmp.name, "t"))
+
+    def test_round_trip_gives_same_aggregates(self):
+        """Агрегаты всех графиков по снимку совпадают с агрегатами исходного набора."""
+        restored = load_snapshot(self.path)
+        self.assertEqual(restored.project_key, "T")
+        self.assertEqual(restored.loaded_at, self.original.loaded_at)
+        for chart, (aggregate, _) in CHARTS.items():
+            with self.subTest(chart=chart):
+                self.assertEqual(aggregate(restored.chart_view(chart, daily_days=None)),
+                                 aggregate(self.original.chart_view(chart, daily_days=None)))
+
+    def test_columns_are_memory_mapped(self):
+        restored = load_snapshot(self.path)
+        self.assertIsInstance(restored.table.created, np.memmap)
+        self.assertIsInstance(restored.intervals.enter, np.memmap)
+        self.assertNotIsInstance(load_snapshot(self.path, mmap=False).table.created, np.memmap)
+
+    def test_snapshot_dir_replaces_jira(self):
+        dataset.set_snapshot_dir(self.tmp.name)
+        self.assertEqual(list(dataset.get_dataset("t").table.keys), list(self.original.table.keys))
+        with self.assertRaises(FileNotFoundError):
+            dataset.get_dataset("OTHER")
+        self.assertTrue(os.path.exists(os.path.join(self.path, "meta.json")))
+
+    def test_export_skips_failed_projects(self):
+        """Проекты с ошибками не загружаются повторно, сбой сохранения попадает в итоги."""
+        def get_dataset(project_key):
+            if project_key == "ZZZ":
+                raise RuntimeError("проект не найден")
+            return self.original
+
+        report = {
+            "T": {"errors": []},
+            "FAILED": {"errors": ["синхронизация: HTTPError"]},
+            "ZZZ": {"errors": []},
+        }
+        with mock.patch.object(main, "get_dataset", side_effect=get_dataset) as loader, \
+                mock.patch("builtins.print"):
+            main.export_snapshots(report, self.tmp.name)
+        self.assertEqual([call.args[0] for call in loader.call_args_list], ["T", "ZZZ"])
+        self.assertTrue(os.path.exists(os.path.join(snapshot_path(self.tmp.name, "T"), "meta.json")))
+        self.assertEqual(report["ZZZ"]["errors"], ["снимок: RuntimeError: проект не найден"])
+        self.assertEqual(report["FAILED"]["errors"], ["синхронизация: HTTPError"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from export import aggregate_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, загрузка которых заметно замедляет запуск: нужны только при отрисовке и асинхронной загрузке
+HEAVY_MODULES = ("matplotlib", "PIL", "aiohttp")
+
+
+class TestStartup(unittest.TestCase):
+    def test_no_matplotlib_on_import(self):
+        """Импорт основных модулей не загружает matplotlib и не настраивает логирование."""
+        code = ("import sys, logging, main, batch, tasks\n"
+                "print('matplotlib' in sys.modules, len(logging.getLogger().handlers))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ["False", "0"])
+
+    def test_help_skips_heavy_imports(self):
+        """`main.py --help` не загружает модули отрисовки и асинхронного клиента."""
+        code = ("import sys, runpy\n"
+                "sys.argv = ['main.py', '--help']\n"
+                "try:\n"
+                "    runpy.run_path('main.py', run_name='__main__')\n"
+                "except SystemExit as e:\n"
+                "    assert not e.code, e.code\n"
+                f"print(*sorted(set({HEAVY_MODULES!r}) & {{name.split('.')[0] for name in sys.modules}}))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        self.assertIn("usage:", result.stdout)
+        self.assertEqual(result.stdout.splitlines()[-1], "")
+
+
+class TestExport(unittest.TestCase):
+    def test_aggregate_tables(self):
+        """Агрегаты графиков превращаются в таблицы для CSV."""
+        header, rows = aggregate_table({"edges": [0, 10, 20], "counts": [3, 1], "percentiles": {"p50": 4.0}})
+        self.assertEqual((header, rows), (["bin_start", "bin_end", "count"], [(0, 10, 3), (10, 20, 1)]))
+        header, rows = aggregate_table({"Open": {"edges": [1, 2], "counts": [5]}})
+        self.assertEqual((header, rows), (["status", "bin_start", "bin_end", "count"], [("Open", 1, 2, 5)]))
+        header, rows = aggregate_table({"priorities": ["Major", "Minor"], "counts": [2, 1]})
+        self.assertEqual((header, rows), (["priorities", "counts"], [("Major", 2), ("Minor", 1)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
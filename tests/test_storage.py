@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from storage import CHANGE_FIELDS, IssueStore
+
+
+def _issue(key, updated, status="Closed", resolved="2023-09-05T12:00:00.000+0000"):
+    return {
+        "key": key,
+        "id": key.split("-")[1],
+        "fields": {
+            "created": "2023-09-01T12:00:00.000+0000",
+            "updated": updated,
+            "resolutiondate": resolved,
+            "status": {"name": status},
+            "priority": {"name": "Major"},
+            "assignee": {"displayName": "Alice"},
+            "reporter": None,
+            "timespent": 3600,
+        },
+    }
+
+
+class TestIssueStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = IssueStore(os.path.join(self.tmp.name, "issues.sqlite3"), sync_interval=0)
+        self.requests = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fetch(self, responses):
+        def fetch(jql, fields, expand=None):
+            # Ответ отдается страницами по одной задаче, как при потоковой загрузке
+            self.requests.append(jql)
+            return ([issue] for issue in responses.pop(0))
+        return fetch
+
+    def test_full_then_delta_sync(self):
+        """Первая синхронизация полная, следующая запрашивает только изменения."""
+        fetch = self._fetch([
+            [_issue("T-1", "2023-09-05T12:00:00.000+0000"), _issue("T-2", "2023-09-06T08:30:00.000+0000")],
+            [_issue("T-2", "2023-09-07T10:00:00.000+0000", status="Open")],
+        ])
+        self.store.sync("t", fetch)
+        self.store.sync("T", fetch)
+
+        self.assertEqual(self.requests[0], 'project="T"')
+        self.assertEqual(self.requests[1], 'project="T" AND updated >= "2023/09/06 08:30"')
+        closed = self.store.query("T", "status = ?", ("Closed",))
+        self.assertEqual([issue["key"] for issue in closed], ["T-1"])
+        self.assertEqual(closed[0]["fields"]["assignee"], {"displayName": "Alice"})
+        self.assertIsNone(closed[0]["fields"]["reporter"])
+
+    def test_sync_interval_skips_requests(self):
+        """Повторная синхронизация в пределах интервала не обращается к Jira."""
+        store = IssueStore(os.path.join(self.tmp.name, "other.sqlite3"), sync_interval=3600)
+        fetch = self._fetch([[_issue("T-1", "2023-09-05T12:00:00.000+0000")]])
+        store.sync("T", fetch)
+        self.assertEqual(store.sync("T", fetch), 0)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_iter_records_pages(self):
+        """Задачи читаются страницами компактных записей."""
+        fetch = self._fetch([[_issue(f"T-{i}", "2023-09-05T12:00:00.000+0000") for i in range(5)]])
+        self.store.sync("T", fetch)
+        pages = list(self.store.iter_records("T", batch_size=2))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual((pages[0][0].key, pages[0][0].assignee, pages[0][0].timespent), ("T-0", "Alice", 3600))
+
+    def test_daily_rollup_incremental(self):
+        """Дневные итоги обновляются при синхронизации: прежний вклад задачи вычитается."""
+        fetch = self._fetch([
+            [_issue("T-1", "2023-09-05T12:00:00.000+0000"), _issue("T-2", "2023-09-06T08:30:00.000+0000")],
+            [_issue("T-2", "2023-09-07T10:00:00.000+0000", status="Open", resolved=None)],
+        ])
+        self.store.sync("T", fetch)
+        self.store.sync("T", fetch)
+
+        rollup = self.store.daily_rollup("T")
+        self.assertEqual([str(day) for day in rollup.days[[0, -1]]], ["2023-09-01", "2023-09-05"])
+        self.assertEqual((rollup.created.sum(), rollup.resolved.sum()), (2, 1))
+        self.assertEqual(rollup.backlog[-1], 1)
+        window = self.store.daily_rollup("T", since="2023-09-03", statuses=["closed"])
+        self.assertEqual((window.created_before, len(window), window.backlog[-1]), (1, 3, 0))
+
+    def test_interrupted_load_is_repeated(self):
+        """Сохраненные до сбоя страницы не считаются синхронизацией: следующая загрузка снова полная."""
+        def failing(jql, fields, expand=None):
+            self.requests.append(jql)
+            yield [_issue("T-1", "2023-09-05T12:00:00.000+0000")]
+            raise ConnectionError("обрыв соединения")
+
+        with self.assertRaises(ConnectionError):
+            self.store.sync("T", failing)
+        self.assertEqual(self.store.plan_sync("T"), ('project="T"', True))
+        self.store.sync("T", self._fetch([[_issue("T-1", "2023-09-05T12:00:00.000+0000"),
+                                           _issue("T-2", "2023-09-06T08:30:00.000+0000")]]))
+        self.assertEqual([issue["key"] for issue in self.store.query("T")], ["T-1", "T-2"])
+        self.assertEqual(self.store.daily_rollup("T").created.sum(), 2)
+
+    def test_sync_writer_tracks_latest_update(self):
+        """Последняя дата изменения ищется по всем страницам с учетом часового пояса."""
+        writer = self.store.begin_sync("T", True)
+        writer.add([_issue("T-1", "2023-09-06T10:00:00.000+0300"), _issue("T-2", "2023-09-06T08:30:00.000+0000")])
+        writer.add([_issue("T-3", "2023-09-06T09:00:00.000+0200"), _issue("T-4", None)])
+        writer.finish()
+        self.assertEqual(self.store.plan_sync("T", force=True), ('project="T" AND updated >= "2023/09/06 08:30"', False))
+        with self.store._connect() as conn:
+            created_ms = conn.execute("SELECT created_ms FROM issues WHERE key = 'T-1'").fetchone()[0]
+        self.assertEqual(created_ms, 1693569600000)  # 2023-09-01T12:00:00Z
+
+    def test_apply_sync_reports_changed_fields(self):
+        """Синхронизация сообщает, какие поля изменились у полученных задач."""
+        first = [_issue("T-1", "2023-09-05T12:00:00.000+0000"), _issue("T-2", "2023-09-06T08:30:00.000+0000")]
+        self.assertIn("priority", self.store.apply_sync("T", first, True))
+        self.assertEqual(self.store.apply_sync("T", [first[1]], False), set())
+        changed = _issue("T-2", "2023-09-07T10:00:00.000+0000")
+        changed["fields"]["priority"] = {"name": "Blocker"}
+        self.assertEqual(self.store.apply_sync("T", [changed], False), {"priority"})
+        self.assertEqual(len(self.store.apply_sync("T", [_issue("T-3", "2023-09-08T10:00:00.000+0000")], False)),
+                         len(CHANGE_FIELDS))
@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import jira_api
+from benchmarks.synthetic import generate_issues
+from streaming import DurationSummary, FixedHistogram, QuantileSketch, fold, time_spent_summary
+from tasks import aggregate_time_spent
+
+
+class TestStreaming(unittest.TestCase):
+    def test_sketch_accuracy_and_merge(self):
+        """Перцентили скетча в пределах относительной погрешности; сумма частей равна целому."""
+        values = np.random.default_rng(1).lognormal(3, 1.5, 100000)
+        left, right = QuantileSketch().add(values[:30000]), QuantileSketch().add(values[30000:])
+        merged = left.merge(right)
+        self.assertEqual(merged.count, values.size)
+        for p in (50, 90, 99):
+            exact = np.percentile(values, p)
+            self.assertLess(abs(merged.quantile(p / 100) - exact) / exact, 0.02)
+        self.assertEqual(merged.buckets, QuantileSketch().add(values).buckets)
+
+    def test_histogram_merge_and_coarsen(self):
+        """Гистограммы с одной сеткой складываются, корзины укрупняются без потери точности границ."""
+        histogram = FixedHistogram(1).add([1, 2.5, 7]).merge(FixedHistogram(1).add([40]))
+        aggregate = histogram.to_aggregate(max_bins=4)
+        self.assertEqual(aggregate["edges"], [1, 11, 21, 31, 41])
+        self.assertEqual(aggregate["counts"], [3, 0, 0, 1])
+        with self.assertRaises(ValueError):
+            histogram.merge(FixedHistogram(2))
+
+    def test_pages_fold_to_same_aggregate(self):
+        """Сводка, собранная по страницам поиска, совпадает с расчетом по всем задачам."""
+        issues = generate_issues(2500, seed=3, with_changelog=False)
+
+        def get_page(params, start_at, max_results):
+            return {"total": len(issues), "maxResults": 1000, "issues": issues[start_at:start_at + 1000]}
+
+        with mock.patch.object(jira_api, "_get_page", side_effect=get_page):
+            pages = jira_api.iter_search_pages("project=BENCH", "timespent")
+            summary = fold(pages, time_spent_summary)
+        self.assertIsInstance(summary, DurationSummary)
+        self.assertEqual(aggregate_time_spent(summary), aggregate_time_spent(issues))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import tasks as task_aggregates
 from tasks import task_build_open_state_histogram
 
 class TestTaskBuildOpenStateHistogram(unittest.TestCase):
@@ -13,3 +14,64 @@ class TestTaskBuildOpenStateHistogram(unittest.TestCase):
             {"fields": {"created": "2023-08-15T12:00:00.000+0000", "resolutiondate": "2023-08-20T12:00:00.000+0000"}},
         ]
         self.assertIsNone(task_build_open_state_histogram(issues, "TEST"))
+
+
+class TestAggregates(unittest.TestCase):
+    issues = [
+        {"key": "T-1", "fields": {"created": "2023-09-01T12:00:00.000+0000", "resolutiondate": "2023-09-05T12:00:00.000+0000",
+                                  "priority": {"name": "Major"}, "timespent": 7200,
+                                  "assignee": {"displayName": "Alice"}, "reporter": {"displayName": "Bob"}}},
+        {"key": "T-2", "fields": {"created": "2023-08-15T12:00:00.000+0000", "resolutiondate": "2023-08-30T11:00:00.000+0000",
+                                  "priority": {"name": "Minor"}, "timespent": None,
+                                  "assignee": {"displayName": "Bob"}, "reporter": {"displayName": "Bob"}}},
+        {"key": "T-3", "fields": {"created": "2023-09-03T00:00:00.000+0000", "resolutiondate": None,
+                                  "priority": {"name": "Major"}, "timespent": 3600,
+                                  "assignee": None, "reporter": {"displayName": "Alice"}}},
+    ]
+
+    def test_open_state(self):
+        """Время в открытом состоянии считается в целых днях, корзины по 10 дней."""
+        aggregate = task_aggregates.aggregate_open_state(self.issues)
+        self.assertEqual(aggregate["edges"], [0, 10, 20])
+        self.assertEqual(aggregate["counts"], [1, 1])
+
+    def test_daily(self):
+        """Ежедневные ряды и накопленные итоги покрывают весь диапазон дат."""
+        aggregate = task_aggregates.aggregate_daily_tasks(self.issues)
+        self.assertEqual(aggregate["dates"][0], "2023-08-15")
+        self.assertEqual(aggregate["dates"][-1], "2023-09-05")
+        self.assertEqual(aggregate["cumulative_created"][-1], 3)
+        self.assertEqual(aggregate["cumulative_closed"][-1], 2)
+
+    def test_users_and_priorities(self):
+        """Пользователи и приоритеты считаются по категориальным кодам."""
+        users = task_aggregates.aggregate_user_tasks(self.issues)
+        self.assertEqual(users, {"users": ["Bob", "Alice"], "counts": [3, 2]})
+        priorities = task_aggregates.aggregate_priorities(self.issues)
+        self.assertEqual(priorities, {"priorities": ["Major", "Minor"], "counts": [2, 1]})
+
+    def test_time_spent(self):
+        """Пустое время выполнения пропускается, корзины по часу от первой непустой."""
+        aggregate = task_aggregates.aggregate_time_spent(self.issues)
+        self.assertEqual(aggregate["counts"], [1, 1])
+        self.assertEqual(aggregate["edges"], [1.0, 2.0, 3.0])
+        self.assertEqual(sorted(aggregate["percentiles"]), ["p50", "p90", "p99"])
+
+    def test_status_times_from_records(self):
+        """Записи IssueRecord считаются вместе с переходами из хранилища, без них - понятная ошибка."""
+        from changelog import extract_status_transitions
+        from issue_table import IssueRecord, parse_jira_dates
+        from tests.test_changelog import ISSUES
+
+        positions, times, from_statuses, to_statuses = extract_status_transitions(ISSUES)
+        transitions = (
+            [ISSUES[position]["key"] for position in positions],
+            parse_jira_dates(times).astype("int64"),
+            from_statuses,
+            to_statuses,
+        )
+        records = [IssueRecord.from_issue(issue) for issue in ISSUES]
+        self.assertEqual(task_aggregates.aggregate_status_times(records, transitions),
+                         task_aggregates.aggregate_status_times(ISSUES))
+        with self.assertRaises(TypeError):
+            task_aggregates.aggregate_status_times(records)
@@ -0,0 +1,50 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from utils import setup_logging, shutdown_logging
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        shutdown_logging()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        shutdown_logging()
+        self.tmp.cleanup()
+        setup_logging()
+
+    def test_idempotent_utf8_and_json(self):
+        """Повторная настройка не дублирует строки; файлы в UTF-8, JSON-лог по строкам."""
+        log = setup_logging(self.tmp.name, level="DEBUG", console_level=None, json_lines=True)
+        self.assertIs(setup_logging(self.tmp.name), log)
+        log("INFO", "Задача построена")
+        log("ERROR", "Ошибка построения")
+        logging.getLogger("jira_api").debug("отладка модуля")
+        logging.getLogger("matplotlib.font_manager").debug("поиск шрифтов")
+        shutdown_logging()
+
+        def read(name):
+            with open(os.path.join(self.tmp.name, name), encoding="utf-8") as f:
+                return f.read()
+
+        self.assertEqual(read("info.log").count("Задача построена"), 1)
+        self.assertNotIn("отладка модуля", read("info.log"))
+        self.assertIn("отладка модуля", read("debug.log"))
+        self.assertNotIn("поиск шрифтов", read("debug.log"))
+        self.assertEqual(read("error.log").count("\n"), 1)
+        entries = [json.loads(line) for line in read("log.jsonl").splitlines()]
+        self.assertEqual([entry["level"] for entry in entries], ["INFO", "ERROR", "DEBUG"])
+        self.assertEqual(entries[0]["message"], "Задача построена")
+
+    def test_default_level_is_info(self):
+        setup_logging(self.tmp.name, console_level=None)
+        self.assertEqual(logging.getLogger().level, logging.INFO)
+        self.assertEqual(logging.getLogger("urllib3").level, logging.WARNING)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dataset import ProjectDataset
+from storage import IssueStore
+from tests.test_storage import _issue
+import watch
+from watch import ChartWatcher, PollScheduler, dirty_charts
+
+
+class TestPollScheduler(unittest.TestCase):
+    def test_polls_are_staggered(self):
+        """Первые опросы проектов равномерно распределены по интервалу."""
+        scheduler = PollScheduler(["A", "B", "C", "D"], 60, now=100)
+        self.assertEqual([scheduler.pop() for _ in range(4)], [(100, "A"), (115, "B"), (130, "C"), (145, "D")])
+
+    def test_reschedule_keeps_cadence(self):
+        scheduler = PollScheduler(["A"], 60)
+        due, project = scheduler.pop()
+        scheduler.reschedule(project, due, now=5)
+        self.assertEqual(scheduler.pop(), (60, "A"))
+        scheduler.reschedule("A", 60, now=500)  # Опрос сильно опоздал: без серии опросов подряд
+        self.assertEqual(scheduler.pop(), (500, "A"))
+
+
+class TestChartWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = IssueStore(os.path.join(self.tmp.name, "issues.sqlite3"), sync_interval=0)
+        self.responses = []
+        self.loads = []
+        self.watcher = ChartWatcher(
+            ["T"], ["priority", "users", "status", "time_spent"], output_format="json", store=self.store,
+            fetch=lambda jql, fields, expand=None: [self.responses.pop(0)],
+            loader=self._load,
+        )
+
+    def _load(self, project_key):
+        self.loads.append(project_key)
+        return ProjectDataset(project_key, self.store.query(project_key))
+
+    def test_dirty_charts_by_field(self):
+        self.assertEqual(dirty_charts({"priority"}, ["priority", "users", "status"]), ["priority"])
+        self.assertEqual(dirty_charts({"status"}, ["priority", "users", "status"]), ["priority", "status"])
+        self.assertEqual(dirty_charts({"resolutiondate"}, ["status_time", "users"]), ["status_time"])
+        self.assertEqual(dirty_charts({"created"}, ["status_time", "priority"]), ["status_time"])
+
+    def test_only_affected_charts_rerendered(self):
+        """Первый опрос строит все графики, дальше - только зависящие от изменившихся полей."""
+        self.responses = [
+            [_issue("T-1", "2023-09-05T12:00:00.000+0000"), _issue("T-2", "2023-09-06T08:30:00.000+0000")],
+            [_issue("T-2", "2023-09-06T08:30:00.000+0000")],
+            [_issue("T-2", "2023-09-07T10:00:00.000+0000")],
+        ]
+        self.responses[2][0]["fields"]["priority"] = {"name": "Blocker"}
+        with mock.patch.object(watch, "write_aggregate") as write:
+            self.assertEqual(self.watcher.poll("T"), ["priority", "status", "time_spent", "users"])
+            self.assertEqual(self.watcher.poll("T"), [])
+            self.assertEqual(self.watcher.poll("T"), ["priority"])
+        self.assertEqual(write.call_args[0][:2], ("T", "priority"))
+        self.assertEqual(write.call_args[0][2], {"priorities": ["Major", "Blocker"], "counts": [1, 1]})
+        self.assertEqual(write.call_count, 5)
+        # Набор загружен один раз, изменения попали в него построчно
+        self.assertEqual(self.loads, ["T"])
+        self.assertEqual(len(self.watcher.datasets["T"].table), 2)
+
+    def test_failed_chart_stays_dirty(self):
+        self.responses = [[_issue("T-1", "2023-09-05T12:00:00.000+0000")], []]
+        with mock.patch.object(watch, "write_aggregate", side_effect=OSError("disk full")):
+            self.assertEqual(self.watcher.poll("T"), [])
+        with mock.patch.object(watch, "write_aggregate"):
+            self.assertEqual(len(self.watcher.poll("T")), 4)
+
+    def test_run_sleeps_until_due(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        with mock.patch.object(self.watcher, "poll") as poll:
+            polls = self.watcher.run(interval=30, max_polls=3, clock=lambda: now[0], sleep=sleep)
+        self.assertEqual((polls, poll.call_count, sleeps), (3, 3, [30, 30]))
+
+
+if __name__ == "__main__":
+    unittest.main()
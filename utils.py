@@ -1,55 +1,222 @@
+import atexit
+import io
+import json
 import os
 import logging
+import logging.handlers
+import queue
+import threading
+from contextlib import contextmanager
 from colorama import Fore, Style
-import matplotlib
 
-# Используем бэкенд для headless-режима
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+RESULTS_DIR = "results"  # Папка графиков и выгрузок по умолчанию
+LOG_DIR = "logs"  # Папка файлов логов по умолчанию
+REPORT_LOGGER = "report"  # Сообщения отчета, которые также выводятся в консоль
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+LOG_COLORS = {
+    logging.DEBUG: Fore.CYAN,
+    logging.INFO: Fore.GREEN,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+}
+# Файлы логов и минимальный уровень каждого
+LOG_SINKS = {
+    "debug.log": logging.DEBUG,
+    "info.log": logging.INFO,
+    "error.log": logging.ERROR,
+}
 
+# Сторонние библиотеки, отладочный вывод которых не нужен даже при --log-level DEBUG
+QUIET_LOGGERS = ("matplotlib", "urllib3", "PIL")
+
+_logging_lock = threading.Lock()
+_logging = None  # (QueueHandler, QueueListener, функция log) после настройки
+
+
+class ColorFormatter(logging.Formatter):
+    """Цветной вывод сообщения в консоль."""
+
+    def format(self, record):
+        color = LOG_COLORS.get(record.levelno, "")
+        return color + record.getMessage() + Style.RESET_ALL
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
 
-def setup_logging(log_dir="logs"):
-    """Настроить логирование с разными уровнями и цветами."""
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
 
-    log_format = "%(asctime)s [%(levelname)s]: %(message)s"
-    formatter = logging.Formatter(log_format)
+def _console_filter(record):
+    """В консоль попадают сообщения отчета и предупреждения остальных модулей."""
+    return record.name == REPORT_LOGGER or record.levelno >= logging.WARNING
 
-    log_levels = {
-        "DEBUG": {"filename": "debug.log", "level": logging.DEBUG, "color": Fore.CYAN},
-        "INFO": {"filename": "info.log", "level": logging.INFO, "color": Fore.GREEN},
-        "ERROR": {"filename": "error.log", "level": logging.ERROR, "color": Fore.RED},
-    }
 
-    loggers = {}
+def _level(value):
+    return value if isinstance(value, int) else logging.getLevelName(str(value).upper())
 
-    for level_name, config in log_levels.items():
-        handler = logging.FileHandler(os.path.join(log_dir, config["filename"]))
+
+def _build_handlers(log_dir, console_level, json_lines):
+    """Обработчики вывода: по одному на каждый файл, JSON-лог и консоль."""
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    for filename, level in LOG_SINKS.items():
+        handler = logging.FileHandler(os.path.join(log_dir, filename), encoding="utf-8")
+        handler.setLevel(level)
         handler.setFormatter(formatter)
-        logger = logging.getLogger(level_name)
-        logger.setLevel(config["level"])
-        logger.addHandler(handler)
-        loggers[level_name] = logger
+        handlers.append(handler)
+    if json_lines:
+        handler = logging.FileHandler(os.path.join(log_dir, "log.jsonl"), encoding="utf-8")
+        handler.setFormatter(JsonFormatter())
+        handlers.append(handler)
+    if console_level is not None:
+        handler = logging.StreamHandler()
+        handler.setLevel(_level(console_level))
+        handler.addFilter(_console_filter)
+        handler.setFormatter(ColorFormatter())
+        handlers.append(handler)
+    return handlers
+
+
+def _log_function():
+    logger = logging.getLogger(REPORT_LOGGER)
 
     def log_with_color(level_name, message):
-        """Логировать сообщение с цветом и записью в файл."""
-        if level_name in log_levels:
-            colored_message = log_levels[level_name]["color"] + message + Style.RESET_ALL
-            print(colored_message)
-            loggers[level_name].log(log_levels[level_name]["level"], message)
+        """Записать сообщение отчета; вывод выполняет поток логирования."""
+        logger.log(_level(level_name), message)
 
     return log_with_color
 
 
-def save_plot(filename, project_key, results_dir="results"):
-    """Сохранить график в папку результатов."""
+def setup_logging(log_dir=None, level=None, console_level="INFO", json_lines=None):
+    """
+    Настроить логирование (повторные вызовы возвращают уже настроенное).
+    Сообщения всех модулей кладутся в очередь, а запись в файлы и консоль
+    выполняет отдельный поток, поэтому рабочие потоки не ждут ввода-вывода.
+    :param log_dir: Папка файлов логов (debug.log, info.log, error.log, UTF-8; по умолчанию LOG_DIR).
+    :param level: Минимальный уровень сообщений (по умолчанию LOG_LEVEL или INFO);
+        библиотеки из QUIET_LOGGERS пишут только предупреждения и ошибки.
+    :param console_level: Минимальный уровень вывода в консоль (None - без консоли).
+    :param json_lines: Дополнительно писать log.jsonl (по умолчанию LOG_JSON=1).
+    :return: Функция log(level_name, message).
+    """
+    global _logging
+    with _logging_lock:
+        if _logging is not None:
+            return _logging[2]
+        if level is None:
+            level = os.environ.get("LOG_LEVEL", "INFO")
+        if json_lines is None:
+            json_lines = os.environ.get("LOG_JSON", "") not in ("", "0")
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(
+            log_queue, *_build_handlers(log_dir or LOG_DIR, console_level, json_lines), respect_handler_level=True
+        )
+        listener.start()
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(_level(level))
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+        _logging = queue_handler, listener, _log_function()
+        return _logging[2]
+
+
+def shutdown_logging():
+    """Дописать очередь, закрыть файлы и снять настройку логирования."""
+    global _logging
+    with _logging_lock:
+        if _logging is None:
+            return
+        queue_handler, listener, _ = _logging
+        logging.getLogger().removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        _logging = None
+
+
+def _after_fork():
+    # Поток записи не переживает fork: дочерний процесс заводит свою очередь
+    global _logging, _logging_lock
+    _logging_lock = threading.Lock()
+    if _logging is not None:
+        queue_handler, listener, log = _logging
+        log_queue = queue.SimpleQueue()
+        queue_handler.queue = log_queue
+        listener = logging.handlers.QueueListener(log_queue, *listener.handlers, respect_handler_level=True)
+        listener.start()
+        _logging = queue_handler, listener, log
+        # Рабочие процессы завершаются через os._exit, минуя atexit
+        import multiprocessing.util
+        multiprocessing.util.Finalize(None, shutdown_logging, exitpriority=0)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def pyplot():
+    """
+    Получить matplotlib.pyplot, импортируя его при первой отрисовке.
+    Запуски без графиков (--help, --format json/csv) не платят за импорт matplotlib.
+    """
+    import matplotlib
+
+    # Используем бэкенд для headless-режима
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+_plots = threading.local()  # in_memory: save_plot возвращает PNG, а не путь к файлу
+
+
+@contextmanager
+def plots_in_memory():
+    """Внутри блока save_plot текущего потока отдает байты PNG и ничего не пишет в папку результатов."""
+    _plots.in_memory = True
+    try:
+        yield
+    finally:
+        _plots.in_memory = False
+
+
+def save_plot(filename, project_key, results_dir=None):
+    """
+    Сохранить график в папку результатов (по умолчанию RESULTS_DIR).
+    :return: Путь к файлу, внутри plots_in_memory() - байты PNG.
+    """
+    plt = pyplot()
+    if getattr(_plots, "in_memory", False):
+        buffer = io.BytesIO()
+        plt.savefig(buffer, format="png")
+        plt.close()
+        return buffer.getvalue()
+    results_dir = results_dir or RESULTS_DIR
     if not os.path.exists(results_dir):
         os.makedirs(results_dir)
     filepath = os.path.join(results_dir, f"{project_key}_{filename}.png")
     plt.savefig(filepath)
     plt.close()  # Освобождаем память после сохранения графика
     print(Fore.GREEN + f"График сохранен: {filepath}" + Style.RESET_ALL)
+    return filepath
 
 
 def get_user_input(prompt):
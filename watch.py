@@ -0,0 +1,207 @@
+"""
+Режим наблюдения: графики в results/ обновляются по мере изменений в Jira.
+
+    python main.py --watch --projects KAFKA,HADOOP --charts all --interval 300
+
+Каждый проект опрашивается раз в interval секунд (опросы разных проектов
+равномерно сдвинуты), из Jira приходят только задачи, измененные с прошлого
+опроса. По изменившимся полям определяется, какие графики устарели:
+например, смена приоритета перестраивает только график приоритетов.
+Набор задач проекта загружается один раз, дальше в нем заменяются только строки
+изменившихся задач; переходы статусов и дневные итоги перечитываются из хранилища,
+только когда устарели графики, которым они нужны.
+"""
+import heapq
+import time
+import logging
+
+import numpy as np
+
+from dataset import DAILY_STATUSES, DAILY_WINDOW_DAYS, load_dataset
+from export import write_aggregate
+from jira_api import get_store, iter_search_stream
+from metrics import metrics
+from storage import STORE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL = 300  # Секунд между опросами одного проекта
+# Поля задач (storage.CHANGE_FIELDS и "transitions"), от которых зависит каждый график
+CHART_FIELDS = {
+    "open_state": {"created", "resolutiondate", "status"},
+    # Интервалы начинаются с created, последний заканчивается resolutiondate
+    "status_time": {"created", "resolutiondate", "status", "transitions"},
+    "daily": {"created", "resolutiondate", "status"},
+    "users": {"assignee", "reporter"},
+    "time_spent": {"timespent", "status"},
+    "priority": {"priority", "status"},
+    "status": {"status"},
+}
+
+
+def dirty_charts(changed, charts):
+    """Графики из charts, которые зависят от изменившихся полей changed."""
+    return [chart for chart in charts if CHART_FIELDS[chart] & changed]
+
+
+def _fetch(jql, fields, expand=None):
+    return iter_search_stream(jql, fields, expand=expand)
+
+
+def _today():
+    return np.datetime64(int(time.time() * 1000), "ms").astype("datetime64[D]")
+
+
+class PollScheduler:
+    """
+    Очередь опросов проектов по времени: каждый проект опрашивается раз в interval
+    секунд, первые опросы равномерно распределены по интервалу, чтобы проекты
+    не обращались к Jira одновременно.
+    """
+
+    def __init__(self, projects, interval, now=0.0):
+        self.interval = interval
+        step = interval / len(projects) if projects else 0
+        self._order = {project: i for i, project in enumerate(projects)}  # При равном времени - порядок проектов
+        self._queue = [(now + i * step, i, project) for i, project in enumerate(projects)]
+        heapq.heapify(self._queue)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def pop(self):
+        """Ближайший опрос: пара (время, проект)."""
+        due, _, project = heapq.heappop(self._queue)
+        return due, project
+
+    def reschedule(self, project, due, now):
+        """
+        Вернуть проект в очередь после опроса, назначенного на due.
+        Если опрос опоздал больше чем на интервал, следующий назначается от now.
+        """
+        heapq.heappush(self._queue, (max(due + self.interval, now), self._order[project], project))
+
+
+class ChartWatcher:
+    """
+    Обновление графиков проектов по изменениям в Jira.
+    Устаревшие графики копятся по проектам и перестраиваются после опроса;
+    график, который не удалось построить, остается устаревшим до следующего опроса.
+    Изменившиеся задачи копятся до ближайшего перестроения и тогда переносятся
+    в набор задач проекта (ProjectDataset.with_changes) без его полной перезагрузки.
+    """
+
+    def __init__(self, projects, charts, selected_status="Closed", daily_days=DAILY_WINDOW_DAYS,
+                 output_format="png", store=None, fetch=_fetch, loader=load_dataset):
+        self.projects = projects
+        self.charts = charts
+        self.selected_status = selected_status
+        self.daily_days = daily_days
+        self.output_format = output_format
+        self.store = store or get_store()
+        self.fetch = fetch
+        self.loader = loader
+        self.dirty = {project: set(charts) for project in projects}  # Первый опрос строит все графики
+        self.daily_day = {}  # День, на который построен график daily: окно сдвигается каждый день
+        self.datasets = {}  # Проект -> набор задач, по которому построены графики
+        self.pending = {project: {} for project in projects}  # Проект -> {ключ: IssueRecord} с прошлого перестроения
+
+    def poll(self, project_key):
+        """
+        Подтянуть изменения проекта и перестроить устаревшие графики.
+        :return: Список перестроенных графиков.
+        """
+        jql, full_load = self.store.plan_sync(project_key, force=True)
+        writer = self.store.begin_sync(project_key, full_load)
+        pending = self.pending[project_key]
+        if full_load:
+            # Набор будет загружен заново целиком
+            self.datasets.pop(project_key, None)
+            pending.clear()
+        for page in self.fetch(jql, STORE_FIELDS, "changelog"):
+            records = writer.add(page)
+            if project_key in self.datasets:
+                pending.update((record.key, record) for record in records)
+        changed = writer.finish()
+        metrics.add("watch_polls")
+
+        dirty = self.dirty[project_key]
+        dirty.update(dirty_charts(changed, self.charts))
+        if "daily" in self.charts and self.daily_day.get(project_key) != _today():
+            dirty.add("daily")
+        if not dirty:
+            logger.debug(f"Проект {project_key}: графики актуальны ({writer.count} задач без значимых изменений).")
+            return []
+
+        dataset = self._dataset(project_key, dirty)
+        refreshed = [chart for chart in sorted(dirty) if self._refresh(dataset, chart)]
+        dirty.difference_update(refreshed)
+        if "daily" in refreshed:
+            self.daily_day[project_key] = _today()
+        logger.info(f"Проект {project_key}: изменены поля {', '.join(sorted(changed)) or '-'},"
+                    f" перестроены графики {', '.join(refreshed) or '-'}.")
+        return refreshed
+
+    def _dataset(self, project_key, dirty):
+        """Набор задач проекта с накопленными изменениями (при первом обращении - полная загрузка)."""
+        dataset = self.datasets.get(project_key)
+        if dataset is None:
+            dataset = self.loader(project_key)
+        else:
+            transitions = rollup = None
+            if "status_time" in dirty:
+                transitions = self.store.query_transitions(project_key)
+            if "daily" in dirty:
+                rollup = self.store.daily_rollup(project_key, statuses=DAILY_STATUSES)
+            dataset = dataset.with_changes(self.pending[project_key].values(), transitions, rollup)
+        self.pending[project_key].clear()
+        self.datasets[project_key] = dataset
+        return dataset
+
+    def _refresh(self, dataset, chart):
+        from tasks import CHARTS, render_chart  # matplotlib загружается только при отрисовке
+
+        try:
+            aggregate = CHARTS[chart][0](dataset.chart_view(chart, self.selected_status, self.daily_days))
+            if aggregate:
+                if self.output_format == "png":
+                    render_chart(chart, aggregate, dataset.project_key)
+                else:
+                    write_aggregate(dataset.project_key, chart, aggregate, self.output_format)
+        except Exception as e:
+            logger.error(f"Ошибка обновления графика {chart} проекта {dataset.project_key}: {e}")
+            return False
+        metrics.add("watch_refreshed", chart=chart)
+        return True
+
+    def run(self, interval=WATCH_INTERVAL, max_polls=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Опрашивать проекты по расписанию.
+        :param max_polls: Остановиться после стольких опросов (None - до Ctrl+C).
+        """
+        scheduler = PollScheduler(self.projects, interval, clock())
+        polls = 0
+        while scheduler and (max_polls is None or polls < max_polls):
+            due, project = scheduler.pop()
+            delay = due - clock()
+            if delay > 0:
+                sleep(delay)
+            try:
+                self.poll(project)
+            except Exception as e:
+                logger.error(f"Ошибка опроса проекта {project}: {e}")
+            scheduler.reschedule(project, due, clock())
+            polls += 1
+        return polls
+
+
+def watch(projects, charts, selected_status="Closed", interval=WATCH_INTERVAL, daily_days=DAILY_WINDOW_DAYS,
+          output_format="png"):
+    """Запустить наблюдение за проектами до Ctrl+C."""
+    watcher = ChartWatcher(projects, charts, selected_status, daily_days, output_format)
+    print(f"Наблюдение за проектами {', '.join(projects)}: опрос каждые {interval} с (Ctrl+C - остановить)")
+    try:
+        watcher.run(interval)
+    except KeyboardInterrupt:
+        pass
+    return 0